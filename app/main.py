@@ -1,6 +1,7 @@
 #!/usr/bin/python3
+import asyncio
 import os
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
@@ -8,7 +9,7 @@ from pymongo import AsyncMongoClient
 
 from app import __version__
 
-from .routers import attachments, users
+from .routers import admin, attachments, changes, live, users
 from .routers.events import attention, withdrawal
 from .routers.events.feeding import feed_intake
 from .routers.events.health import diagnosis, treatment
@@ -31,7 +32,15 @@ from .routers.events.reproduction import (
     repro_pregnancy_check,
     repro_status,
 )
-from .routers.imagery import image, metadata
+from .routers.ftBuffer import close_buffers, start_buffers
+from .routers.ftCommon import TOMBSTONES, projected_openapi
+from .routers.ftIndexes import reconcile_indexes
+from .routers.ftLatest import LATEST
+from .routers.ftPool import POOL_MONITOR, POOL_OPTIONS
+from .routers.ftRollups import ROLLUP_TRACKER
+from .routers.ftSeries import SAMPLES, SAMPLES_TIMESERIES, open_series
+from .routers.ftThumbnails import THUMBNAILS
+from .routers.imagery import catalogue, image, metadata, uploads
 from .routers.measurements import samples, sensors
 from .routers.objects import (
     animals,
@@ -60,12 +69,27 @@ DB_URL = f"mongodb://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}"
 async def lifespan(app: FastAPI):
     await open_db(app)
     await create_indexes(app)
+    THUMBNAILS.start(DB_URL)
+    await LATEST.warm(app.state.samples)
+    start_buffers(app.state)
+    rollups = asyncio.create_task(ROLLUP_TRACKER.run(app.state))
     yield
-    await close_db(app)
+    rollups.cancel()
+    with suppress(asyncio.CancelledError):
+        await rollups
+    try:
+        # Buffered samples are written before their rollups are flushed
+        await close_buffers()
+        await ROLLUP_TRACKER.flush(app.state)
+    finally:
+        THUMBNAILS.close()
+        await close_db(app)
 
 
 async def open_db(app: FastAPI) -> AsyncMongoClient:
-    app.state.mongodb = AsyncMongoClient(DB_URL)
+    app.state.mongodb = AsyncMongoClient(
+        DB_URL, event_listeners=[POOL_MONITOR], **POOL_OPTIONS
+    )
 
     _ft = app.state.mongodb["farm-twin"]
 
@@ -73,9 +97,22 @@ async def open_db(app: FastAPI) -> AsyncMongoClient:
 
     app.state.images = _ft
     app.state.metadata = _ft["imagery"]["metadata"]
+    app.state.uploads = _ft["imagery"]["uploads"]
+    app.state.files = _ft["fs"]["files"]
+    app.state.chunks = _ft["fs"]["chunks"]
+    app.state.thumbnails = _ft["thumbnails"]["files"]
+    app.state.thumbnail_chunks = _ft["thumbnails"]["chunks"]
 
     app.state.sensors = _ft["measurements"]["sensors"]
-    app.state.samples = _ft["measurements"]["samples"]
+    if SAMPLES_TIMESERIES:
+        app.state.samples = await open_series(
+            _ft, "measurements.samples", SAMPLES
+        )
+    else:
+        app.state.samples = _ft["measurements"]["samples"]
+    app.state.samples_1m = _ft["measurements"]["samples_1m"]
+    app.state.samples_1h = _ft["measurements"]["samples_1h"]
+    app.state.samples_1d = _ft["measurements"]["samples_1d"]
 
     app.state.points = _ft["objects"]["points"]
     app.state.polygons = _ft["objects"]["polygons"]
@@ -137,24 +174,17 @@ async def open_db(app: FastAPI) -> AsyncMongoClient:
 
     app.state.attachments = _ft["attachments"]
 
+    app.state.tombstones = _ft[TOMBSTONES]
 
-async def create_indexes(app: FastAPI):
-    await app.state.withdrawal.create_index(
-        ["meta.sourceId", "meta.source"], unique=True
-    )
-    await app.state.devices.create_index(
-        ["serial", "manufacturer"], unique=True
-    )
-    await app.state.points.create_index({"point": "2dsphere"}, unique=True)
-    await app.state.polygons.create_index(["polygon"], unique=True)
-    await app.state.users.create_index(["username"], unique=True)
-    await app.state.sensors.create_index(
-        ["device", "serial", "measurement"], unique=True
+    # Change streams, used to wait for changes, need a replica set
+    hello = await app.state.mongodb.admin.command("hello")
+    app.state.replica_set = (
+        "setName" in hello or hello.get("msg") == "isdbgrid"
     )
-    _attachment_index = ["device", "thing", "start"]
-    await app.state.attachments.create_index(_attachment_index, unique=True)
-    _sample_index = ["device", "sensor", "timestamp", "predicted"]
-    await app.state.samples.create_index(_sample_index, unique=True)
+
+
+async def create_indexes(app: FastAPI):
+    app.state.index_reports = await reconcile_indexes(app.state)
 
 
 async def close_db(app: FastAPI):
@@ -162,11 +192,17 @@ async def close_db(app: FastAPI):
 
 
 app = FastAPI(lifespan=lifespan, title="{ farm-twin }", version=__version__)
+app.openapi = projected_openapi(app)
 
 app.include_router(users.router)
+app.include_router(admin.router)
+app.include_router(changes.router)
+app.include_router(live.router)
 
 app.include_router(image.router, prefix="/imagery")
 app.include_router(metadata.router, prefix="/imagery")
+app.include_router(uploads.router, prefix="/imagery")
+app.include_router(catalogue.router, prefix="/imagery")
 
 app.include_router(sensors.router, prefix="/measurements")
 app.include_router(samples.router, prefix="/measurements")
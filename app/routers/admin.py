@@ -0,0 +1,158 @@
+"""
+Collects API calls related to administration of the digital twin.
+
+This collection of endpoints allows administrators to inspect the state
+of the underlying database.
+"""
+
+from typing import List
+
+from fastapi import APIRouter, Request, Security
+from pydantic import BaseModel
+from typing_extensions import Annotated
+
+from .ftBuffer import BUFFERS, BufferCollection
+from .ftCache import CACHE, CacheStats
+from .ftIndexes import IndexReport, index_reports
+from .ftLive import LIVE, LiveStats
+from .ftPool import POOL_MONITOR, PoolCollection
+from .ftRollups import ROLLUP_TRACKER, RollupStats
+from .ftThumbnails import THUMBNAILS, ThumbnailStats
+from .users import User, get_current_active_user
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+class IndexReportCollection(BaseModel):
+    indexes: List[IndexReport]
+
+
+@router.get(
+    "/indexes",
+    response_description="List indexes",
+    response_model=IndexReportCollection,
+)
+async def index_query(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["admin"])
+    ],
+):
+    """
+    List the indexes declared for each collection, the query parameters
+    they serve and whether they exist, along with any indexes that exist
+    but are not declared.
+    """
+    return IndexReportCollection(
+        indexes=await index_reports(request.app.state)
+    )
+
+
+@router.get(
+    "/cache",
+    response_description="Query cache statistics",
+    response_model=CacheStats,
+)
+async def cache_query(
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["admin"])
+    ],
+):
+    """
+    Report hits, misses, evictions and the current size of the query
+    response cache.
+    """
+    return CACHE.stats()
+
+
+@router.get(
+    "/pool",
+    response_description="Database connection pool statistics",
+    response_model=PoolCollection,
+)
+async def pool_query(
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["admin"])
+    ],
+):
+    """
+    Report the connection pool settings and, for each server, the
+    connections open and checked out, requests waiting for a connection
+    and how long checkouts have waited.
+    """
+    return POOL_MONITOR.stats()
+
+
+@router.get(
+    "/rollups",
+    response_description="Sample rollup statistics",
+    response_model=RollupStats,
+)
+async def rollup_query(
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["admin"])
+    ],
+):
+    """
+    Report the minutes of samples written but not yet rolled up, those
+    rolled up, and how the background flushes are faring.
+    """
+    return ROLLUP_TRACKER.stats()
+
+
+@router.get(
+    "/buffers",
+    response_description="Write-behind buffer statistics",
+    response_model=BufferCollection,
+)
+async def buffer_query(
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["admin"])
+    ],
+):
+    """
+    Report, for each collection written behind, the documents waiting to
+    be written, those written, dropped or turned away, and how long
+    flushes take.
+    """
+    return BufferCollection(
+        buffers=[buffer.stats() for buffer in BUFFERS.values()]
+    )
+
+
+@router.get(
+    "/live",
+    response_description="Live subscription statistics",
+    response_model=LiveStats,
+)
+async def live_query(
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["admin"])
+    ],
+):
+    """
+    Report the number of live subscribers, and the documents pushed to
+    them or dropped as they fell behind.
+    """
+    return LIVE.stats()
+
+
+@router.get(
+    "/thumbnails",
+    response_description="Thumbnail cache statistics",
+    response_model=ThumbnailStats,
+)
+async def thumbnails_query(
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["admin"])
+    ],
+):
+    """
+    Report how often thumbnails were served from the cache or generated,
+    and how many were evicted to keep the cache within its budget.
+    """
+    return THUMBNAILS.stats()
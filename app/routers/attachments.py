@@ -17,12 +17,19 @@ and finding of those attachments.
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Request, Security, status
+from fastapi import APIRouter, Depends, Request, Security, status
 from pydantic import BaseModel, Field
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
-from .ftCommon import add_one_to_db, delete_one_from_db, find_in_db
+from .ftCommon import (
+    FTCollection,
+    Page,
+    add_one_to_db,
+    delete_one_from_db,
+    query_collection,
+)
+from .ftIndexes import declare_indexes, index
 from .users import User, get_current_active_user
 
 router = APIRouter(
@@ -44,7 +51,7 @@ class Attachment(BaseModel):
     end: Optional[datetime] = Field(default=None)
 
 
-class AttachmentCollection(BaseModel):
+class AttachmentCollection(FTCollection):
     attachments: List[Attachment]
 
 
@@ -80,6 +87,13 @@ async def remove_attachment(
     )
 
 
+INDEXES = declare_indexes(
+    "attachments",
+    index("device", "thing", "start", unique=True, serves=["device"]),
+    index("thing", serves=["thing"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for attachments",
@@ -91,6 +105,7 @@ async def attachment_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_attachments"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     device: mongo_object_id.MongoObjectId | None = None,
     thing: mongo_object_id.MongoObjectId | None = None,
@@ -100,5 +115,10 @@ async def attachment_query(
         "device": device,
         "thing": thing,
     }
-    result = await find_in_db(request.app.state.attachments, query)
-    return AttachmentCollection(attachments=result)
+    return await query_collection(
+        request,
+        request.app.state.attachments,
+        query,
+        page,
+        "attachments",
+    )
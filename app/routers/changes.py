@@ -0,0 +1,56 @@
+"""
+Collects API calls related to changes across the digital twin.
+
+This collection of endpoints allows the documents added, updated or
+deleted in every collection with a change feed to be followed in one feed.
+"""
+
+from fastapi import APIRouter, Depends, Request, Security
+from typing_extensions import Annotated
+
+from .ftChanges import (
+    TOMBSTONE_TTL,
+    ChangeCollection,
+    ChangeFeed,
+    changes_response,
+    feed_collections,
+)
+from .ftCommon import TOMBSTONES
+from .ftIndexes import (
+    declare_indexes,
+    tombstone_expiry_index,
+    tombstone_index,
+)
+from .users import User, get_current_active_user
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["changes"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+INDEXES = declare_indexes(
+    TOMBSTONES, tombstone_index(), tombstone_expiry_index(TOMBSTONE_TTL)
+)
+
+
+@router.get(
+    "/",
+    response_description="List changes",
+    response_model=ChangeCollection,
+)
+async def changes_query(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_changes"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List documents added, updated or deleted in any collection since a
+    token or time, in the order they were changed.
+    """
+    return await changes_response(
+        request, feed_collections(request.app.state), feed
+    )
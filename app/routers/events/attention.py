@@ -14,12 +14,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarAttentionEventResource.j
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
-from ..ftCommon import add_one_to_db, dateBuild, delete_one_from_db, find_in_db
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
+from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
+    add_one_to_db,
+    dateBuild,
+    delete_one_from_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
+)
+from ..ftIndexes import animal_event_indexes, declare_indexes, index
 from ..icar import icarEnums
 from ..icar.icarResources import icarAttentionEventResource as Attention
 from ..users import User, get_current_active_user
@@ -33,7 +46,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Attention"
 
 
-class AttentionCollection(BaseModel):
+class AttentionCollection(FTCollection):
     attention: List[Attention]
 
 
@@ -61,6 +74,85 @@ async def create_attention_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add attention events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_attention_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_attention"])
+    ],
+):
+    """
+    Create attention events in bulk.
+
+    :param items: Attention events to be added
+    """
+    return await add_many_to_db(Attention, items, request.app.state.attention)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace attention event by source",
+    response_model=Attention,
+    response_model_by_alias=False,
+)
+async def upsert_attention_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    attention: Attention,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_attention"])
+    ],
+):
+    """
+    Add an attention event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the attention event
+    :param sourceId: ID of the attention event in its source
+    :param attention: Attention event to add or replace
+    """
+    return await upsert_one_by_source(
+        attention,
+        request.app.state.attention,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace attention events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_attention_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_attention"])
+    ],
+):
+    """
+    Add attention events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Attention events to add or replace
+    """
+    return await upsert_many_by_source(
+        Attention, items, request.app.state.attention
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a attention event")
 async def remove_attention_event(
     request: Request,
@@ -79,6 +171,36 @@ async def remove_attention_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to attention event",
+    response_model=ChangeCollection,
+)
+async def attention_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_attention"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List attention event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.attention], feed)
+
+
+INDEXES = declare_indexes(
+    "attention",
+    *animal_event_indexes(),
+    index(
+        "alertEndDateTime",
+        serves=["alertEndDateTimeStart", "alertEndDateTimeEnd"],
+    ),
+    index("device.id", serves=["device"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for attention event",
@@ -90,6 +212,7 @@ async def attention_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_attention"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     alertEndDateTimeStart: datetime | None = None,
@@ -122,5 +245,10 @@ async def attention_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.attention, query)
-    return AttentionCollection(attention=result)
+    return await query_collection(
+        request,
+        request.app.state.attention,
+        query,
+        page,
+        "attention",
+    )
@@ -14,17 +14,26 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarFeedIntakeEventResource.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftBuffer import add_many_to_buffer, add_one_to_buffer, write_buffer
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes, index
 from ...icar.icarResources import icarFeedIntakeEventResource as FeedIntake
 from ...users import User, get_current_active_user
 
@@ -36,8 +45,10 @@ router = APIRouter(
 
 ERROR_MSG_OBJECT = "Feed Intake"
 
+BUFFER = write_buffer("feed_intake")
 
-class FeedIntakeCollection(BaseModel):
+
+class FeedIntakeCollection(FTCollection):
     feed_intake: List[FeedIntake]
 
 
@@ -50,6 +61,7 @@ class FeedIntakeCollection(BaseModel):
 )
 async def create_feed_intake_event(
     request: Request,
+    response: Response,
     feed_intake: FeedIntake,
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["write_feeding"])
@@ -60,11 +72,97 @@ async def create_feed_intake_event(
 
     :param feedintake: Feed intake to be added
     """
+    if BUFFER is not None:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await add_one_to_buffer(feed_intake, BUFFER)
     return await add_one_to_db(
         feed_intake, request.app.state.feed_intake, ERROR_MSG_OBJECT
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add feedintake events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_feed_intake_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feeding"])
+    ],
+):
+    """
+    Create feedintake events in bulk.
+
+    :param items: Feedintake events to be added
+    """
+    if BUFFER is not None:
+        return await add_many_to_buffer(FeedIntake, items, BUFFER)
+    return await add_many_to_db(
+        FeedIntake, items, request.app.state.feed_intake
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace feedintake event by source",
+    response_model=FeedIntake,
+    response_model_by_alias=False,
+)
+async def upsert_feed_intake_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    feed_intake: FeedIntake,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feeding"])
+    ],
+):
+    """
+    Add a feedintake event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the feedintake event
+    :param sourceId: ID of the feedintake event in its source
+    :param feed_intake: Feedintake event to add or replace
+    """
+    return await upsert_one_by_source(
+        feed_intake,
+        request.app.state.feed_intake,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace feedintake events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_feed_intake_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feeding"])
+    ],
+):
+    """
+    Add feedintake events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Feedintake events to add or replace
+    """
+    return await upsert_many_by_source(
+        FeedIntake, items, request.app.state.feed_intake
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a feed intake event")
 async def remove_feed_intake_event(
     request: Request,
@@ -83,6 +181,38 @@ async def remove_feed_intake_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to feed intake event",
+    response_model=ChangeCollection,
+)
+async def feed_intake_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_feeding"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List feed intake event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.feed_intake], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "feed_intake",
+    *animal_event_indexes(),
+    index(
+        "feedingStartingDateTime",
+        serves=["feedingStartingDateTimeStart", "feedingStartingDateTimeEnd"],
+    ),
+    index("device.id", serves=["device"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for feed intake event",
@@ -94,6 +224,7 @@ async def feed_intake_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_feeding"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     device: str | None = None,
@@ -116,5 +247,10 @@ async def feed_intake_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.feed_intake, query)
-    return FeedIntakeCollection(feed_intake=result)
+    return await query_collection(
+        request,
+        request.app.state.feed_intake,
+        query,
+        page,
+        "feed_intake",
+    )
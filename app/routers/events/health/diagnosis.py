@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarDiagnosisEventResource.j
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import icarDiagnosisEventResource as Diagnosis
 from ...users import User, get_current_active_user
 
@@ -34,7 +42,7 @@ router = APIRouter(
 )
 
 
-class DiagnosisCollection(BaseModel):
+class DiagnosisCollection(FTCollection):
     diagnosis: List[Diagnosis]
 
 
@@ -62,6 +70,85 @@ async def create_diagnosis_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add diagnosis events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_diagnosis_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_health"])
+    ],
+):
+    """
+    Create diagnosis events in bulk.
+
+    :param items: Diagnosis events to be added
+    """
+    return await add_many_to_db(Diagnosis, items, request.app.state.diagnosis)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace diagnosis event by source",
+    response_model=Diagnosis,
+    response_model_by_alias=False,
+)
+async def upsert_diagnosis_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    diagnosis: Diagnosis,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_health"])
+    ],
+):
+    """
+    Add a diagnosis event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the diagnosis event
+    :param sourceId: ID of the diagnosis event in its source
+    :param diagnosis: Diagnosis event to add or replace
+    """
+    return await upsert_one_by_source(
+        diagnosis,
+        request.app.state.diagnosis,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace diagnosis events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_diagnosis_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_health"])
+    ],
+):
+    """
+    Add diagnosis events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Diagnosis events to add or replace
+    """
+    return await upsert_many_by_source(
+        Diagnosis, items, request.app.state.diagnosis
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a diagnosis event")
 async def remove_diagnosis_event(
     request: Request,
@@ -80,6 +167,31 @@ async def remove_diagnosis_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to diagnosis event",
+    response_model=ChangeCollection,
+)
+async def diagnosis_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_health"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List diagnosis event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.diagnosis], feed)
+
+
+INDEXES = declare_indexes(
+    "diagnosis",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for diagnosis event",
@@ -91,6 +203,7 @@ async def diagnosis_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_health"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     createdStart: datetime | None = None,
@@ -106,5 +219,10 @@ async def diagnosis_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.diagnosis, query)
-    return DiagnosisCollection(diagnosis=result)
+    return await query_collection(
+        request,
+        request.app.state.diagnosis,
+        query,
+        page,
+        "diagnosis",
+    )
@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarTreatmentEventResource.j
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import icarTreatmentEventResource as Treatment
 from ...users import User, get_current_active_user
 
@@ -34,7 +42,7 @@ router = APIRouter(
 )
 
 
-class TreatmentCollection(BaseModel):
+class TreatmentCollection(FTCollection):
     treatment: List[Treatment]
 
 
@@ -62,6 +70,85 @@ async def create_treatment_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add treatment events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_treatment_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_health"])
+    ],
+):
+    """
+    Create treatment events in bulk.
+
+    :param items: Treatment events to be added
+    """
+    return await add_many_to_db(Treatment, items, request.app.state.treatment)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace treatment event by source",
+    response_model=Treatment,
+    response_model_by_alias=False,
+)
+async def upsert_treatment_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    treatment: Treatment,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_health"])
+    ],
+):
+    """
+    Add a treatment event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the treatment event
+    :param sourceId: ID of the treatment event in its source
+    :param treatment: Treatment event to add or replace
+    """
+    return await upsert_one_by_source(
+        treatment,
+        request.app.state.treatment,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace treatment events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_treatment_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_health"])
+    ],
+):
+    """
+    Add treatment events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Treatment events to add or replace
+    """
+    return await upsert_many_by_source(
+        Treatment, items, request.app.state.treatment
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a treatment event")
 async def remove_treatment_event(
     request: Request,
@@ -80,6 +167,31 @@ async def remove_treatment_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to treatment event",
+    response_model=ChangeCollection,
+)
+async def treatment_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_health"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List treatment event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.treatment], feed)
+
+
+INDEXES = declare_indexes(
+    "treatment",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for treatment event",
@@ -91,6 +203,7 @@ async def treatment_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_health"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     procedure: str | None = None,
@@ -110,5 +223,10 @@ async def treatment_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.treatment, query)
-    return TreatmentCollection(treatment=result)
+    return await query_collection(
+        request,
+        request.app.state.treatment,
+        query,
+        page,
+        "treatment",
+    )
@@ -12,17 +12,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarMilkingDryOffEventResour
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import icarMilkingDryOffEventResource as DryingOff
 from ...users import User, get_current_active_user
 
@@ -35,7 +43,7 @@ router = APIRouter(
 )
 
 
-class DryingOffCollection(BaseModel):
+class DryingOffCollection(FTCollection):
     drying_off: List[DryingOff]
 
 
@@ -63,6 +71,85 @@ async def create_drying_off_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add drying off events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_drying_off_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Create drying off events in bulk.
+
+    :param items: Drying off events to be added
+    """
+    return await add_many_to_db(DryingOff, items, request.app.state.drying_off)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace drying off event by source",
+    response_model=DryingOff,
+    response_model_by_alias=False,
+)
+async def upsert_drying_off_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    drying_off: DryingOff,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Add a drying off event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the drying off event
+    :param sourceId: ID of the drying off event in its source
+    :param drying_off: Drying off event to add or replace
+    """
+    return await upsert_one_by_source(
+        drying_off,
+        request.app.state.drying_off,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace drying off events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_drying_off_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Add drying off events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Drying off events to add or replace
+    """
+    return await upsert_many_by_source(
+        DryingOff, items, request.app.state.drying_off
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a drying off event")
 async def remove_drying_off_event(
     request: Request,
@@ -81,6 +168,33 @@ async def remove_drying_off_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to drying off event",
+    response_model=ChangeCollection,
+)
+async def drying_off_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_milking"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List drying off event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.drying_off], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "drying_off",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for drying off event",
@@ -92,6 +206,7 @@ async def drying_off_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_milking"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     createdStart: datetime | None = None,
@@ -107,5 +222,10 @@ async def drying_off_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.drying_off, query)
-    return DryingOffCollection(drying_off=result)
+    return await query_collection(
+        request,
+        request.app.state.drying_off,
+        query,
+        page,
+        "drying_off",
+    )
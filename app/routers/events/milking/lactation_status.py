@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarLactationStatusObservedE
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar import icarEnums
 from ...icar.icarResources import (
     icarLactationStatusObservedEventResource as LactationStatus,
@@ -37,7 +45,7 @@ router = APIRouter(
 )
 
 
-class LactationStatusCollection(BaseModel):
+class LactationStatusCollection(FTCollection):
     lactation_status: List[LactationStatus]
 
 
@@ -65,6 +73,87 @@ async def create_lactation_status_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add lactation status events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_lactation_status_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Create lactation status events in bulk.
+
+    :param items: Lactation status events to be added
+    """
+    return await add_many_to_db(
+        LactationStatus, items, request.app.state.lactation_status
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace lactation status event by source",
+    response_model=LactationStatus,
+    response_model_by_alias=False,
+)
+async def upsert_lactation_status_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    lactation_status: LactationStatus,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Add a lactation status event, or replace the one with the same source
+    and sourceId.
+
+    :param source: Source of the lactation status event
+    :param sourceId: ID of the lactation status event in its source
+    :param lactation_status: Lactation status event to add or replace
+    """
+    return await upsert_one_by_source(
+        lactation_status,
+        request.app.state.lactation_status,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace lactation status events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_lactation_status_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Add lactation status events in bulk, replacing any with the same source
+    and sourceId.
+
+    :param items: Lactation status events to add or replace
+    """
+    return await upsert_many_by_source(
+        LactationStatus, items, request.app.state.lactation_status
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_lactation_status_event(
     request: Request,
@@ -83,6 +172,33 @@ async def remove_lactation_status_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to lactation status event",
+    response_model=ChangeCollection,
+)
+async def lactation_status_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_milking"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List lactation status event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.lactation_status], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "lactation_status",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for lactation status event",
@@ -94,6 +210,7 @@ async def lactation_status_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_milking"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     observedStatus: icarEnums.icarAnimalLactationStatusType | None = None,
@@ -111,5 +228,10 @@ async def lactation_status_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.lactation_status, query)
-    return LactationStatusCollection(lactation_status=result)
+    return await query_collection(
+        request,
+        request.app.state.lactation_status,
+        query,
+        page,
+        "lactation_status",
+    )
@@ -12,17 +12,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarTestDayResultEventResour
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar import icarEnums
 from ...icar.icarResources import (
     icarTestDayResultEventResource as TestDayResult,
@@ -38,7 +46,7 @@ router = APIRouter(
 )
 
 
-class TestDayResultCollection(BaseModel):
+class TestDayResultCollection(FTCollection):
     test_day_result: List[TestDayResult]
 
 
@@ -66,6 +74,87 @@ async def create_test_day_result_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add test day result events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_test_day_result_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Create test day result events in bulk.
+
+    :param items: Test day result events to be added
+    """
+    return await add_many_to_db(
+        TestDayResult, items, request.app.state.test_day_result
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace test day result event by source",
+    response_model=TestDayResult,
+    response_model_by_alias=False,
+)
+async def upsert_test_day_result_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    test_day_result: TestDayResult,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Add a test day result event, or replace the one with the same source
+    and sourceId.
+
+    :param source: Source of the test day result event
+    :param sourceId: ID of the test day result event in its source
+    :param test_day_result: Test day result event to add or replace
+    """
+    return await upsert_one_by_source(
+        test_day_result,
+        request.app.state.test_day_result,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace test day result events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_test_day_result_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Add test day result events in bulk, replacing any with the same source
+    and sourceId.
+
+    :param items: Test day result events to add or replace
+    """
+    return await upsert_many_by_source(
+        TestDayResult, items, request.app.state.test_day_result
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a test day result event")
 async def remove_test_day_result_event(
     request: Request,
@@ -84,6 +173,33 @@ async def remove_test_day_result_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to test day result event",
+    response_model=ChangeCollection,
+)
+async def test_day_result_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_milking"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List test day result event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.test_day_result], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "test_day_result",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for test day result event",
@@ -95,6 +211,7 @@ async def test_day_result_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_milking"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     testDayCode: icarEnums.icarTestDayCodeType | None = None,
@@ -112,5 +229,10 @@ async def test_day_result_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.test_day_result, query)
-    return TestDayResultCollection(test_day_result=result)
+    return await query_collection(
+        request,
+        request.app.state.test_day_result,
+        query,
+        page,
+        "test_day_result",
+    )
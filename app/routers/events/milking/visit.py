@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarMilkingVisitEventResourc
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes, index
 from ...icar import icarEnums
 from ...icar.icarResources import icarMilkingVisitEventResource as Visit
 from ...users import User, get_current_active_user
@@ -35,7 +43,7 @@ router = APIRouter(
 )
 
 
-class VisitCollection(BaseModel):
+class VisitCollection(FTCollection):
     visit: List[Visit]
 
 
@@ -63,6 +71,83 @@ async def create_visit_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add milking visit events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_visit_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Create milking visit events in bulk.
+
+    :param items: Milking visit events to be added
+    """
+    return await add_many_to_db(Visit, items, request.app.state.visit)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace milking visit event by source",
+    response_model=Visit,
+    response_model_by_alias=False,
+)
+async def upsert_visit_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    visit: Visit,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Add a milking visit event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the milking visit event
+    :param sourceId: ID of the milking visit event in its source
+    :param visit: Milking visit event to add or replace
+    """
+    return await upsert_one_by_source(
+        visit,
+        request.app.state.visit,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace milking visit events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_visit_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_milking"])
+    ],
+):
+    """
+    Add milking visit events in bulk, replacing any with the same source
+    and sourceId.
+
+    :param items: Milking visit events to add or replace
+    """
+    return await upsert_many_by_source(Visit, items, request.app.state.visit)
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_visit_event(
     request: Request,
@@ -81,6 +166,35 @@ async def remove_visit_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to visit event",
+    response_model=ChangeCollection,
+)
+async def visit_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_milking"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List visit event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.visit], feed)
+
+
+INDEXES = declare_indexes(
+    "visit",
+    *animal_event_indexes(),
+    index(
+        "milkingStartingDateTime",
+        serves=["milkingStartingDateTimeStart", "milkingStartingDateTimeEnd"],
+    ),
+)
+
+
 @router.get(
     "/",
     response_description="Search for visit event",
@@ -92,6 +206,7 @@ async def visit_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_milking"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     milkingStartingDateTimeStart: datetime | None = None,
@@ -131,5 +246,6 @@ async def visit_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.visit, query)
-    return VisitCollection(visit=result)
+    return await query_collection(
+        request, request.app.state.visit, query, page, "visit"
+    )
@@ -11,17 +11,33 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarMovementArrivalEventReso
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Query, Request, Security, status
-from pydantic import BaseModel
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar import icarEnums
 from ...icar.icarResources import icarMovementArrivalEventResource as Arrival
 from ...users import User, get_current_active_user
@@ -35,7 +51,7 @@ router = APIRouter(
 )
 
 
-class ArrivalCollection(BaseModel):
+class ArrivalCollection(FTCollection):
     arrival: List[Arrival]
 
 
@@ -63,6 +79,84 @@ async def create_arrival_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add arrival events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_arrival_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Create arrival events in bulk.
+
+    :param items: Arrival events to be added
+    """
+    return await add_many_to_db(Arrival, items, request.app.state.arrival)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace arrival event by source",
+    response_model=Arrival,
+    response_model_by_alias=False,
+)
+async def upsert_arrival_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    arrival: Arrival,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Add an arrival event, or replace the one with the same source and sourceId.
+
+    :param source: Source of the arrival event
+    :param sourceId: ID of the arrival event in its source
+    :param arrival: Arrival event to add or replace
+    """
+    return await upsert_one_by_source(
+        arrival,
+        request.app.state.arrival,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace arrival events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_arrival_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Add arrival events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Arrival events to add or replace
+    """
+    return await upsert_many_by_source(
+        Arrival, items, request.app.state.arrival
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_arrival_event(
     request: Request,
@@ -81,6 +175,31 @@ async def remove_arrival_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to arrival event",
+    response_model=ChangeCollection,
+)
+async def arrival_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_movement"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List arrival event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.arrival], feed)
+
+
+INDEXES = declare_indexes(
+    "arrival",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for arrival event",
@@ -92,6 +211,7 @@ async def arrival_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_movement"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     arrivalReason: icarEnums.icarArrivalReasonType | None = None,
@@ -126,5 +246,10 @@ async def arrival_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.arrival, query)
-    return ArrivalCollection(arrival=result)
+    return await query_collection(
+        request,
+        request.app.state.arrival,
+        query,
+        page,
+        "arrival",
+    )
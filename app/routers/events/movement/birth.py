@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarMovementBirthEventResour
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar import icarEnums
 from ...icar.icarResources import icarMovementBirthEventResource as Birth
 from ...users import User, get_current_active_user
@@ -35,7 +43,7 @@ router = APIRouter(
 )
 
 
-class BirthCollection(BaseModel):
+class BirthCollection(FTCollection):
     birth: List[Birth]
 
 
@@ -63,6 +71,81 @@ async def create_birth_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add birth events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_birth_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Create birth events in bulk.
+
+    :param items: Birth events to be added
+    """
+    return await add_many_to_db(Birth, items, request.app.state.birth)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace birth event by source",
+    response_model=Birth,
+    response_model_by_alias=False,
+)
+async def upsert_birth_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    birth: Birth,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Add a birth event, or replace the one with the same source and sourceId.
+
+    :param source: Source of the birth event
+    :param sourceId: ID of the birth event in its source
+    :param birth: Birth event to add or replace
+    """
+    return await upsert_one_by_source(
+        birth,
+        request.app.state.birth,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace birth events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_birth_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Add birth events in bulk, replacing any with the same source and sourceId.
+
+    :param items: Birth events to add or replace
+    """
+    return await upsert_many_by_source(Birth, items, request.app.state.birth)
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_birth_event(
     request: Request,
@@ -81,6 +164,31 @@ async def remove_birth_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to birth event",
+    response_model=ChangeCollection,
+)
+async def birth_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_movement"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List birth event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.birth], feed)
+
+
+INDEXES = declare_indexes(
+    "birth",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for birth event",
@@ -92,6 +200,7 @@ async def birth_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_movement"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     registrationReason: icarEnums.icarRegistrationReasonType | None = None,
@@ -109,5 +218,6 @@ async def birth_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.birth, query)
-    return BirthCollection(birth=result)
+    return await query_collection(
+        request, request.app.state.birth, query, page, "birth"
+    )
@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarMovementDeathEventResour
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar import icarEnums
 from ...icar.icarResources import icarMovementDeathEventResource as Death
 from ...users import User, get_current_active_user
@@ -35,7 +43,7 @@ router = APIRouter(
 )
 
 
-class DeathCollection(BaseModel):
+class DeathCollection(FTCollection):
     death: List[Death]
 
 
@@ -63,6 +71,81 @@ async def create_death_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add death events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_death_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Create death events in bulk.
+
+    :param items: Death events to be added
+    """
+    return await add_many_to_db(Death, items, request.app.state.death)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace death event by source",
+    response_model=Death,
+    response_model_by_alias=False,
+)
+async def upsert_death_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    death: Death,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Add a death event, or replace the one with the same source and sourceId.
+
+    :param source: Source of the death event
+    :param sourceId: ID of the death event in its source
+    :param death: Death event to add or replace
+    """
+    return await upsert_one_by_source(
+        death,
+        request.app.state.death,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace death events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_death_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Add death events in bulk, replacing any with the same source and sourceId.
+
+    :param items: Death events to add or replace
+    """
+    return await upsert_many_by_source(Death, items, request.app.state.death)
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_death_event(
     request: Request,
@@ -81,6 +164,31 @@ async def remove_death_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to death event",
+    response_model=ChangeCollection,
+)
+async def death_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_movement"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List death event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.death], feed)
+
+
+INDEXES = declare_indexes(
+    "death",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for death event",
@@ -92,6 +200,7 @@ async def death_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_movement"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     deathReason: icarEnums.icarDeathReasonType | None = None,
@@ -119,5 +228,6 @@ async def death_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.death, query)
-    return DeathCollection(death=result)
+    return await query_collection(
+        request, request.app.state.death, query, page, "death"
+    )
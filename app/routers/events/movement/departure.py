@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarMovementDepartureEventRe
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar import icarEnums
 from ...icar.icarResources import (
     icarMovementDepartureEventResource as Departure,
@@ -37,7 +45,7 @@ router = APIRouter(
 )
 
 
-class DepartureCollection(BaseModel):
+class DepartureCollection(FTCollection):
     departure: List[Departure]
 
 
@@ -65,6 +73,85 @@ async def create_departure_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add departure events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_departure_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Create departure events in bulk.
+
+    :param items: Departure events to be added
+    """
+    return await add_many_to_db(Departure, items, request.app.state.departure)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace departure event by source",
+    response_model=Departure,
+    response_model_by_alias=False,
+)
+async def upsert_departure_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    departure: Departure,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Add a departure event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the departure event
+    :param sourceId: ID of the departure event in its source
+    :param departure: Departure event to add or replace
+    """
+    return await upsert_one_by_source(
+        departure,
+        request.app.state.departure,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace departure events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_departure_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_movement"])
+    ],
+):
+    """
+    Add departure events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Departure events to add or replace
+    """
+    return await upsert_many_by_source(
+        Departure, items, request.app.state.departure
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_departure_event(
     request: Request,
@@ -83,6 +170,31 @@ async def remove_departure_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to departure event",
+    response_model=ChangeCollection,
+)
+async def departure_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_movement"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List departure event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.departure], feed)
+
+
+INDEXES = declare_indexes(
+    "departure",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for departure event",
@@ -94,6 +206,7 @@ async def departure_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_movement"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     departureKind: icarEnums.icarDepartureKindType | None = None,
@@ -113,5 +226,10 @@ async def departure_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.departure, query)
-    return DepartureCollection(departure=result)
+    return await query_collection(
+        request,
+        request.app.state.departure,
+        query,
+        page,
+        "departure",
+    )
@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarCarcassObservationsEvent
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar import icarEnums
 from ...icar.icarResources import (
     icarCarcassObservationsEventResource as Carcass,
@@ -37,7 +45,7 @@ router = APIRouter(
 )
 
 
-class CarcassCollection(BaseModel):
+class CarcassCollection(FTCollection):
     carcass: List[Carcass]
 
 
@@ -65,6 +73,84 @@ async def create_carcass_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add carcass events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_carcass_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_observations"])
+    ],
+):
+    """
+    Create carcass events in bulk.
+
+    :param items: Carcass events to be added
+    """
+    return await add_many_to_db(Carcass, items, request.app.state.carcass)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace carcass event by source",
+    response_model=Carcass,
+    response_model_by_alias=False,
+)
+async def upsert_carcass_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    carcass: Carcass,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_observations"])
+    ],
+):
+    """
+    Add a carcass event, or replace the one with the same source and sourceId.
+
+    :param source: Source of the carcass event
+    :param sourceId: ID of the carcass event in its source
+    :param carcass: Carcass event to add or replace
+    """
+    return await upsert_one_by_source(
+        carcass,
+        request.app.state.carcass,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace carcass events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_carcass_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_observations"])
+    ],
+):
+    """
+    Add carcass events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Carcass events to add or replace
+    """
+    return await upsert_many_by_source(
+        Carcass, items, request.app.state.carcass
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_carcass_event(
     request: Request,
@@ -83,6 +169,31 @@ async def remove_carcass_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to carcass event",
+    response_model=ChangeCollection,
+)
+async def carcass_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_observations"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List carcass event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.carcass], feed)
+
+
+INDEXES = declare_indexes(
+    "carcass",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for carcass event",
@@ -94,6 +205,7 @@ async def carcass_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_observations"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     side: icarEnums.icarCarcassSideType | None = None,
@@ -115,5 +227,10 @@ async def carcass_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.carcass, query)
-    return CarcassCollection(carcass=result)
+    return await query_collection(
+        request,
+        request.app.state.carcass,
+        query,
+        page,
+        "carcass",
+    )
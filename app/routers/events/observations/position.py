@@ -11,17 +11,26 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarPositionObservationEvent
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftBuffer import add_many_to_buffer, add_one_to_buffer, write_buffer
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import (
     icarPositionObservationEventResource as Position,
 )
@@ -29,6 +38,8 @@ from ...users import User, get_current_active_user
 
 ERROR_MSG_OBJECT = "Position"
 
+BUFFER = write_buffer("position")
+
 router = APIRouter(
     prefix="/position",
     tags=["observations"],
@@ -36,7 +47,7 @@ router = APIRouter(
 )
 
 
-class PositionCollection(BaseModel):
+class PositionCollection(FTCollection):
     position: List[Position]
 
 
@@ -49,6 +60,7 @@ class PositionCollection(BaseModel):
 )
 async def create_position_event(
     request: Request,
+    response: Response,
     position: Position,
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["write_observations"])
@@ -59,11 +71,95 @@ async def create_position_event(
 
     :param position: Position to be added
     """
+    if BUFFER is not None:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await add_one_to_buffer(position, BUFFER)
     return await add_one_to_db(
         position, request.app.state.position, ERROR_MSG_OBJECT
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add position observation events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_position_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_observations"])
+    ],
+):
+    """
+    Create position observation events in bulk.
+
+    :param items: Position observation events to be added
+    """
+    if BUFFER is not None:
+        return await add_many_to_buffer(Position, items, BUFFER)
+    return await add_many_to_db(Position, items, request.app.state.position)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace position observation event by source",
+    response_model=Position,
+    response_model_by_alias=False,
+)
+async def upsert_position_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    position: Position,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_observations"])
+    ],
+):
+    """
+    Add a position observation event, or replace the one with the same
+    source and sourceId.
+
+    :param source: Source of the position observation event
+    :param sourceId: ID of the position observation event in its source
+    :param position: Position observation event to add or replace
+    """
+    return await upsert_one_by_source(
+        position,
+        request.app.state.position,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace position observation events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_position_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_observations"])
+    ],
+):
+    """
+    Add position observation events in bulk, replacing any with the same
+    source and sourceId.
+
+    :param items: Position observation events to add or replace
+    """
+    return await upsert_many_by_source(
+        Position, items, request.app.state.position
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_position_event(
     request: Request,
@@ -82,6 +178,31 @@ async def remove_position_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to position event",
+    response_model=ChangeCollection,
+)
+async def position_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_observations"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List position event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.position], feed)
+
+
+INDEXES = declare_indexes(
+    "position",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for position event",
@@ -93,6 +214,7 @@ async def position_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_observations"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     createdStart: datetime | None = None,
@@ -108,5 +230,10 @@ async def position_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.position, query)
-    return PositionCollection(position=result)
+    return await query_collection(
+        request,
+        request.app.state.position,
+        query,
+        page,
+        "position",
+    )
@@ -14,17 +14,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarConformationScoreEventRe
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import (
     icarConformationScoreEventResource as Conformation,
 )
@@ -39,7 +47,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Conformation"
 
 
-class ConformationCollection(BaseModel):
+class ConformationCollection(FTCollection):
     conformation: List[Conformation]
 
 
@@ -67,6 +75,87 @@ async def create_conformation_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add conformation events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_conformation_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Create conformation events in bulk.
+
+    :param items: Conformation events to be added
+    """
+    return await add_many_to_db(
+        Conformation, items, request.app.state.conformation
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace conformation event by source",
+    response_model=Conformation,
+    response_model_by_alias=False,
+)
+async def upsert_conformation_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    conformation: Conformation,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Add a conformation event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the conformation event
+    :param sourceId: ID of the conformation event in its source
+    :param conformation: Conformation event to add or replace
+    """
+    return await upsert_one_by_source(
+        conformation,
+        request.app.state.conformation,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace conformation events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_conformation_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Add conformation events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Conformation events to add or replace
+    """
+    return await upsert_many_by_source(
+        Conformation, items, request.app.state.conformation
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a conformation event")
 async def remove_conformation_event(
     request: Request,
@@ -85,6 +174,33 @@ async def remove_conformation_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to conformation event",
+    response_model=ChangeCollection,
+)
+async def conformation_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_performance"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List conformation event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.conformation], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "conformation",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for conformation event",
@@ -96,6 +212,7 @@ async def conformation_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_performance"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     createdStart: datetime | None = None,
@@ -111,5 +228,10 @@ async def conformation_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.conformation, query)
-    return ConformationCollection(conformation=result)
+    return await query_collection(
+        request,
+        request.app.state.conformation,
+        query,
+        page,
+        "conformation",
+    )
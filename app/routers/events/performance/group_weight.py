@@ -14,17 +14,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarGroupWeightEventResource
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes, index
 from ...icar import icarEnums
 from ...icar.icarResources import icarGroupWeightEventResource as GroupWeight
 from ...users import User, get_current_active_user
@@ -38,7 +46,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Group Weight"
 
 
-class GroupWeightCollection(BaseModel):
+class GroupWeightCollection(FTCollection):
     group_weight: List[GroupWeight]
 
 
@@ -69,6 +77,87 @@ async def create_group_weight_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add group weight events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_group_weight_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Create group weight events in bulk.
+
+    :param items: Group weight events to be added
+    """
+    return await add_many_to_db(
+        GroupWeight, items, request.app.state.group_weight
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace group weight event by source",
+    response_model=GroupWeight,
+    response_model_by_alias=False,
+)
+async def upsert_group_weight_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    group_weight: GroupWeight,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Add a group weight event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the group weight event
+    :param sourceId: ID of the group weight event in its source
+    :param group_weight: Group weight event to add or replace
+    """
+    return await upsert_one_by_source(
+        group_weight,
+        request.app.state.group_weight,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace group weight events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_group_weight_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Add group weight events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Group weight events to add or replace
+    """
+    return await upsert_many_by_source(
+        GroupWeight, items, request.app.state.group_weight
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a group weight event")
 async def remove_group_weight_event(
     request: Request,
@@ -87,6 +176,34 @@ async def remove_group_weight_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to group weight event",
+    response_model=ChangeCollection,
+)
+async def group_weight_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_performance"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List group weight event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.group_weight], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "group_weight",
+    *animal_event_indexes(),
+    index("device.id", serves=["device"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for group weight event",
@@ -98,6 +215,7 @@ async def group_weight_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_performance"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     method: icarEnums.icarWeightMethodType | None = None,
     animal: str | None = None,
@@ -117,5 +235,10 @@ async def group_weight_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.group_weight, query)
-    return GroupWeightCollection(group_weight=result)
+    return await query_collection(
+        request,
+        request.app.state.group_weight,
+        query,
+        page,
+        "group_weight",
+    )
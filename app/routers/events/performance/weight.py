@@ -14,17 +14,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarWeightEventResource.json
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes, index
 from ...icar.icarResources import icarWeightEventResource as Weight
 from ...users import User, get_current_active_user
 
@@ -37,7 +45,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Weight"
 
 
-class WeightCollection(BaseModel):
+class WeightCollection(FTCollection):
     weight: List[Weight]
 
 
@@ -68,6 +76,81 @@ async def create_weight_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add weight events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_weight_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Create weight events in bulk.
+
+    :param items: Weight events to be added
+    """
+    return await add_many_to_db(Weight, items, request.app.state.weight)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace weight event by source",
+    response_model=Weight,
+    response_model_by_alias=False,
+)
+async def upsert_weight_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    weight: Weight,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Add a weight event, or replace the one with the same source and sourceId.
+
+    :param source: Source of the weight event
+    :param sourceId: ID of the weight event in its source
+    :param weight: Weight event to add or replace
+    """
+    return await upsert_one_by_source(
+        weight,
+        request.app.state.weight,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace weight events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_weight_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_performance"])
+    ],
+):
+    """
+    Add weight events in bulk, replacing any with the same source and sourceId.
+
+    :param items: Weight events to add or replace
+    """
+    return await upsert_many_by_source(Weight, items, request.app.state.weight)
+
+
 @router.delete("/{ft}", response_description="Delete a weight event")
 async def remove_weight_event(
     request: Request,
@@ -86,6 +169,32 @@ async def remove_weight_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to weight event",
+    response_model=ChangeCollection,
+)
+async def weight_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_performance"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List weight event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.weight], feed)
+
+
+INDEXES = declare_indexes(
+    "weight",
+    *animal_event_indexes(),
+    index("device.id", serves=["device"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for weight event",
@@ -97,6 +206,7 @@ async def weight_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_performance"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     device: str | None = None,
@@ -114,5 +224,10 @@ async def weight_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.weight, query)
-    return WeightCollection(weight=result)
+    return await query_collection(
+        request,
+        request.app.state.weight,
+        query,
+        page,
+        "weight",
+    )
@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarReproAbortionEventResour
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import (
     icarReproAbortionEventResource as ReproAbortion,
 )
@@ -36,7 +44,7 @@ router = APIRouter(
 )
 
 
-class ReproAbortionCollection(BaseModel):
+class ReproAbortionCollection(FTCollection):
     repro_abortion: List[ReproAbortion]
 
 
@@ -64,6 +72,87 @@ async def create_repro_abortion_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add repro abortion events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_repro_abortion_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Create repro abortion events in bulk.
+
+    :param items: Repro abortion events to be added
+    """
+    return await add_many_to_db(
+        ReproAbortion, items, request.app.state.repro_abortion
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace repro abortion event by source",
+    response_model=ReproAbortion,
+    response_model_by_alias=False,
+)
+async def upsert_repro_abortion_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    repro_abortion: ReproAbortion,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add a repro abortion event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the repro abortion event
+    :param sourceId: ID of the repro abortion event in its source
+    :param repro_abortion: Repro abortion event to add or replace
+    """
+    return await upsert_one_by_source(
+        repro_abortion,
+        request.app.state.repro_abortion,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace repro abortion events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_repro_abortion_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add repro abortion events in bulk, replacing any with the same source
+    and sourceId.
+
+    :param items: Repro abortion events to add or replace
+    """
+    return await upsert_many_by_source(
+        ReproAbortion, items, request.app.state.repro_abortion
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_repro_abortion_event(
     request: Request,
@@ -82,6 +171,33 @@ async def remove_repro_abortion_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to repro abortion event",
+    response_model=ChangeCollection,
+)
+async def repro_abortion_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_reproduction"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List repro abortion event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.repro_abortion], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "repro_abortion",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for repro abortion event",
@@ -93,6 +209,7 @@ async def repro_abortion_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_reproduction"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     createdStart: datetime | None = None,
@@ -108,5 +225,10 @@ async def repro_abortion_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.repro_abortion, query)
-    return ReproAbortionCollection(repro_abortion=result)
+    return await query_collection(
+        request,
+        request.app.state.repro_abortion,
+        query,
+        page,
+        "repro_abortion",
+    )
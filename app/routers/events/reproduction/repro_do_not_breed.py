@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarReproDoNotBreedEventReso
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import icarReproDoNotBreedEventResource as ReproDNB
 from ...users import User, get_current_active_user
 
@@ -34,7 +42,7 @@ router = APIRouter(
 )
 
 
-class ReproDNBCollection(BaseModel):
+class ReproDNBCollection(FTCollection):
     repro_do_not_breed: List[ReproDNB]
 
 
@@ -62,6 +70,87 @@ async def create_repro_dnb_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add repro DNB events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_repro_dnb_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Create repro DNB events in bulk.
+
+    :param items: Repro DNB events to be added
+    """
+    return await add_many_to_db(
+        ReproDNB, items, request.app.state.repro_do_not_breed
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace repro DNB event by source",
+    response_model=ReproDNB,
+    response_model_by_alias=False,
+)
+async def upsert_repro_dnb_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    repro_dnb: ReproDNB,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add a repro DNB event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the repro DNB event
+    :param sourceId: ID of the repro DNB event in its source
+    :param repro_dnb: Repro DNB event to add or replace
+    """
+    return await upsert_one_by_source(
+        repro_dnb,
+        request.app.state.repro_do_not_breed,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace repro DNB events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_repro_dnb_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add repro DNB events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Repro DNB events to add or replace
+    """
+    return await upsert_many_by_source(
+        ReproDNB, items, request.app.state.repro_do_not_breed
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_repro_dnb_event(
     request: Request,
@@ -80,6 +169,33 @@ async def remove_repro_dnb_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to repro DNB event",
+    response_model=ChangeCollection,
+)
+async def repro_dnb_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_reproduction"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List repro DNB event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.repro_do_not_breed], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "repro_do_not_breed",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for repro DNB event",
@@ -91,6 +207,7 @@ async def repro_dnb_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_reproduction"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     doNotBreed: bool | None = True,
@@ -108,5 +225,10 @@ async def repro_dnb_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.repro_do_not_breed, query)
-    return ReproDNBCollection(repro_do_not_breed=result)
+    return await query_collection(
+        request,
+        request.app.state.repro_do_not_breed,
+        query,
+        page,
+        "repro_do_not_breed",
+    )
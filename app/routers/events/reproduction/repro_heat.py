@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarReproHeatEventResource.j
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes, index
 from ...icar import icarEnums
 from ...icar.icarResources import icarReproHeatEventResource as ReproHeat
 from ...users import User, get_current_active_user
@@ -35,7 +43,7 @@ router = APIRouter(
 )
 
 
-class ReproHeatCollection(BaseModel):
+class ReproHeatCollection(FTCollection):
     repro_heat: List[ReproHeat]
 
 
@@ -63,6 +71,85 @@ async def create_repro_heat_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add repro heat events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_repro_heat_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Create repro heat events in bulk.
+
+    :param items: Repro heat events to be added
+    """
+    return await add_many_to_db(ReproHeat, items, request.app.state.repro_heat)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace repro heat event by source",
+    response_model=ReproHeat,
+    response_model_by_alias=False,
+)
+async def upsert_repro_heat_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    repro_heat: ReproHeat,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add a repro heat event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the repro heat event
+    :param sourceId: ID of the repro heat event in its source
+    :param repro_heat: Repro heat event to add or replace
+    """
+    return await upsert_one_by_source(
+        repro_heat,
+        request.app.state.repro_heat,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace repro heat events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_repro_heat_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add repro heat events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Repro heat events to add or replace
+    """
+    return await upsert_many_by_source(
+        ReproHeat, items, request.app.state.repro_heat
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_repro_heat_event(
     request: Request,
@@ -81,6 +168,34 @@ async def remove_repro_heat_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to repro heat event",
+    response_model=ChangeCollection,
+)
+async def repro_heat_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_reproduction"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List repro heat event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.repro_heat], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "repro_heat",
+    *animal_event_indexes(),
+    index("device.id", serves=["device"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for repro heat event",
@@ -92,6 +207,7 @@ async def repro_heat_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_reproduction"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     heatDetectionMethod: icarEnums.icarReproHeatDetectionMethodType
@@ -118,5 +234,10 @@ async def repro_heat_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.repro_heat, query)
-    return ReproHeatCollection(repro_heat=result)
+    return await query_collection(
+        request,
+        request.app.state.repro_heat,
+        query,
+        page,
+        "repro_heat",
+    )
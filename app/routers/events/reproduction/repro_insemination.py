@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarReproInseminationEventRe
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import (
     icarReproInseminationEventResource as ReproInsemination,
 )
@@ -36,7 +44,7 @@ router = APIRouter(
 )
 
 
-class ReproInseminationCollection(BaseModel):
+class ReproInseminationCollection(FTCollection):
     repro_insemination: List[ReproInsemination]
 
 
@@ -66,6 +74,87 @@ async def create_repro_insemination_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add repro insemination events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_repro_insemination_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Create repro insemination events in bulk.
+
+    :param items: Repro insemination events to be added
+    """
+    return await add_many_to_db(
+        ReproInsemination, items, request.app.state.repro_insemination
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace repro insemination event by source",
+    response_model=ReproInsemination,
+    response_model_by_alias=False,
+)
+async def upsert_repro_insemination_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    repro_insemination: ReproInsemination,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add a repro insemination event, or replace the one with the same source
+    and sourceId.
+
+    :param source: Source of the repro insemination event
+    :param sourceId: ID of the repro insemination event in its source
+    :param repro_insemination: Repro insemination event to add or replace
+    """
+    return await upsert_one_by_source(
+        repro_insemination,
+        request.app.state.repro_insemination,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace repro insemination events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_repro_insemination_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add repro insemination events in bulk, replacing any with the same
+    source and sourceId.
+
+    :param items: Repro insemination events to add or replace
+    """
+    return await upsert_many_by_source(
+        ReproInsemination, items, request.app.state.repro_insemination
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_repro_insemination_event(
     request: Request,
@@ -84,6 +173,33 @@ async def remove_repro_insemination_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to repro insemination event",
+    response_model=ChangeCollection,
+)
+async def repro_insemination_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_reproduction"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List repro insemination event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.repro_insemination], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "repro_insemination",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for repro insemination event",
@@ -95,6 +211,7 @@ async def repro_insemination_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_reproduction"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     createdStart: datetime | None = None,
@@ -110,5 +227,10 @@ async def repro_insemination_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.repro_insemination, query)
-    return ReproInseminationCollection(repro_insemination=result)
+    return await query_collection(
+        request,
+        request.app.state.repro_insemination,
+        query,
+        page,
+        "repro_insemination",
+    )
@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarReproParturitionEventRes
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar import icarEnums
 from ...icar.icarResources import (
     icarReproParturitionEventResource as ReproParturition,
@@ -37,7 +45,7 @@ router = APIRouter(
 )
 
 
-class ReproParturitionCollection(BaseModel):
+class ReproParturitionCollection(FTCollection):
     repro_parturition: List[ReproParturition]
 
 
@@ -67,6 +75,87 @@ async def create_repro_parturition_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add repro parturition events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_repro_parturition_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Create repro parturition events in bulk.
+
+    :param items: Repro parturition events to be added
+    """
+    return await add_many_to_db(
+        ReproParturition, items, request.app.state.repro_parturition
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace repro parturition event by source",
+    response_model=ReproParturition,
+    response_model_by_alias=False,
+)
+async def upsert_repro_parturition_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    repro_parturition: ReproParturition,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add a repro parturition event, or replace the one with the same source
+    and sourceId.
+
+    :param source: Source of the repro parturition event
+    :param sourceId: ID of the repro parturition event in its source
+    :param repro_parturition: Repro parturition event to add or replace
+    """
+    return await upsert_one_by_source(
+        repro_parturition,
+        request.app.state.repro_parturition,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace repro parturition events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_repro_parturition_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add repro parturition events in bulk, replacing any with the same
+    source and sourceId.
+
+    :param items: Repro parturition events to add or replace
+    """
+    return await upsert_many_by_source(
+        ReproParturition, items, request.app.state.repro_parturition
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_repro_parturition_event(
     request: Request,
@@ -85,6 +174,33 @@ async def remove_repro_parturition_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to repro parturition event",
+    response_model=ChangeCollection,
+)
+async def repro_parturition_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_reproduction"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List repro parturition event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.repro_parturition], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "repro_parturition",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for repro parturition event",
@@ -96,6 +212,7 @@ async def repro_parturition_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_reproduction"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     isEmbryoImplant: bool | None = None,
@@ -121,5 +238,10 @@ async def repro_parturition_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.repro_parturition, query)
-    return ReproParturitionCollection(repro_parturition=result)
+    return await query_collection(
+        request,
+        request.app.state.repro_parturition,
+        query,
+        page,
+        "repro_parturition",
+    )
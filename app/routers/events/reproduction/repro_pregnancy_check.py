@@ -11,17 +11,25 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarReproPregnancyCheckEvent
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ...ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ...ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ...ftIndexes import animal_event_indexes, declare_indexes
 from ...icar.icarResources import (
     icarReproPregnancyCheckEventResource as ReproPregnancyCheck,
 )
@@ -36,7 +44,7 @@ router = APIRouter(
 )
 
 
-class ReproPregnancyCheckCollection(BaseModel):
+class ReproPregnancyCheckCollection(FTCollection):
     repro_pregnancy_check: List[ReproPregnancyCheck]
 
 
@@ -66,6 +74,87 @@ async def create_repro_pregnancy_check_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add repro pregnancy check events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_repro_pregnancy_check_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Create repro pregnancy check events in bulk.
+
+    :param items: Repro pregnancy check events to be added
+    """
+    return await add_many_to_db(
+        ReproPregnancyCheck, items, request.app.state.repro_pregnancy_check
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace repro pregnancy check event by source",
+    response_model=ReproPregnancyCheck,
+    response_model_by_alias=False,
+)
+async def upsert_repro_pregnancy_check_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    repro_pregnancy_check: ReproPregnancyCheck,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add a repro pregnancy check event, or replace the one with the same
+    source and sourceId.
+
+    :param source: Source of the repro pregnancy check event
+    :param sourceId: ID of the repro pregnancy check event in its source
+    :param repro_pregnancy_check: Repro pregnancy check event to add or replace
+    """
+    return await upsert_one_by_source(
+        repro_pregnancy_check,
+        request.app.state.repro_pregnancy_check,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace repro pregnancy check events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_repro_pregnancy_check_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_reproduction"])
+    ],
+):
+    """
+    Add repro pregnancy check events in bulk, replacing any with the same
+    source and sourceId.
+
+    :param items: Repro pregnancy check events to add or replace
+    """
+    return await upsert_many_by_source(
+        ReproPregnancyCheck, items, request.app.state.repro_pregnancy_check
+    )
+
+
 @router.delete("/{ft}", response_description="Delete event")
 async def remove_repro_pregnancy_check_event(
     request: Request,
@@ -84,6 +173,33 @@ async def remove_repro_pregnancy_check_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to repro pregnancy check event",
+    response_model=ChangeCollection,
+)
+async def repro_pregnancy_check_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_reproduction"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List repro pregnancy check event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.repro_pregnancy_check], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "repro_pregnancy_check",
+    *animal_event_indexes(),
+)
+
+
 @router.get(
     "/",
     response_description="Search for repro pregnancy check event",
@@ -95,6 +211,7 @@ async def repro_pregnancy_check_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_reproduction"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     createdStart: datetime | None = None,
@@ -110,5 +227,10 @@ async def repro_pregnancy_check_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.repro_pregnancy_check, query)
-    return ReproPregnancyCheckCollection(repro_pregnancy_check=result)
+    return await query_collection(
+        request,
+        request.app.state.repro_pregnancy_check,
+        query,
+        page,
+        "repro_pregnancy_check",
+    )
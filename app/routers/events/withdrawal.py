@@ -14,12 +14,33 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarWithdrawalEventResource.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Query, Request, Security, status
-from pydantic import BaseModel
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
-from ..ftCommon import add_one_to_db, dateBuild, delete_one_from_db, find_in_db
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
+from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
+    add_one_to_db,
+    dateBuild,
+    delete_one_from_db,
+    query_collection,
+    upsert_many_by_source,
+    upsert_one_by_source,
+)
+from ..ftIndexes import animal_event_indexes, declare_indexes, index
 from ..icar.icarResources import icarWithdrawalEventResource as Withdrawal
 from ..users import User, get_current_active_user
 
@@ -32,7 +53,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Withdrawal"
 
 
-class WithdrawalCollection(BaseModel):
+class WithdrawalCollection(FTCollection):
     withdrawal: List[Withdrawal]
 
 
@@ -60,6 +81,87 @@ async def create_withdrawal_event(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add withdrawal events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_withdrawal_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_withdrawal"])
+    ],
+):
+    """
+    Create withdrawal events in bulk.
+
+    :param items: Withdrawal events to be added
+    """
+    return await add_many_to_db(
+        Withdrawal, items, request.app.state.withdrawal
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace withdrawal event by source",
+    response_model=Withdrawal,
+    response_model_by_alias=False,
+)
+async def upsert_withdrawal_event(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    withdrawal: Withdrawal,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_withdrawal"])
+    ],
+):
+    """
+    Add a withdrawal event, or replace the one with the same source and
+    sourceId.
+
+    :param source: Source of the withdrawal event
+    :param sourceId: ID of the withdrawal event in its source
+    :param withdrawal: Withdrawal event to add or replace
+    """
+    return await upsert_one_by_source(
+        withdrawal,
+        request.app.state.withdrawal,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace withdrawal events in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_withdrawal_event_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_withdrawal"])
+    ],
+):
+    """
+    Add withdrawal events in bulk, replacing any with the same source and
+    sourceId.
+
+    :param items: Withdrawal events to add or replace
+    """
+    return await upsert_many_by_source(
+        Withdrawal, items, request.app.state.withdrawal
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a withdrawal event")
 async def remove_withdrawal_event(
     request: Request,
@@ -78,6 +180,34 @@ async def remove_withdrawal_event(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to withdrawal event",
+    response_model=ChangeCollection,
+)
+async def withdrawal_event_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_withdrawal"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List withdrawal event added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.withdrawal], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "withdrawal",
+    *animal_event_indexes(),
+    index("endDateTime", serves=["endDateTimeStart", "endDateTimeEnd"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for withdrawal event",
@@ -89,6 +219,7 @@ async def withdrawal_event_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_withdrawal"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     animal: str | None = None,
     endDateTimeStart: datetime | None = None,
@@ -107,5 +238,10 @@ async def withdrawal_event_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.withdrawal, query)
-    return WithdrawalCollection(withdrawal=result)
+    return await query_collection(
+        request,
+        request.app.state.withdrawal,
+        query,
+        page,
+        "withdrawal",
+    )
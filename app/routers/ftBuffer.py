@@ -0,0 +1,411 @@
+"""
+Write-behind buffering of high rate inserts.
+
+Sensors, position tags and feeders send many small documents, each of
+which would otherwise wait on its own insert. Collections named in
+FT_WRITE_BEHIND instead acknowledge documents once they are validated,
+with their ObjectIDs assigned up front, and hold them in a bounded
+in-process buffer. The buffer is written in unordered batches of up to
+FT_WRITE_BEHIND_BATCH documents whenever a batch is ready, or every
+FT_WRITE_BEHIND_INTERVAL seconds.
+
+A full buffer holds requests for up to FT_WRITE_BEHIND_TIMEOUT seconds
+for space to free up, then turns them away with 503 Service Unavailable,
+so clients back off rather than the process growing without bound.
+
+Documents are acknowledged before they are written, so duplicates and
+invalid documents are only counted, and any still buffered when a
+process dies are lost. A batch the database cannot be reached to write is
+tried again, but documents which cannot be encoded are dropped, so they
+do not hold up those buffered after them. On shutdown the buffers are
+flushed, and any documents which cannot be written are spilled to
+FT_WRITE_BEHIND_SPILL, if set, to be buffered again on the next startup.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, List
+
+import bson
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+from bson.errors import BSONError
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from .ftCache import CACHE
+from .ftCommon import (
+    BulkOutcome,
+    BulkOutcomeCollection,
+    stampDocument,
+    validateItems,
+)
+from .ftLive import LIVE
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# Comma separated names of the collections buffered, on the app state
+WRITE_BEHIND = [
+    name.strip()
+    for name in os.getenv("FT_WRITE_BEHIND", "").split(",")
+    if name.strip()
+]
+WRITE_BEHIND_CAPACITY = int(os.getenv("FT_WRITE_BEHIND_CAPACITY", 50000))
+WRITE_BEHIND_BATCH = int(os.getenv("FT_WRITE_BEHIND_BATCH", 1000))
+WRITE_BEHIND_INTERVAL = float(os.getenv("FT_WRITE_BEHIND_INTERVAL", 0.5))
+WRITE_BEHIND_TIMEOUT = float(os.getenv("FT_WRITE_BEHIND_TIMEOUT", 2))
+WRITE_BEHIND_SPILL = os.getenv("FT_WRITE_BEHIND_SPILL")
+
+
+class BufferStats(BaseModel):
+    collection: str
+    depth: int = Field(
+        json_schema_extra={"description": "Documents waiting to be written"}
+    )
+    capacity: int
+    accepted: int
+    written: int
+    duplicates: int = Field(
+        json_schema_extra={
+            "description": "Documents dropped as they already exist"
+        }
+    )
+    failed: int = Field(
+        json_schema_extra={
+            "description": "Documents dropped as the database rejected them"
+        }
+    )
+    rejected: int = Field(
+        json_schema_extra={
+            "description": "Documents turned away while the buffer was full"
+        }
+    )
+    retries: int = Field(
+        json_schema_extra={
+            "description": "Flushes which failed and were tried again"
+        }
+    )
+    flushes: int
+    flushLast: float = Field(
+        json_schema_extra={"description": "Seconds taken by the last flush"}
+    )
+    flushMax: float = Field(
+        json_schema_extra={"description": "Seconds taken by the slowest flush"}
+    )
+
+
+class BufferCollection(BaseModel):
+    buffers: List[BufferStats]
+
+
+class WriteBuffer:
+    """Bounded buffer of documents, written to a collection in batches."""
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        batch: int,
+        interval: float,
+        timeout: float,
+    ):
+        self.name = name
+        self.capacity = capacity
+        self.batch = batch
+        self.interval = interval
+        self.timeout = timeout
+        self.pending: list[dict] = []
+        self.callbacks: list[Callable[[list[dict]], None]] = []
+        self.db = None
+        self.task = None
+        self.closed = False
+        self.ready = asyncio.Event()
+        self.space = asyncio.Condition()
+        self.lock = asyncio.Lock()
+        self.accepted = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.rejected = 0
+        self.retries = 0
+        self.flushes = 0
+        self.flushLast = 0.0
+        self.flushMax = 0.0
+
+    async def put(self, documents: list[dict]):
+        """
+        Buffer documents, waiting for space if the buffer is full. Raises
+        503 if there is no space in time, or the buffer is closed.
+        """
+        if self.closed:
+            raise HTTPException(status_code=503, detail="Shutting down")
+        if len(documents) > self.capacity:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {self.capacity} items can be buffered",
+            )
+        async with self.space:
+            try:
+                await asyncio.wait_for(
+                    self.space.wait_for(
+                        lambda: (
+                            len(self.pending) + len(documents) <= self.capacity
+                        )
+                    ),
+                    self.timeout,
+                )
+            except TimeoutError:
+                self.rejected += len(documents)
+                raise HTTPException(
+                    status_code=503,
+                    detail="Write buffer is full",
+                    headers={"Retry-After": str(max(1, round(self.interval)))},
+                )
+            self.pending.extend(documents)
+            self.accepted += len(documents)
+        if len(self.pending) >= self.batch:
+            self.ready.set()
+
+    async def write(self, documents: list[dict]) -> list[dict]:
+        """
+        Insert a batch, dropping any documents the database rejects.
+        Returns the documents written.
+        """
+        rejected = {}
+        try:
+            await self.db.insert_many(
+                [stampDocument(d) for d in documents], ordered=False
+            )
+        except BulkWriteError as e:
+            rejected = {
+                error["index"]: error for error in e.details["writeErrors"]
+            }
+        CACHE.bump(self.db.full_name)
+        for error in rejected.values():
+            if error["code"] == 11000:
+                self.duplicates += 1
+            else:
+                self.failed += 1
+                logger.error(
+                    "Dropped a document buffered for %s: %s",
+                    self.name,
+                    error.get("errmsg"),
+                )
+        written = [d for i, d in enumerate(documents) if i not in rejected]
+        self.inserted += len(written)
+        return written
+
+    def notify(self, written: list[dict]):
+        """Pass the documents written on, without failing the flush."""
+        LIVE.publish(self.db.name, written)
+        for callback in self.callbacks:
+            try:
+                callback(written)
+            except Exception:
+                logger.exception(
+                    "Could not pass on documents written to %s", self.name
+                )
+
+    def drop_unencodable(self, documents: list[dict]) -> int:
+        """
+        Drop the documents of a batch at the head of the buffer which cannot
+        be encoded, or the whole batch if none can be found at fault.
+        Returns the number dropped.
+        """
+        bad = []
+        for i, document in enumerate(documents):
+            try:
+                bson.encode(stampDocument(document))
+            except (BSONError, OverflowError, TypeError, ValueError):
+                bad.append(i)
+        if not bad:
+            bad = list(range(len(documents)))
+        for i in reversed(bad):
+            del self.pending[i]
+        self.failed += len(bad)
+        return len(bad)
+
+    async def flush(self):
+        """
+        Write every buffered document, a batch at a time. A batch which
+        fails to be written as a whole is left at the head of the buffer.
+        """
+        async with self.lock:
+            while self.pending:
+                documents = self.pending[: self.batch]
+                start = time.perf_counter()
+                try:
+                    written = await self.write(documents)
+                except PyMongoError:
+                    self.retries += 1
+                    raise
+                except Exception:
+                    # Would fail again, so drop what cannot be written
+                    dropped = self.drop_unencodable(documents)
+                    logger.exception(
+                        "Dropped %d documents buffered for %s",
+                        dropped,
+                        self.name,
+                    )
+                    written = None
+                finally:
+                    self.flushLast = time.perf_counter() - start
+                    self.flushMax = max(self.flushMax, self.flushLast)
+                if written is not None:
+                    # Only ever appended to while writing, so the head is
+                    # the same
+                    del self.pending[: len(documents)]
+                    self.flushes += 1
+                    self.notify(written)
+                async with self.space:
+                    self.space.notify_all()
+
+    async def run(self):
+        """Flush whenever a batch is ready, or every interval."""
+        while True:
+            try:
+                await asyncio.wait_for(self.ready.wait(), self.interval)
+            except TimeoutError:
+                pass
+            self.ready.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Could not write buffer for %s", self.name)
+
+    def start(self, db):
+        self.db = db
+        self.closed = False
+        # Bound to the event loop of the app
+        self.ready = asyncio.Event()
+        self.space = asyncio.Condition()
+        self.lock = asyncio.Lock()
+        self.pending[:0] = unspill(self.name)
+        self.task = asyncio.create_task(self.run())
+
+    async def close(self):
+        """Stop accepting documents and write those still buffered."""
+        self.closed = True
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush()
+        except PyMongoError:
+            logger.exception("Could not write buffer for %s", self.name)
+            spill(self.name, self.pending)
+            self.pending = []
+
+    def stats(self) -> BufferStats:
+        return BufferStats(
+            collection=self.name,
+            depth=len(self.pending),
+            capacity=self.capacity,
+            accepted=self.accepted,
+            written=self.inserted,
+            duplicates=self.duplicates,
+            failed=self.failed,
+            rejected=self.rejected,
+            retries=self.retries,
+            flushes=self.flushes,
+            flushLast=self.flushLast,
+            flushMax=self.flushMax,
+        )
+
+
+def spill(name: str, documents: list[dict]):
+    """Save documents which could not be written, if there is anywhere to."""
+    if not documents:
+        return
+    if not WRITE_BEHIND_SPILL:
+        logger.error("Lost %d documents buffered for %s", len(documents), name)
+        return
+    directory = Path(WRITE_BEHIND_SPILL)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}-{uuid.uuid4().hex}.bson"
+    path.write_bytes(b"".join(bson.encode(d) for d in documents))
+    logger.warning("Spilled %d documents to %s", len(documents), path)
+
+
+def unspill(name: str) -> list[dict]:
+    """Take back the documents spilled from a buffer."""
+    if not WRITE_BEHIND_SPILL:
+        return []
+    documents = []
+    for path in sorted(Path(WRITE_BEHIND_SPILL).glob(f"{name}-*.bson")):
+        documents.extend(bson.decode_all(path.read_bytes()))
+        path.unlink()
+        logger.info("Buffered documents spilled to %s", path)
+    return documents
+
+
+BUFFERS: dict[str, WriteBuffer] = {}
+
+
+def write_buffer(name: str, written=None) -> WriteBuffer | None:
+    """
+    The buffer of a collection, if it is written behind, given a callback
+    to run on the documents of each batch once they are written.
+    """
+    if name not in WRITE_BEHIND:
+        return None
+    buffer = BUFFERS.setdefault(
+        name,
+        WriteBuffer(
+            name,
+            WRITE_BEHIND_CAPACITY,
+            WRITE_BEHIND_BATCH,
+            WRITE_BEHIND_INTERVAL,
+            WRITE_BEHIND_TIMEOUT,
+        ),
+    )
+    if written is not None:
+        buffer.callbacks.append(written)
+    return buffer
+
+
+async def add_one_to_buffer(model, buffer: WriteBuffer) -> dict:
+    """
+    Buffer a single document, returned as dumped with the ObjectID it will
+    be written with.
+    """
+    document = model.model_dump(by_alias=True, exclude=["ft"])
+    document["_id"] = ObjectId()
+    await buffer.put([document])
+    return document
+
+
+async def add_many_to_buffer(
+    model, items: list[dict], buffer: WriteBuffer
+) -> BulkOutcomeCollection:
+    """
+    Validate several items and buffer the valid ones, which are reported
+    as accepted with the ObjectIDs they will be written with.
+    """
+    outcomes, positions, documents = validateItems(model, items)
+    for document in documents:
+        document["_id"] = ObjectId()
+    await buffer.put(documents)
+    for position, document in zip(positions, documents):
+        outcomes[position] = BulkOutcome(ft=document["_id"], status="accepted")
+    return BulkOutcomeCollection(outcomes=outcomes)
+
+
+def start_buffers(state):
+    """Start writing each buffer to its collection on the app state."""
+    for name, buffer in BUFFERS.items():
+        buffer.start(getattr(state, name))
+
+
+async def close_buffers():
+    for buffer in BUFFERS.values():
+        await buffer.close()
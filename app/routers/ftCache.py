@@ -0,0 +1,166 @@
+"""
+In-process cache of query responses.
+
+Responses are cached against the collection queried, the filtered query,
+the projection and the page requested, up to a budget of bytes, with the
+least recently used responses evicted first.
+
+Every collection has a generation, which is bumped whenever a document in
+it is added, updated or deleted. Responses record the generation of their
+collection when the query was made and are discarded once it has moved
+on. Writes made by other processes do not bump the generation, so each
+response also expires after a time to live.
+
+Entity tags are a digest of the encoded response, so they change only
+when it does and are the same from every process. A client's copy of a
+cached response is confirmed as current without querying the database.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+import orjson
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+load_dotenv()
+QUERY_CACHE_BYTES = int(os.getenv("FT_QUERY_CACHE_BYTES", 64 * 1024 * 1024))
+QUERY_CACHE_TTL = float(os.getenv("FT_QUERY_CACHE_TTL", 30))
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    evictions: int = Field(
+        json_schema_extra={
+            "description": "Responses evicted to keep within the budget"
+        }
+    )
+    expirations: int = Field(
+        json_schema_extra={
+            "description": "Responses discarded as older than the TTL"
+        }
+    )
+    invalidations: int = Field(
+        json_schema_extra={
+            "description": "Responses discarded after their collection"
+            " was written to"
+        }
+    )
+    entries: int
+    size: int = Field(
+        json_schema_extra={"description": "Bytes of cached responses"}
+    )
+    budget: int = Field(
+        json_schema_extra={"description": "Maximum bytes of responses"}
+    )
+    ttl: float = Field(
+        json_schema_extra={"description": "Seconds a response is cached for"}
+    )
+
+
+class CacheEntry(NamedTuple):
+    generation: int
+    expires: float
+    body: bytes
+
+
+class QueryCache:
+    """LRU cache of encoded query responses, invalidated by writes."""
+
+    def __init__(self, budget: int, ttl: float):
+        self.budget = budget
+        self.ttl = ttl
+        self.entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self.generations: dict[str, int] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self, collection: str) -> int:
+        return self.generations.get(collection, 0)
+
+    def bump(self, collection: str):
+        """Invalidate every cached response from a collection."""
+        self.generations[collection] = self.generation(collection) + 1
+
+    def get(self, key: tuple) -> bytes | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.generation != self.generation(key[0]):
+            self.invalidations += 1
+        elif entry.expires <= time.monotonic():
+            self.expirations += 1
+        else:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+        self._remove(key)
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple, generation: int, body: bytes):
+        """
+        Cache a response, given the generation of its collection at the
+        time the query was made.
+        """
+        if len(body) > self.budget or generation != self.generation(key[0]):
+            return
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = CacheEntry(
+            generation, time.monotonic() + self.ttl, body
+        )
+        self.size += len(body)
+        while self.size > self.budget:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            invalidations=self.invalidations,
+            entries=len(self.entries),
+            size=self.size,
+            budget=self.budget,
+            ttl=self.ttl,
+        )
+
+    def _remove(self, key: tuple):
+        self.size -= len(self.entries.pop(key).body)
+
+
+def etag(body: bytes) -> str:
+    """Entity tag of an encoded response."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def cacheKey(collection: str, query: dict, page, key: str) -> tuple:
+    """
+    Key a response by its collection, filtered query, projection and page.
+
+    Query values are encoded by their repr where they have no JSON form,
+    so an ObjectID and its string are distinct.
+    """
+    return (
+        collection,
+        orjson.dumps(query, default=repr),
+        orjson.dumps(page.projection),
+        page.cursor,
+        page.limit,
+        key,
+    )
+
+
+CACHE = QueryCache(QUERY_CACHE_BYTES, QUERY_CACHE_TTL)
@@ -0,0 +1,261 @@
+"""
+Change feeds over farm-twin collections.
+
+Every write made through ftCommon stamps the document with a timestamp
+assigned by the server, and every delete leaves a stamped tombstone, so the
+documents added, updated or deleted since any point can be found with an
+index range scan. Changes are returned in order of their stamp, collection
+and ObjectID, with a token marking the position of the last change so the
+feed can be resumed from it.
+
+Writes are not necessarily visible in the order they were stamped, so a
+change made concurrently with a read of the feed may be stamped before the
+returned position. Clients needing every change should resume from a
+position a few seconds behind the latest.
+
+Tombstones are removed FT_TOMBSTONE_TTL seconds after the delete, so a
+feed resumed from a position older than that may miss deletes. Clients
+which fall that far behind must resync from a full query instead.
+
+Where MongoDB is a replica set, clients may ask to wait for changes. The
+request then waits on a change stream until a change is written, rather
+than returning nothing and being repeated.
+"""
+
+import asyncio
+import base64
+import binascii
+import os
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional
+
+import bson
+import orjson
+import pymongo
+from bson.errors import BSONError
+from bson.objectid import ObjectId
+from bson.timestamp import Timestamp
+from dotenv import load_dotenv
+from fastapi import HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+from pydantic_extra_types import mongo_object_id
+from typing_extensions import Annotated
+
+from .ftCommon import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_PAGE_LIMIT,
+    STAMP,
+    TOMBSTONES,
+    bsonDefault,
+    documentToFT,
+)
+from .ftIndexes import REGISTRY, changes_index
+
+MAX_WAIT = 60
+
+load_dotenv()
+TOMBSTONE_TTL = int(os.getenv("FT_TOMBSTONE_TTL", 30 * 24 * 60 * 60))
+
+
+class Change(BaseModel):
+    ft: mongo_object_id.MongoObjectId
+    collection: str
+    deleted: bool
+    document: Optional[dict[str, Any]] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "The document as written, unless deleted"
+        },
+    )
+
+
+class ChangeCollection(BaseModel):
+    changes: List[Change]
+    next: Optional[str] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "Token to resume the feed after these changes"
+        },
+    )
+
+
+class Position(NamedTuple):
+    stamp: Timestamp
+    collection: str
+    ft: ObjectId
+
+
+class ChangeFeed:
+    """Parameters of change feed endpoints."""
+
+    def __init__(
+        self,
+        token: Annotated[
+            str | None,
+            Query(description="Resume after the position of a token"),
+        ] = None,
+        since: Annotated[
+            datetime | None,
+            Query(description="Start from changes made since this time"),
+        ] = None,
+        limit: Annotated[
+            int, Query(gt=0, le=MAX_PAGE_LIMIT)
+        ] = DEFAULT_PAGE_LIMIT,
+        wait: Annotated[
+            float,
+            Query(
+                ge=0,
+                le=MAX_WAIT,
+                description="Seconds to wait for a change if there are"
+                " none. Only supported by replica sets.",
+            ),
+        ] = 0,
+    ):
+        self.position = startPosition(token, since)
+        self.limit = limit
+        self.wait = wait
+
+
+def feed_collections(state) -> list:
+    """Collections with a change feed, i.e. with a changes index."""
+    keys = changes_index().keys
+    return [
+        getattr(state, collection)
+        for collection, indexes in REGISTRY.items()
+        if any(i.keys == keys for i in indexes)
+    ]
+
+
+def encodeToken(position: Position) -> str:
+    return base64.urlsafe_b64encode(
+        bson.encode(dict(zip(Position._fields, position)))
+    ).decode()
+
+
+def decodeToken(token: str) -> Position:
+    try:
+        return Position(**bson.decode(base64.urlsafe_b64decode(token)))
+    except (binascii.Error, BSONError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid token")
+
+
+def startPosition(token: str | None, since: datetime | None):
+    if token is not None:
+        return decodeToken(token)
+    if since is not None:
+        return Position(Timestamp(since, 0), "", ObjectId("0" * 24))
+    return None
+
+
+def afterQuery(position: Position | None, collection: str, key: str):
+    """
+    Match the stamped documents of a collection after a position, where
+    key is the field holding their ObjectID.
+    """
+    if position is None:
+        return {STAMP: {"$type": "timestamp"}}
+    stamp, after, ft = position
+    if collection > after:
+        return {STAMP: {"$gte": stamp}}
+    if collection < after:
+        return {STAMP: {"$gt": stamp}}
+    return {
+        "$or": [
+            {STAMP: {"$gt": stamp}},
+            {STAMP: stamp, key: {"$gt": ft}},
+        ]
+    }
+
+
+async def collection_changes(db, position: Position | None, limit: int):
+    """The first changes to a collection after a position."""
+    name = db.name
+    order = [(STAMP, pymongo.ASCENDING)]
+    live = db.find(afterQuery(position, name, "_id"))
+    live = live.sort(order + [("_id", pymongo.ASCENDING)]).limit(limit)
+    dead = db.database[TOMBSTONES].find(
+        {"collection": name, **afterQuery(position, name, "ft")}
+    )
+    dead = dead.sort(order + [("ft", pymongo.ASCENDING)]).limit(limit)
+
+    changes = []
+    for document in await live.to_list(limit):
+        stamp = document.pop(STAMP)
+        changes.append(
+            (
+                Position(stamp, name, document["_id"]),
+                {
+                    "ft": document["_id"],
+                    "collection": name,
+                    "deleted": False,
+                    "document": documentToFT(document),
+                },
+            )
+        )
+    for tombstone in await dead.to_list(limit):
+        changes.append(
+            (
+                Position(tombstone[STAMP], name, tombstone["ft"]),
+                {"ft": tombstone["ft"], "collection": name, "deleted": True},
+            )
+        )
+    return sorted(changes, key=lambda change: change[0])[:limit]
+
+
+async def read_changes(dbs: list, position: Position | None, limit: int):
+    """The first changes to any of the collections after a position."""
+    changes = await asyncio.gather(
+        *(collection_changes(db, position, limit) for db in dbs)
+    )
+    changes = [change for changed in changes for change in changed]
+    return sorted(changes, key=lambda change: change[0])[:limit]
+
+
+def watchPipeline(dbs: list) -> list:
+    """Match writes to the collections, and deletions from them."""
+    names = [db.name for db in dbs]
+    return [
+        {
+            "$match": {
+                "$or": [
+                    {"ns.coll": {"$in": names}},
+                    {
+                        "ns.coll": TOMBSTONES,
+                        "fullDocument.collection": {"$in": names},
+                    },
+                ]
+            }
+        }
+    ]
+
+
+async def changes_response(request: Request, dbs: list, feed: ChangeFeed):
+    """
+    Respond with the changes to the collections after the feed's position,
+    waiting on a change stream for a change if asked to.
+    """
+    if feed.wait == 0 or not request.app.state.replica_set:
+        changes = await read_changes(dbs, feed.position, feed.limit)
+    else:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + feed.wait
+        # Watch before reading, so no change between the two is missed
+        async with await dbs[0].database.watch(
+            watchPipeline(dbs), max_await_time_ms=1000
+        ) as stream:
+            changes = await read_changes(dbs, feed.position, feed.limit)
+            while not changes and loop.time() < deadline:
+                if await stream.try_next() is not None:
+                    changes = await read_changes(
+                        dbs, feed.position, feed.limit
+                    )
+
+    position = changes[-1][0] if changes else feed.position
+    content = {
+        "changes": [change for _, change in changes],
+        "next": encodeToken(position) if position is not None else None,
+    }
+    return Response(
+        content=orjson.dumps(content, default=bsonDefault),
+        media_type="application/json",
+    )
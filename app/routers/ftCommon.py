@@ -1,10 +1,35 @@
-from datetime import datetime
-from typing import Optional
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import Any, List, Literal, Optional
 
+import orjson
 import pymongo
-from fastapi import HTTPException, Response, status
-from pydantic import BaseModel, ConfigDict, Field
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from bson.timestamp import Timestamp
+from fastapi import Body, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 from pydantic_extra_types import mongo_object_id
+from typing_extensions import Annotated
+
+from .ftCache import CACHE, cacheKey, etag
+from .ftLive import LIVE
+
+DEFAULT_PAGE_LIMIT = 1000
+MAX_PAGE_LIMIT = 10000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MAX_BULK_ITEMS = 10000
+
+# Server assigned timestamp of the last write to a document, which orders
+# the change feed. It is internal, so is not returned by queries.
+STAMP = "_stamp"
+HIDE_STAMP = {STAMP: 0}
+# Empty timestamp, which the server replaces with the time of the write
+EMPTY_STAMP = Timestamp(0, 0)
+# Collection recording deleted documents for the change feed
+TOMBSTONES = "tombstones"
 
 
 class FTModel(BaseModel):
@@ -16,6 +41,168 @@ class FTModel(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class FTCollection(BaseModel):
+    """farm-twin common collection parameters."""
+
+    next: Optional[str] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "Cursor for the next page of results, if any"
+        },
+    )
+
+
+class BulkOutcome(BaseModel):
+    """Outcome of adding a single item as part of a bulk request."""
+
+    ft: Optional[mongo_object_id.MongoObjectId] = Field(
+        default=None,
+        json_schema_extra={"description": "ObjectID of the created item"},
+    )
+    status: Literal[
+        "created", "accepted", "updated", "duplicate", "invalid", "failed"
+    ]
+    detail: Optional[str] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "Reason the item was not created, if any"
+        },
+    )
+
+
+class BulkOutcomeCollection(BaseModel):
+    outcomes: List[BulkOutcome]
+
+
+BulkItems = Annotated[
+    List[dict[str, Any]],
+    Body(
+        max_length=MAX_BULK_ITEMS,
+        description="Items to be added. Each is validated individually, so"
+        " an invalid item does not prevent the others being added.",
+    ),
+]
+
+
+class Page:
+    """
+    Keyset pagination and projection parameters for query endpoints.
+
+    The cursor is opaque to clients; it encodes the ObjectID of the last
+    document returned, so each page is an index-backed range scan on _id
+    rather than a skip over every preceding document.
+
+    Fields are passed to the database as a projection, so only the
+    requested parts of each document are read, sent and decoded.
+    """
+
+    def __init__(
+        self,
+        cursor: str | None = None,
+        limit: Annotated[
+            int, Query(gt=0, le=MAX_PAGE_LIMIT)
+        ] = DEFAULT_PAGE_LIMIT,
+        fields: Annotated[
+            str | None,
+            Query(
+                description="Comma separated list of fields to return, e.g."
+                " 'animal.id,milkingMilkWeight'. Documents returned are"
+                " partial and are not validated against the full model."
+            ),
+        ] = None,
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.projection = buildProjection(fields)
+
+
+def buildProjection(fields: str | None):
+    if not fields:
+        return None
+    projection = {}
+    for field in fields.split(","):
+        field = field.strip()
+        if field == "ft":
+            continue
+        if (
+            not field
+            or field.startswith("$")
+            or ".." in field
+            or field.split(".")[0] == STAMP
+        ):
+            raise HTTPException(
+                status_code=400, detail=f"Invalid field '{field}'"
+            )
+        projection[field] = 1
+    # The database rejects a field along with one within it, which the
+    # outer field returns anyway
+    return {
+        field: 1
+        for field in projection
+        if not any(field.startswith(outer + ".") for outer in projection)
+    } or {"_id": 1}
+
+
+PARTIAL_COLLECTION = {
+    "title": "PartialCollection",
+    "type": "object",
+    "description": "Page of documents holding only the fields requested",
+    "properties": {"next": {"type": "string"}},
+    "additionalProperties": {"type": "array", "items": {"type": "object"}},
+}
+
+
+def relax_projected_responses(schema: dict) -> dict:
+    """
+    Allow a partial page of documents as the response of each query taking
+    fields, as those returned then are not validated against its model.
+    """
+    schema.setdefault("components", {}).setdefault("schemas", {})[
+        PARTIAL_COLLECTION["title"]
+    ] = PARTIAL_COLLECTION
+    partial = {"$ref": f"#/components/schemas/{PARTIAL_COLLECTION['title']}"}
+    for operations in schema.get("paths", {}).values():
+        for operation in operations.values():
+            if not any(
+                parameter.get("in") == "query"
+                and parameter.get("name") == "fields"
+                for parameter in operation.get("parameters", [])
+            ):
+                continue
+            content = (
+                operation.get("responses", {})
+                .get("200", {})
+                .get("content", {})
+                .get("application/json")
+            )
+            if content is not None and "schema" in content:
+                content["schema"] = {"anyOf": [content["schema"], partial]}
+    return schema
+
+
+def projected_openapi(app):
+    """The OpenAPI schema of an app, with projected responses relaxed."""
+    openapi = app.openapi
+
+    def relaxed() -> dict:
+        if app.openapi_schema is None:
+            app.openapi_schema = relax_projected_responses(openapi())
+        return app.openapi_schema
+
+    return relaxed
+
+
+def encodeCursor(ft: ObjectId) -> str:
+    return base64.urlsafe_b64encode(ft.binary).decode()
+
+
+def decodeCursor(cursor: str) -> ObjectId:
+    try:
+        return ObjectId(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 def filterQuery(query: dict):
     filtered_query = {}
     for k, v in query.items():
@@ -38,24 +225,309 @@ def dateBuild(start: datetime, end: datetime):
         return {}
 
 
+def stampDocument(document: dict) -> dict:
+    """
+    Copy a document for insertion with an empty timestamp, which the
+    server replaces with the time of the write.
+    """
+    return {STAMP: EMPTY_STAMP, **document}
+
+
+def stampUpdate(update: dict) -> dict:
+    """Add setting the timestamp to the time of the write to an update."""
+    return {**update, "$currentDate": {STAMP: {"$type": "timestamp"}}}
+
+
 async def add_one_to_db(model, db, error_msg_object: str):
-    model = model.model_dump(by_alias=True, exclude=["ft"])
+    """
+    Insert a single document.
+
+    The stored document is returned as dumped, with its new ObjectID, so
+    no further read is needed to respond to the client.
+    """
+    document = model.model_dump(by_alias=True, exclude=["ft"])
     try:
-        new = await db.insert_one(model)
+        new = await db.insert_one(stampDocument(document))
     except pymongo.errors.DuplicateKeyError:
         raise HTTPException(
             status_code=404, detail=f"{error_msg_object} already exists"
         )
-    if (created := await db.find_one({"_id": new.inserted_id})) is not None:
-        return created
-    raise HTTPException(
-        status_code=404, detail=f"{error_msg_object} not successfully added"
+    CACHE.bump(db.full_name)
+    document["_id"] = new.inserted_id
+    LIVE.publish(db.name, [document])
+    return document
+
+
+def validateItems(model, items: list[dict]):
+    """
+    Validate the items of a bulk request.
+
+    Returns the outcomes of the items, with those which were invalid filled
+    in, along with the positions and dumped documents of the valid items.
+    """
+    outcomes = [None] * len(items)
+    positions, documents = [], []
+    for position, item in enumerate(items):
+        try:
+            document = model.model_validate(item)
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in e.errors()
+            )
+            outcomes[position] = BulkOutcome(status="invalid", detail=detail)
+            continue
+        positions.append(position)
+        documents.append(document.model_dump(by_alias=True, exclude=["ft"]))
+    return outcomes, positions, documents
+
+
+def writeErrorOutcome(error: dict) -> BulkOutcome:
+    if error["code"] == 11000:
+        return BulkOutcome(status="duplicate", detail="Item already exists")
+    return BulkOutcome(status="failed", detail=error.get("errmsg"))
+
+
+async def insert_many_to_db(model, items: list[dict], db):
+    """
+    Validate several items and insert the valid ones in one unordered write.
+
+    Returns an outcome for every item, in the order they were given, along
+    with the documents inserted, as dumped and without their stamp.
+    """
+    outcomes, positions, documents = validateItems(model, items)
+    documents = [{"_id": ObjectId(), **document} for document in documents]
+
+    write_errors = {}
+    if documents:
+        try:
+            await db.insert_many(
+                [stampDocument(document) for document in documents],
+                ordered=False,
+            )
+        except pymongo.errors.BulkWriteError as e:
+            write_errors = {
+                error["index"]: error for error in e.details["writeErrors"]
+            }
+        CACHE.bump(db.full_name)
+
+    for index, position in enumerate(positions):
+        if (error := write_errors.get(index)) is None:
+            outcomes[position] = BulkOutcome(
+                ft=documents[index]["_id"], status="created"
+            )
+        else:
+            outcomes[position] = writeErrorOutcome(error)
+    written = [d for i, d in enumerate(documents) if i not in write_errors]
+    LIVE.publish(db.name, written)
+    return BulkOutcomeCollection(outcomes=outcomes), written
+
+
+async def add_many_to_db(model, items: list[dict], db):
+    """
+    Validate several items and insert the valid ones in one unordered write.
+
+    Returns an outcome for every item, in the order they were given.
+    """
+    outcomes, _ = await insert_many_to_db(model, items, db)
+    return outcomes
+
+
+async def add_batch_to_db(db, documents: list[dict]):
+    """
+    Insert documents which have already been validated in one unordered
+    write, leaving the driver to split it into batches.
+
+    Returns the number inserted and the positions of any which already
+    exist. Any other write error is raised.
+    """
+    documents = [stampDocument(document) for document in documents]
+    duplicates = []
+    try:
+        await db.insert_many(documents, ordered=False)
+    except pymongo.errors.BulkWriteError as e:
+        errors = e.details["writeErrors"]
+        if any(error["code"] != 11000 for error in errors):
+            raise
+        duplicates = [error["index"] for error in errors]
+    finally:
+        CACHE.bump(db.full_name)
+    skipped = set(duplicates)
+    LIVE.publish(
+        db.name, [d for i, d in enumerate(documents) if i not in skipped]
+    )
+    return len(documents) - len(duplicates), duplicates
+
+
+def sourceFilter(document: dict) -> dict:
+    """Filter matching documents with the same source and sourceId."""
+    meta = document.get("meta") or {}
+    return {
+        "meta.source": meta.get("source"),
+        "meta.sourceId": meta.get("sourceId"),
+    }
+
+
+def sourceUpsert(document: dict) -> dict:
+    """
+    Update replacing a document's fields, which gives the document a new
+    ObjectID if it is inserted, so no read is needed to find it.
+    """
+    return stampUpdate({"$set": document, "$setOnInsert": {"_id": ObjectId()}})
+
+
+async def upsertOne(db, query: dict, update: dict) -> dict | None:
+    """
+    Upsert a document, returning the _id of the document replaced, if any.
+    An upsert racing another to insert the same document loses on the
+    unique index, so is tried once more, replacing the one inserted.
+    """
+    try:
+        return await db.find_one_and_update(
+            query, update, projection={"_id": 1}, upsert=True
+        )
+    except pymongo.errors.DuplicateKeyError:
+        return await db.find_one_and_update(
+            query, update, projection={"_id": 1}, upsert=True
+        )
+
+
+async def bulkWrite(db, operations: list) -> tuple[dict, dict]:
+    """
+    Write operations unordered, returning the write errors and the
+    ObjectIDs of documents upserted, by index of the operation.
+    """
+    try:
+        result = await db.bulk_write(operations, ordered=False)
+    except pymongo.errors.BulkWriteError as e:
+        return (
+            {error["index"]: error for error in e.details["writeErrors"]},
+            {u["index"]: u["_id"] for u in e.details["upserted"]},
+        )
+    return {}, result.upserted_ids
+
+
+async def upsert_one_by_source(
+    model,
+    db,
+    source: str,
+    sourceId: str,
+    response: Response,
+    error_msg_object: str,
+):
+    """
+    Insert a document, or replace the document with the same source and
+    sourceId, in a single write.
+
+    Responds 201 if the document was inserted, otherwise 200, or 409 if it
+    clashes with another document on a different unique key.
+    """
+    document = model.model_dump(by_alias=True, exclude=["ft"])
+    query = sourceFilter(document)
+    if query != {"meta.source": source, "meta.sourceId": sourceId}:
+        raise HTTPException(
+            status_code=400,
+            detail="meta.source and meta.sourceId must match the path",
+        )
+    update = sourceUpsert(document)
+    try:
+        existing = await upsertOne(db, query, update)
+    except pymongo.errors.DuplicateKeyError:
+        # Clashes with another document on a different unique index
+        raise HTTPException(
+            status_code=409, detail=f"{error_msg_object} already exists"
+        )
+    CACHE.bump(db.full_name)
+    if existing is None:
+        response.status_code = status.HTTP_201_CREATED
+        document["_id"] = update["$setOnInsert"]["_id"]
+    else:
+        document["_id"] = existing["_id"]
+    LIVE.publish(db.name, [document])
+    return document
+
+
+async def upsert_many_by_source(model, items: list[dict], db):
+    """
+    Validate several items and, in one unordered write, insert each valid
+    item or replace the document with the same source and sourceId.
+
+    Returns an outcome for every item, in the order they were given. Only
+    inserted items are given an ObjectID, and published to live
+    subscribers, as finding those of replaced documents would need a
+    further read.
+    """
+    outcomes, valid, documents = validateItems(model, items)
+
+    positions, operations, upserts = [], [], []
+    for position, document in zip(valid, documents):
+        query = sourceFilter(document)
+        if not all(isinstance(v, str) for v in query.values()):
+            outcomes[position] = BulkOutcome(
+                status="invalid",
+                detail="meta.source and meta.sourceId are required",
+            )
+            continue
+        positions.append(position)
+        upserts.append(document)
+        operations.append(
+            pymongo.UpdateOne(query, sourceUpsert(document), upsert=True)
+        )
+
+    write_errors, upserted = {}, {}
+    if operations:
+        write_errors, upserted = await bulkWrite(db, operations)
+        # Upserts which lost a race to insert the same document are tried
+        # once more, replacing the one inserted
+        retry = [i for i, e in write_errors.items() if e["code"] == 11000]
+        if retry:
+            errors, again = await bulkWrite(db, [operations[i] for i in retry])
+            for i, index in enumerate(retry):
+                del write_errors[index]
+                if i in errors:
+                    write_errors[index] = errors[i]
+                elif i in again:
+                    upserted[index] = again[i]
+        CACHE.bump(db.full_name)
+
+    for index, position in enumerate(positions):
+        if (error := write_errors.get(index)) is not None:
+            outcomes[position] = writeErrorOutcome(error)
+        elif index in upserted:
+            outcomes[position] = BulkOutcome(
+                ft=upserted[index], status="created"
+            )
+        else:
+            outcomes[position] = BulkOutcome(status="updated")
+    LIVE.publish(
+        db.name,
+        [
+            {"_id": upserted[index], **upserts[index]}
+            for index in upserted
+            if index not in write_errors
+        ],
+    )
+    return BulkOutcomeCollection(outcomes=outcomes)
+
+
+async def recordDelete(db, ft):
+    """Invalidate cached queries and leave a tombstone for a delete."""
+    CACHE.bump(db.full_name)
+    await db.database[TOMBSTONES].insert_one(
+        stampDocument(
+            {
+                "collection": db.name,
+                "ft": ft,
+                "deleted": datetime.now(timezone.utc),
+            }
+        )
     )
 
 
 async def delete_one_from_db(db, ft: mongo_object_id, error_msg_object: str):
     delete_result = await db.delete_one({"_id": ft})
     if delete_result.deleted_count == 1:
+        await recordDelete(db, ft)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
     raise HTTPException(
@@ -63,24 +535,169 @@ async def delete_one_from_db(db, ft: mongo_object_id, error_msg_object: str):
     )
 
 
-async def find_in_db(db, query: dict):
-    result = await db.find(filterQuery(query)).to_list(1000)
+async def find_one_and_delete_from_db(
+    db, ft: mongo_object_id, projection: dict, error_msg_object: str
+) -> dict:
+    """
+    Delete a document, returning the fields of it projected, for callers
+    which must update what was derived from it.
+    """
+    deleted = await db.find_one_and_delete({"_id": ft}, projection=projection)
+    if deleted is None:
+        raise HTTPException(
+            status_code=404, detail=f"{error_msg_object} {ft} not found"
+        )
+    await recordDelete(db, ft)
+    return deleted
+
+
+def pageQuery(query: dict, page: Page) -> dict:
+    query = filterQuery(query)
+    if page.cursor is not None:
+        after = {"_id": {"$gt": decodeCursor(page.cursor)}}
+        query = {"$and": [query, after]} if query else after
+    return query
+
+
+async def find_in_db(db, query: dict, page: Page | None = None):
+    """
+    Find one page of documents matching the query, ordered by _id.
+
+    Returns the documents and a cursor for the following page, which is
+    None once the final page has been reached.
+    """
+    page = page or Page()
+    cursor = db.find(pageQuery(query, page), page.projection or HIDE_STAMP)
+    cursor = cursor.sort("_id", pymongo.ASCENDING)
+    result = await cursor.limit(page.limit + 1).to_list(page.limit + 1)
 
     if len(result) > 0:
-        return result
+        next_cursor = None
+        if len(result) > page.limit:
+            result = result[: page.limit]
+            next_cursor = encodeCursor(result[-1]["_id"])
+        return result, next_cursor
 
     raise HTTPException(status_code=404, detail="No match found")
 
 
+def bsonDefault(value):
+    """Encode the BSON types found in stored documents as JSON."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def documentToFT(document: dict) -> dict:
+    return {"ft": document.pop("_id"), **document}
+
+
+def documentToJSON(document: dict) -> bytes:
+    return orjson.dumps(documentToFT(document), default=bsonDefault)
+
+
+def encodeDocuments(key: str, documents: list, next_cursor: str | None):
+    """
+    Encode a page of stored documents directly as JSON bytes.
+
+    Stored documents were validated when they were written, so they are
+    trusted: BSON types are converted as they are met rather than each
+    document being rebuilt and re-validated as a model.
+    """
+    content = {key: [documentToFT(d) for d in documents], "next": next_cursor}
+    return orjson.dumps(content, default=bsonDefault)
+
+
+async def stream_from_db(db, query: dict, page: Page | None = None):
+    """
+    Stream every document matching the query as newline delimited JSON.
+
+    Documents are read from the database cursor and written to the client
+    one at a time, so memory use does not grow with the size of the result.
+    Pagination limits are not applied, though a cursor may be given to
+    resume an earlier stream.
+    """
+    page = page or Page()
+    cursor = db.find(pageQuery(query, page), page.projection or HIDE_STAMP)
+    cursor = cursor.sort("_id", pymongo.ASCENDING)
+    if (first := await anext(cursor, None)) is None:
+        await cursor.close()
+        raise HTTPException(status_code=404, detail="No match found")
+
+    async def lines():
+        try:
+            yield documentToJSON(first) + b"\n"
+            async for document in cursor:
+                yield documentToJSON(document) + b"\n"
+        finally:
+            await cursor.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def etagMatches(request: Request, etag: str) -> bool:
+    """Whether a request's If-None-Match header matches an entity tag."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+async def query_collection(
+    request: Request,
+    db,
+    query: dict,
+    page: Page,
+    key: str,
+):
+    """
+    Respond to a query endpoint.
+
+    Clients sending an 'Accept: application/x-ndjson' header receive a
+    stream of documents, otherwise a single page of results is returned.
+
+    Stored documents were validated when they were written, so they are
+    encoded as stored, bypassing the response model, and the encoded page
+    is cached until the collection is next written to. Encoded pages carry
+    an ETag digested from their content, so clients holding a current copy
+    are answered with 304 Not Modified, without querying the database if
+    the page is cached.
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return await stream_from_db(db, query, page)
+
+    cache_key = cacheKey(db.full_name, filterQuery(query), page, key)
+    if (content := CACHE.get(cache_key)) is None:
+        generation = CACHE.generation(db.full_name)
+        result, next_cursor = await find_in_db(db, query, page)
+        content = encodeDocuments(key, result, next_cursor)
+        CACHE.put(cache_key, generation, content)
+    headers = {"ETag": etag(content)}
+    if etagMatches(request, headers["ETag"]):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    return Response(
+        content=content, media_type="application/json", headers=headers
+    )
+
+
 async def update_one_in_db(
     model, db, ft: mongo_object_id, error_msg_object: str
 ):
-    await db.update_one(
+    """Update a single document and return it in one atomic operation."""
+    document = model.model_dump(by_alias=True, exclude=["ft", "created"])
+    updated = await db.find_one_and_update(
         {"_id": ft},
-        {"$set": model.model_dump(by_alias=True, exclude=["ft", "created"])},
+        stampUpdate({"$set": document}),
+        projection=HIDE_STAMP,
         upsert=False,
+        return_document=pymongo.ReturnDocument.AFTER,
     )
-    if (updated := await db.find_one({"_id": ft})) is not None:
+    if updated is not None:
+        CACHE.bump(db.full_name)
+        LIVE.publish(db.name, [updated])
         return updated
     raise HTTPException(
         status_code=404,
@@ -0,0 +1,215 @@
+"""
+Streaming downloads and deduplication of GridFS files.
+
+Files are sent a chunk at a time as they are read from GridFS, so a
+download holds only the chunks being read in memory, however large the
+file. A single byte range may be requested, so interrupted downloads can
+be resumed, with If-Range ensuring the rest is of the same file.
+
+GridFS files are never changed once written, so their ObjectID serves as
+a strong entity tag.
+
+Files are stored once for each content. Each file records the SHA-256
+hash of its content, which is unique, and how many uploads refer to it.
+A file uploaded again is dropped in favour of the one stored, which gains
+a reference, and a file is only deleted along with its last reference.
+"""
+
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple
+
+import pymongo
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from .ftCommon import etagMatches
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+SHA256 = "metadata.sha256"
+REFS = "metadata.refs"
+
+
+class ByteRange(NamedTuple):
+    # First and last bytes, inclusive, as in Content-Range
+    start: int
+    end: int
+
+
+def contentType(file) -> str:
+    """Content type of a file, as given when it was uploaded."""
+    metadata = file.metadata or {}
+    return (
+        metadata.get("contentType")
+        or file.content_type
+        or DEFAULT_CONTENT_TYPE
+    )
+
+
+def lastModified(file) -> str:
+    uploaded = file.upload_date.replace(tzinfo=timezone.utc)
+    return format_datetime(uploaded, usegmt=True)
+
+
+def parseRange(header: str, length: int) -> ByteRange | None:
+    """
+    The byte range of a Range header, or None if it should be ignored, as
+    with several ranges. Raises 416 if the range is outside the file.
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header)
+    if match is None or match[1] == match[2] == "":
+        return None
+    if match[1] == "":
+        # The last bytes of the file
+        start, end = max(0, length - int(match[2])), length - 1
+    else:
+        start = int(match[1])
+        end = min(int(match[2]), length - 1) if match[2] else length - 1
+    if start > end or start >= length:
+        raise HTTPException(
+            status_code=416,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{length}"},
+        )
+    return ByteRange(start, end)
+
+
+def ifRangeMatches(request: Request, etag: str, modified: datetime) -> bool:
+    """
+    Whether the Range header of a request applies, i.e. it has no If-Range
+    header or its If-Range header matches the file.
+    """
+    header = request.headers.get("if-range")
+    if header is None:
+        return True
+    header = header.strip()
+    if header.startswith(('"', "W/")):
+        # Weak tags never match
+        return header == etag
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    modified = modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return since.tzinfo is not None and since == modified
+
+
+async def chunks(file, byteRange: ByteRange):
+    """Read a range of a file's bytes, a chunk at a time."""
+    try:
+        await file.seek(byteRange.start)
+        remaining = byteRange.end - byteRange.start + 1
+        while remaining > 0:
+            data = await file.readchunk()
+            if not data:
+                break
+            yield data[:remaining]
+            remaining -= len(data)
+    finally:
+        await file.close()
+
+
+async def download_response(request: Request, file, headers: dict):
+    """
+    Respond with an open GridFS file, or the byte range of it requested,
+    streamed a chunk at a time. The file is closed once sent.
+    """
+    length = int(file.length)
+    etag = f'"{file._id}"'
+    headers = headers | {
+        "ETag": etag,
+        "Last-Modified": lastModified(file),
+        "Accept-Ranges": "bytes",
+    }
+    if etagMatches(request, etag):
+        await file.close()
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    byteRange, status_code = ByteRange(0, length - 1), status.HTTP_200_OK
+    header = request.headers.get("range")
+    if header is not None and ifRangeMatches(request, etag, file.upload_date):
+        try:
+            requested = parseRange(header, length)
+        except HTTPException:
+            await file.close()
+            raise
+        if requested is not None:
+            byteRange = requested
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = (
+                f"bytes {requested.start}-{requested.end}/{length}"
+            )
+    headers["Content-Length"] = str(byteRange.end - byteRange.start + 1)
+    return StreamingResponse(
+        chunks(file, byteRange),
+        status_code=status_code,
+        media_type=contentType(file),
+        headers=headers,
+    )
+
+
+async def hash_chunks(state, ft) -> str:
+    """SHA-256 hash of a stored file's content, read a chunk at a time."""
+    digest = hashlib.sha256()
+    cursor = state.chunks.find({"files_id": ft}, {"_id": 0, "data": 1})
+    async for chunk in cursor.sort("n", pymongo.ASCENDING):
+        digest.update(chunk["data"])
+    return digest.hexdigest()
+
+
+async def delete_file(state, ft):
+    await state.files.delete_one({"_id": ft})
+    await state.chunks.delete_many({"files_id": ft})
+
+
+async def deduplicate(state, ft, sha256: str):
+    """
+    Record the hash of a file just stored, or, if the same content is
+    stored already, delete the file and refer to that one instead.
+    Returns the ObjectID of the file holding the content.
+    """
+    while True:
+        existing = await state.files.find_one_and_update(
+            {SHA256: sha256, "_id": {"$ne": ft}},
+            {"$inc": {REFS: 1}},
+            projection={"_id": 1},
+        )
+        if existing is not None:
+            await delete_file(state, ft)
+            return existing["_id"]
+        try:
+            await state.files.update_one(
+                {"_id": ft}, {"$set": {SHA256: sha256, REFS: 1}}
+            )
+            return ft
+        except pymongo.errors.DuplicateKeyError:
+            # The same content was stored at the same time, so refer to it
+            continue
+
+
+async def release_file(state, ft) -> bool:
+    """
+    Drop a reference to a file, deleting it along with its last. Files
+    stored before references were counted have one. Returns False if there
+    is no such file.
+    """
+    while True:
+        shared = await state.files.find_one_and_update(
+            {"_id": ft, REFS: {"$gt": 1}},
+            {"$inc": {REFS: -1}},
+            projection={"_id": 1},
+        )
+        if shared is not None:
+            return True
+        deleted = await state.files.delete_one(
+            {"_id": ft, REFS: {"$not": {"$gt": 1}}}
+        )
+        if deleted.deleted_count == 1:
+            await state.chunks.delete_many({"files_id": ft})
+            return True
+        if await state.files.count_documents({"_id": ft}, limit=1) == 0:
+            return False
+        # Referred to again since, so drop that reference instead
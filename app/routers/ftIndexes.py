@@ -0,0 +1,279 @@
+"""
+Declarative registry of the indexes which serve each collection's queries.
+
+Routers declare their indexes next to the query they serve, keyed by the
+name of the collection on the application state. On startup, the declared
+indexes are reconciled with those in the database: missing indexes are
+created, indexes on the same fields with other options (unique, partial
+filter or expiry) are replaced, and any undeclared indexes are reported,
+but left in place.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from .ftCommon import STAMP
+
+logger = logging.getLogger(__name__)
+
+
+class FTIndex(BaseModel):
+    """An index declared by a router."""
+
+    keys: List[Tuple[str, int | str]] = Field(
+        json_schema_extra={"description": "Fields and directions indexed"}
+    )
+    unique: bool = Field(default=False)
+    partial: Optional[dict] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "Filter on the documents included in the index"
+        },
+    )
+    serves: List[str] = Field(
+        default=[],
+        json_schema_extra={
+            "description": "Query parameters served by the index"
+        },
+    )
+    expire: Optional[int] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "Seconds after the indexed time documents are"
+            " removed"
+        },
+    )
+
+    @property
+    def name(self) -> str:
+        """Name of the index, matching MongoDB's default naming."""
+        return "_".join(
+            f"{field}_{direction}" for field, direction in self.keys
+        )
+
+    def options(self) -> dict:
+        options = {"unique": self.unique}
+        if self.partial is not None:
+            options["partialFilterExpression"] = self.partial
+        if self.expire is not None:
+            options["expireAfterSeconds"] = self.expire
+        return options
+
+    def model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name, **self.options())
+
+
+class DeclaredIndex(FTIndex):
+    present: bool = Field(
+        json_schema_extra={
+            "description": "Index exists in the database, with the same"
+            " options"
+        }
+    )
+    replaces: Optional[str] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "Index on the same fields with other options,"
+            " which is replaced"
+        },
+    )
+
+
+class IndexReport(BaseModel):
+    collection: str
+    declared: List[DeclaredIndex]
+    undeclared: List[str] = Field(
+        json_schema_extra={
+            "description": "Indexes in the database which are not declared"
+        }
+    )
+
+
+REGISTRY: dict[str, List[FTIndex]] = {}
+
+
+def index(
+    *keys: str | Tuple[str, int | str],
+    unique=False,
+    partial=None,
+    serves=(),
+    expire=None,
+):
+    """
+    Build an index from field names, ascending by default, or pairs of
+    field name and direction.
+    """
+    keys = [(key, 1) if isinstance(key, str) else key for key in keys]
+    return FTIndex(
+        keys=keys,
+        unique=unique,
+        partial=partial,
+        serves=list(serves),
+        expire=expire,
+    )
+
+
+def source_index() -> FTIndex:
+    """
+    Unique index on the source and sourceId of ICAR resources, which backs
+    upserts by source. Resources without a sourceId are not indexed.
+    """
+    return index(
+        "meta.sourceId",
+        "meta.source",
+        unique=True,
+        partial={
+            "meta.source": {"$type": "string"},
+            "meta.sourceId": {"$type": "string"},
+        },
+    )
+
+
+def changes_index() -> FTIndex:
+    """Index serving the change feed of a collection."""
+    return index(STAMP, "_id")
+
+
+def tombstone_index() -> FTIndex:
+    """Index serving deletions in the change feeds of collections."""
+    return index("collection", STAMP, "ft")
+
+
+def tombstone_expiry_index(seconds: int) -> FTIndex:
+    """Index removing tombstones a number of seconds after the delete."""
+    return index("deleted", expire=seconds)
+
+
+def meta_indexes(
+    modified: bool = False, upserts: bool = True
+) -> List[FTIndex]:
+    """
+    Indexes serving the meta query parameters and change feed of ICAR
+    resources, and their upserts by source unless they have none.
+    """
+    indexes = [
+        changes_index(),
+        index("meta.source", "meta.sourceId", serves=["source", "sourceId"]),
+        index("meta.created", serves=["createdStart", "createdEnd"]),
+    ]
+    if upserts:
+        indexes.insert(1, source_index())
+    if modified:
+        indexes.append(
+            index("meta.modified", serves=["modifiedStart", "modifiedEnd"])
+        )
+    return indexes
+
+
+def animal_event_indexes() -> List[FTIndex]:
+    """Indexes serving the query parameters common to animal events."""
+    return [index("animal.id", "_id", serves=["animal"]), *meta_indexes()]
+
+
+def declare_indexes(collection: str, *indexes: FTIndex) -> List[FTIndex]:
+    """Register the indexes required by queries on a collection."""
+    REGISTRY.setdefault(collection, []).extend(indexes)
+    return list(indexes)
+
+
+def _normalise(keys) -> Tuple[Tuple[str, int | str], ...]:
+    return tuple(
+        (field, int(d) if isinstance(d, (int, float)) else d)
+        for field, d in keys
+    )
+
+
+def _options(info: dict) -> dict:
+    """Options of an index in the database, as FTIndex.options gives."""
+    options = {"unique": bool(info.get("unique", False))}
+    if "partialFilterExpression" in info:
+        options["partialFilterExpression"] = info["partialFilterExpression"]
+    if "expireAfterSeconds" in info:
+        options["expireAfterSeconds"] = int(info["expireAfterSeconds"])
+    return options
+
+
+def _declared(i: FTIndex, existing: dict, existing_keys: dict):
+    name = existing_keys.get(_normalise(i.keys))
+    if name is None:
+        return DeclaredIndex(**i.model_dump(), present=False)
+    if _options(existing[name]) != i.options():
+        return DeclaredIndex(**i.model_dump(), present=False, replaces=name)
+    return DeclaredIndex(**i.model_dump(), present=True)
+
+
+async def compare_indexes(db, declared: List[FTIndex]) -> IndexReport:
+    """
+    Compare the declared indexes of a collection with those that exist, by
+    their fields and options.
+    """
+    existing = await db.index_information()
+    existing_keys = {
+        _normalise(info["key"]): name for name, info in existing.items()
+    }
+    declared_keys = {_normalise(i.keys) for i in declared}
+    return IndexReport(
+        collection=db.name,
+        declared=[_declared(i, existing, existing_keys) for i in declared],
+        undeclared=[
+            name
+            for keys, name in existing_keys.items()
+            if name != "_id_" and keys not in declared_keys
+        ],
+    )
+
+
+async def index_reports(state) -> List[IndexReport]:
+    """Report on the indexes of every collection with declared indexes."""
+    return [
+        await compare_indexes(getattr(state, collection), declared)
+        for collection, declared in REGISTRY.items()
+    ]
+
+
+async def reconcile_indexes(state) -> List[IndexReport]:
+    """
+    Create any declared indexes which are missing from the database,
+    replacing those on the same fields with other options, and report any
+    which exist but have not been declared. An index which cannot be
+    created is logged and reported as missing.
+    """
+    reports = []
+    for collection, declared in REGISTRY.items():
+        db = getattr(state, collection)
+        report = await compare_indexes(db, declared)
+        missing = [i for i in report.declared if not i.present]
+        for i in missing:
+            try:
+                if i.replaces is not None:
+                    await db.drop_index(i.replaces)
+                    logger.info(
+                        "Dropped index %s on %s to change its options",
+                        i.replaces,
+                        report.collection,
+                    )
+                await db.create_indexes([i.model()])
+            except OperationFailure as e:
+                # e.g. a unique index over existing duplicates
+                logger.error(
+                    "Could not create index %s on %s: %s",
+                    i.name,
+                    report.collection,
+                    e,
+                )
+            else:
+                logger.info(
+                    "Created index %s on %s", i.name, report.collection
+                )
+        if missing:
+            report = await compare_indexes(db, declared)
+        for name in report.undeclared:
+            logger.warning(
+                "Index %s on %s is not declared", name, report.collection
+            )
+        reports.append(report)
+    return reports
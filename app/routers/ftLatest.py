@@ -0,0 +1,120 @@
+"""
+In-process map of the latest sample from each sensor.
+
+Dashboards most often ask for the current reading of their sensors, which
+would otherwise be a query per sensor. Samples written through the API
+are kept in the map as they are inserted, so the latest of any number of
+sensors is read from memory.
+
+Sensors missing from the map are read from the database, the latest
+sample found by the index on sensor and timestamp, and the real readings
+of every sensor are read on startup. Samples written by other processes
+are not seen as they are inserted, so each entry is read again once it
+is older than FT_LATEST_TTL seconds.
+"""
+
+import asyncio
+import os
+import time
+from typing import NamedTuple
+
+import pymongo
+from dotenv import load_dotenv
+
+from .ftCommon import HIDE_STAMP
+from .ftRollups import fromMillis, millis
+
+load_dotenv()
+LATEST_TTL = float(os.getenv("FT_LATEST_TTL", 60))
+# Sensors read from the database at once, so warming many holds few
+# connections from the pool
+LATEST_CONCURRENCY = 8
+
+
+class LatestEntry(NamedTuple):
+    # Latest sample, or None if the sensor has none
+    document: dict | None
+    expires: float
+
+
+class LatestSamples:
+    """Latest sample of each sensor, real or predicted."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.entries: dict[tuple, LatestEntry] = {}
+
+    def observe(self, documents: list[dict]):
+        """Keep any sample documents inserted which are the latest."""
+        for document in documents:
+            if document.get("timestamp") is None or "_id" not in document:
+                continue
+            key = (document["sensor"], bool(document.get("predicted")))
+            entry = self.entries.get(key)
+            stamp = millis(document["timestamp"])
+            if entry is not None and entry.document is not None:
+                if millis(entry.document["timestamp"]) > stamp:
+                    continue
+            # As read back from the database: UTC, without a zone
+            document = document | {
+                "timestamp": fromMillis(stamp).replace(tzinfo=None)
+            }
+            self.entries[key] = LatestEntry(
+                document, entry.expires if entry else self.expiry()
+            )
+
+    def forget(self, ft):
+        """Drop a sample which has been deleted, to be read again."""
+        for key, entry in list(self.entries.items()):
+            if entry.document is not None and entry.document["_id"] == ft:
+                del self.entries[key]
+
+    def expiry(self) -> float:
+        return time.monotonic() + self.ttl
+
+    async def load(self, db, key: tuple) -> dict | None:
+        """Read the latest sample of a sensor from the database."""
+        sensor, predicted = key
+        query = {
+            "sensor": sensor,
+            "predicted": True if predicted else {"$ne": True},
+            "timestamp": {"$ne": None},
+        }
+        cursor = db.find(query, HIDE_STAMP)
+        cursor = cursor.sort("timestamp", pymongo.DESCENDING).limit(1)
+        documents = await cursor.to_list(1)
+        document = documents[0] if documents else None
+        self.entries[key] = LatestEntry(document, self.expiry())
+        return document
+
+    async def get(self, db, keys: list[tuple]) -> list[dict | None]:
+        """Latest samples of sensors, reading those unknown or expired."""
+        now = time.monotonic()
+        latest, stale = {}, []
+        for key in dict.fromkeys(keys):
+            entry = self.entries.get(key)
+            if entry is None or entry.expires <= now:
+                stale.append(key)
+            else:
+                latest[key] = entry.document
+        if stale:
+            latest |= dict(zip(stale, await self.loadMany(db, stale)))
+        return [latest[key] for key in keys]
+
+    async def loadMany(self, db, keys: list[tuple]) -> list[dict | None]:
+        """Read the latest samples of sensors, a few at a time."""
+        limit = asyncio.Semaphore(LATEST_CONCURRENCY)
+
+        async def load(key):
+            async with limit:
+                return await self.load(db, key)
+
+        return await asyncio.gather(*(load(key) for key in keys))
+
+    async def warm(self, db):
+        """Read the latest real sample of every sensor."""
+        sensors = await db.distinct("sensor")
+        await self.loadMany(db, [(s, False) for s in sensors])
+
+
+LATEST = LatestSamples(LATEST_TTL)
@@ -0,0 +1,219 @@
+"""
+In-process fan-out of documents to live subscribers.
+
+Displays which poll queries to appear live cost a query per screen per
+poll. Instead, documents written through ftCommon and the write-behind
+buffers are published to a hub once written, which pushes each to the
+subscribers of its collection, sensor or animal, the latter by the
+animal.id of ICAR events. A write therefore costs a
+push per interested subscriber, however often they would have polled.
+
+Each subscriber holds at most FT_LIVE_BUFFER documents. A subscriber which
+falls further behind loses the oldest, and is told how many were dropped
+so it can catch up from the change feed. At most FT_LIVE_SUBSCRIBERS may
+subscribe to a process at once.
+
+Only writes made by this process are published, so with several workers
+a subscriber sees those made by the worker it is connected to. Documents
+are published after they are written, so a failure to publish is logged
+rather than failing the write.
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from collections.abc import Hashable
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+LIVE_BUFFER = int(os.getenv("FT_LIVE_BUFFER", 1000))
+LIVE_SUBSCRIBERS = int(os.getenv("FT_LIVE_SUBSCRIBERS", 1000))
+LIVE_KEEPALIVE = float(os.getenv("FT_LIVE_KEEPALIVE", 15))
+
+
+class LiveStats(BaseModel):
+    subscribers: int
+    published: int = Field(
+        json_schema_extra={
+            "description": "Documents written which had a subscriber"
+        }
+    )
+    delivered: int = Field(
+        json_schema_extra={"description": "Documents pushed to subscribers"}
+    )
+    dropped: int = Field(
+        json_schema_extra={
+            "description": "Documents dropped by subscribers which fell behind"
+        }
+    )
+    refused: int = Field(
+        json_schema_extra={
+            "description": "Subscriptions refused as there were too many"
+        }
+    )
+
+
+def animalId(document: dict) -> str | None:
+    """The animal a document is about, by the id of its identifier."""
+    animal = document.get("animal")
+    if isinstance(animal, dict):
+        animal = animal.get("id")
+    return animal if isinstance(animal, str) else None
+
+
+class Published:
+    """A document as written to a collection, shared by its subscribers."""
+
+    __slots__ = ("collection", "document", "encoded")
+
+    def __init__(self, collection: str, document: dict):
+        self.collection = collection
+        self.document = document
+        # Encoded once, by the first subscriber to send it
+        self.encoded: bytes | None = None
+
+
+class Subscriber:
+    """Bounded buffer of the documents published to one subscriber."""
+
+    def __init__(
+        self,
+        collections: set[str],
+        sensors: set,
+        animals: set,
+        allowed: set[str],
+        capacity: int,
+    ):
+        self.collections = collections
+        self.sensors = sensors
+        self.animals = animals
+        # Collections whose documents may be pushed at all
+        self.allowed = allowed
+        self.pending: deque[Published] = deque(maxlen=capacity)
+        # Dropped since the subscriber was last sent documents, and in all
+        self.dropped = 0
+        self.lost = 0
+        self.ready = asyncio.Event()
+
+    def push(self, message: Published) -> bool:
+        if message.collection not in self.allowed:
+            return False
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+            self.lost += 1
+        self.pending.append(message)
+        self.ready.set()
+        return True
+
+    async def next(self, timeout: float) -> tuple[list[Published], int]:
+        """
+        Wait up to a timeout for documents, returning those pending and the
+        number dropped since the last call.
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except TimeoutError:
+            pass
+        self.ready.clear()
+        messages, dropped = list(self.pending), self.dropped
+        self.pending.clear()
+        self.dropped = 0
+        return messages, dropped
+
+
+class LiveHub:
+    """Subscribers indexed by the collections, sensors and animals followed."""
+
+    def __init__(self, capacity: int, limit: int):
+        self.capacity = capacity
+        self.limit = limit
+        self.subscribers: set[Subscriber] = set()
+        self.byCollection: dict[str, set[Subscriber]] = {}
+        self.bySensor: dict[object, set[Subscriber]] = {}
+        self.byAnimal: dict[str, set[Subscriber]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.refused = 0
+
+    def indexes(self, subscriber: Subscriber):
+        yield self.byCollection, subscriber.collections
+        yield self.bySensor, subscriber.sensors
+        yield self.byAnimal, subscriber.animals
+
+    def subscribe(
+        self, collections, sensors, animals, allowed: set[str]
+    ) -> Subscriber | None:
+        """Add a subscriber, or return None if there are too many."""
+        if len(self.subscribers) >= self.limit:
+            self.refused += 1
+            return None
+        subscriber = Subscriber(
+            set(collections),
+            set(sensors),
+            set(animals),
+            allowed,
+            self.capacity,
+        )
+        self.subscribers.add(subscriber)
+        for index, keys in self.indexes(subscriber):
+            for key in keys:
+                index.setdefault(key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        self.dropped += subscriber.lost
+        for index, keys in self.indexes(subscriber):
+            for key in keys:
+                followers = index.get(key)
+                if followers is not None:
+                    followers.discard(subscriber)
+                    if not followers:
+                        del index[key]
+
+    def publish(self, collection: str, documents: list[dict]):
+        """
+        Push documents written to a collection to their subscribers. Never
+        raises, as the documents are already written.
+        """
+        if not self.subscribers:
+            return
+        try:
+            self.fanOut(collection, documents)
+        except Exception:
+            logger.exception("Could not publish documents of %s", collection)
+
+    def fanOut(self, collection: str, documents: list[dict]):
+        following = self.byCollection.get(collection, set())
+        for document in documents:
+            targets = following
+            sensor = document.get("sensor")
+            if isinstance(sensor, Hashable) and sensor in self.bySensor:
+                targets = targets | self.bySensor[sensor]
+            if (animal := animalId(document)) in self.byAnimal:
+                targets = targets | self.byAnimal[animal]
+            if not targets:
+                continue
+            self.published += 1
+            message = Published(collection, document)
+            for subscriber in targets:
+                if subscriber.push(message):
+                    self.delivered += 1
+
+    def stats(self) -> LiveStats:
+        return LiveStats(
+            subscribers=len(self.subscribers),
+            published=self.published,
+            delivered=self.delivered,
+            dropped=self.dropped + sum(s.lost for s in self.subscribers),
+            refused=self.refused,
+        )
+
+
+LIVE = LiveHub(LIVE_BUFFER, LIVE_SUBSCRIBERS)
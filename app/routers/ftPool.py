@@ -0,0 +1,174 @@
+"""
+Connection pool settings and telemetry for the MongoDB client.
+
+Pool settings are read from the environment, falling back to the driver's
+defaults for any which are not set. The pool monitor listens to the
+driver's connection pool events, recording how many connections are
+checked out, how many requests are waiting for one and how long they
+wait, so that pool starvation can be told apart from slow queries.
+"""
+
+import os
+import statistics
+from collections import deque
+from typing import List
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from pymongo import monitoring
+
+load_dotenv()
+POOL_OPTIONS = {
+    option: value
+    for option, value in {
+        "maxPoolSize": os.getenv("MONGO_MAX_POOL_SIZE"),
+        "minPoolSize": os.getenv("MONGO_MIN_POOL_SIZE"),
+        "maxIdleTimeMS": os.getenv("MONGO_MAX_IDLE_TIME_MS"),
+        "waitQueueTimeoutMS": os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+        "compressors": os.getenv("MONGO_COMPRESSORS"),
+        "readPreference": os.getenv("MONGO_READ_PREFERENCE"),
+    }.items()
+    if value
+}
+
+# Number of recent checkouts over which wait times are summarised
+RECENT_CHECKOUTS = 1000
+
+
+class PoolStats(BaseModel):
+    address: str
+    open: int = Field(
+        json_schema_extra={"description": "Connections open to the server"}
+    )
+    checkedOut: int = Field(
+        json_schema_extra={"description": "Connections currently in use"}
+    )
+    waiting: int = Field(
+        json_schema_extra={
+            "description": "Requests currently waiting for a connection"
+        }
+    )
+    checkouts: int
+    failures: dict[str, int] = Field(
+        json_schema_extra={
+            "description": "Failed checkouts, by reason, e.g. 'timeout'"
+        }
+    )
+    waitMedianMS: float = Field(
+        json_schema_extra={
+            "description": "Median checkout wait over recent checkouts"
+        }
+    )
+    waitP95MS: float = Field(
+        json_schema_extra={
+            "description": "95th percentile checkout wait over recent"
+            " checkouts"
+        }
+    )
+    waitMaxMS: float = Field(
+        json_schema_extra={"description": "Longest checkout wait"}
+    )
+
+
+class PoolCollection(BaseModel):
+    options: dict[str, str] = Field(
+        json_schema_extra={
+            "description": "Pool settings taken from the environment"
+        }
+    )
+    pools: List[PoolStats]
+
+
+class ServerPool:
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.failures: dict[str, int] = {}
+        self.waits: deque[float] = deque(maxlen=RECENT_CHECKOUTS)
+        self.wait_max = 0.0
+
+    def waited(self, duration: float | None):
+        self.waiting = max(self.waiting - 1, 0)
+        if duration is not None:
+            self.waits.append(duration * 1000)
+            self.wait_max = max(self.wait_max, duration * 1000)
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Record connection pool usage for each server."""
+
+    def __init__(self):
+        self.servers: dict[str, ServerPool] = {}
+
+    def server(self, address) -> ServerPool:
+        return self.servers.setdefault("%s:%s" % address, ServerPool())
+
+    def pool_created(self, event):
+        self.server(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        self.servers.pop("%s:%s" % event.address, None)
+
+    def connection_created(self, event):
+        self.server(event.address).open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        server = self.server(event.address)
+        server.open = max(server.open - 1, 0)
+
+    def connection_check_out_started(self, event):
+        self.server(event.address).waiting += 1
+
+    def connection_check_out_failed(self, event):
+        server = self.server(event.address)
+        server.waited(event.duration)
+        server.failures[event.reason] = (
+            server.failures.get(event.reason, 0) + 1
+        )
+
+    def connection_checked_out(self, event):
+        server = self.server(event.address)
+        server.waited(event.duration)
+        server.checked_out += 1
+        server.checkouts += 1
+
+    def connection_checked_in(self, event):
+        server = self.server(event.address)
+        server.checked_out = max(server.checked_out - 1, 0)
+
+    def stats(self) -> PoolCollection:
+        pools = []
+        for address, server in self.servers.items():
+            waits = list(server.waits) or [0.0]
+            p95 = waits[0]
+            if len(waits) > 1:
+                p95 = statistics.quantiles(waits, n=20, method="inclusive")
+                p95 = p95[-1]
+            pools.append(
+                PoolStats(
+                    address=address,
+                    open=server.open,
+                    checkedOut=server.checked_out,
+                    waiting=server.waiting,
+                    checkouts=server.checkouts,
+                    failures=server.failures,
+                    waitMedianMS=statistics.median(waits),
+                    waitP95MS=p95,
+                    waitMaxMS=server.wait_max,
+                )
+            )
+        return PoolCollection(options=POOL_OPTIONS, pools=pools)
+
+
+POOL_MONITOR = PoolMonitor()
@@ -0,0 +1,408 @@
+"""
+Rollups of samples into buckets of a minute, an hour and a day.
+
+Each rollup holds, for every sensor, predicted flag and bucket, the count,
+sum, minimum, maximum, first and last value of the samples in the bucket,
+so aggregates over long ranges read one document per bucket rather than
+every sample.
+
+Samples written mark the minutes they fall in as dirty, and only those
+buckets are aggregated again: minutes from their samples, then hours from
+their minutes and days from their hours. Late samples therefore cost no
+more to roll up than current ones. Dirty buckets are flushed in the
+background every FT_ROLLUP_INTERVAL seconds, and those of a sensor before
+its rollups are read, so a process always reads its own writes.
+
+Deleted samples mark their minute dirty in the same way, and buckets left
+with no samples are removed as they are rolled up again. Samples written
+or deleted by other processes are rolled up once those processes flush.
+Samples written before rollups were kept are only reflected once the
+rollups are rebuilt:
+
+    python -m tools.rebuild_rollups
+"""
+
+import asyncio
+import calendar
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+import numpy as np
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+from .ftSeries import SeriesCollection
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+ROLLUP_INTERVAL = float(os.getenv("FT_ROLLUP_INTERVAL", 5))
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MINUTE = 60 * 1000
+
+
+class Rollup(NamedTuple):
+    # Name of the collection, within measurements, and on the app state
+    name: str
+    # $dateTrunc unit of the buckets
+    unit: str
+    # Length of the buckets in ms
+    length: int
+
+
+# Finest first, as each is aggregated from the one before
+ROLLUPS = (
+    Rollup("samples_1m", "minute", MINUTE),
+    Rollup("samples_1h", "hour", 60 * MINUTE),
+    Rollup("samples_1d", "day", 24 * 60 * MINUTE),
+)
+
+# Accumulators of the fields of a bucket, from samples
+SAMPLE_ACCUMULATORS = {
+    "count": {"$sum": 1},
+    "sum": {"$sum": "$value"},
+    "min": {"$min": "$value"},
+    "max": {"$max": "$value"},
+    "first": {"$first": "$value"},
+    "last": {"$last": "$value"},
+}
+# Accumulators of the fields of a bucket, from finer buckets
+ACCUMULATORS = {
+    "count": {"$sum": "$count"},
+    "sum": {"$sum": "$sum"},
+    "min": {"$min": "$min"},
+    "max": {"$max": "$max"},
+    "first": {"$first": "$first"},
+    "last": {"$last": "$last"},
+}
+# Stage giving samples the shape of a bucket holding only them
+AS_BUCKET = {
+    "$project": {
+        "_id": 0,
+        "timestamp": 1,
+        "count": {"$literal": 1},
+        **{
+            field: "$value" for field in ("sum", "min", "max", "first", "last")
+        },
+    }
+}
+
+
+class RollupStats(BaseModel):
+    interval: float = Field(
+        json_schema_extra={"description": "Seconds between flushes"}
+    )
+    dirty: int = Field(
+        json_schema_extra={
+            "description": "Minutes written to but not yet rolled up"
+        }
+    )
+    flushed: int = Field(
+        json_schema_extra={"description": "Minutes rolled up"}
+    )
+    failures: int = Field(
+        json_schema_extra={"description": "Background flushes which failed"}
+    )
+    duration: float = Field(
+        json_schema_extra={
+            "description": "Seconds taken by the last background flush"
+        }
+    )
+
+
+def millis(timestamp: datetime) -> int:
+    """Milliseconds since the epoch of a time, taken as UTC if naive."""
+    return (
+        calendar.timegm(timestamp.utctimetuple()) * 1000
+        + timestamp.microsecond // 1000
+    )
+
+
+def fromMillis(ms: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=ms)
+
+
+def ranges(starts: list[int], length: int) -> list[dict]:
+    """Queries on the time ranges of buckets, merging adjacent buckets."""
+    merged = []
+    for start in sorted(starts):
+        if merged and merged[-1][1] == start:
+            merged[-1][1] = start + length
+        else:
+            merged.append([start, start + length])
+    return [
+        {"timestamp": {"$gte": fromMillis(a), "$lt": fromMillis(b)}}
+        for a, b in merged
+    ]
+
+
+def storedQuery(db, query: dict) -> dict:
+    """
+    A query as stored, for stages such as $unionWith whose queries are not
+    rewritten for time series.
+    """
+    if isinstance(db, SeriesCollection):
+        return db.layout.query(query)
+    return query
+
+
+def rollupPipeline(
+    match: dict, accumulators: dict, rollup: Rollup, target, key: tuple
+) -> list:
+    """Aggregation stages merging the buckets of a rollup into its target."""
+    sensor, predicted = key
+    return [
+        {"$match": match},
+        {"$sort": {"timestamp": 1}},
+        {
+            "$group": {
+                "_id": {
+                    "$dateTrunc": {"date": "$timestamp", "unit": rollup.unit}
+                },
+                **accumulators,
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "sensor": {"$literal": sensor},
+                "predicted": {"$literal": predicted},
+                "timestamp": "$_id",
+                **{field: 1 for field in accumulators},
+            }
+        },
+        {
+            "$merge": {
+                "into": {"db": target.database.name, "coll": target.name},
+                "on": ["sensor", "predicted", "timestamp"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }
+        },
+    ]
+
+
+async def prune(source, target, match: dict, rollup: Rollup, key, starts):
+    """Delete the buckets of a rollup whose source now holds nothing."""
+    sensor, predicted = key
+    cursor = await source.aggregate(
+        [
+            {"$match": match | {"$or": ranges(starts, rollup.length)}},
+            {
+                "$group": {
+                    "_id": {
+                        "$dateTrunc": {
+                            "date": "$timestamp",
+                            "unit": rollup.unit,
+                        }
+                    }
+                }
+            },
+        ]
+    )
+    present = {millis(bucket["_id"]) for bucket in await cursor.to_list()}
+    empty = [fromMillis(s) for s in starts if s not in present]
+    if empty:
+        await target.delete_many(
+            {
+                "sensor": sensor,
+                "predicted": predicted,
+                "timestamp": {"$in": empty},
+            }
+        )
+
+
+async def rollUp(
+    state,
+    key: tuple,
+    minutes: list[int] | None,
+    deleted: list[int] | None = None,
+):
+    """
+    Aggregate the buckets of each rollup holding some minutes of a sensor's
+    samples, or every bucket if no minutes are given. Buckets holding the
+    minutes of deleted samples are removed if they are left empty.
+    """
+    sensor, predicted = key
+    source, accumulators = state.samples, SAMPLE_ACCUMULATORS
+    match = {
+        "sensor": sensor,
+        "predicted": True if predicted else {"$ne": True},
+    }
+    starts = minutes
+    for rollup in ROLLUPS:
+        target = getattr(state, rollup.name)
+        query = dict(match)
+        if starts is not None:
+            starts = sorted({s - s % rollup.length for s in starts})
+            query["$or"] = ranges(starts, rollup.length)
+        cursor = await source.aggregate(
+            rollupPipeline(query, accumulators, rollup, target, key)
+        )
+        await cursor.to_list()
+        if deleted:
+            deleted = sorted({s - s % rollup.length for s in deleted})
+            await prune(source, target, match, rollup, key, deleted)
+        source, accumulators = target, ACCUMULATORS
+        match = {"sensor": sensor, "predicted": predicted}
+
+
+async def rebuild(state, sensor, predicted: bool):
+    """Replace every bucket of a sensor's rollups from its samples."""
+    for rollup in ROLLUPS:
+        await getattr(state, rollup.name).delete_many(
+            {"sensor": sensor, "predicted": predicted}
+        )
+    await rollUp(state, (sensor, predicted), None)
+
+
+class RollupTracker:
+    """Minutes of each sensor's samples written but not yet rolled up."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.dirty: dict[tuple, set[int]] = {}
+        # Dirty minutes which may have been left empty by deletes
+        self.deleted: dict[tuple, set[int]] = {}
+        self.locks: dict[tuple, asyncio.Lock] = {}
+        self.flushed = 0
+        self.failures = 0
+        self.duration = 0.0
+
+    def touch(self, sensor, predicted, timestamps: np.ndarray):
+        """Mark the minutes of timestamps, in ms since the epoch, dirty."""
+        minutes = np.unique(timestamps // MINUTE) * MINUTE
+        key = (sensor, bool(predicted))
+        self.dirty.setdefault(key, set()).update(minutes.tolist())
+
+    def touchDocuments(self, documents: list[dict]):
+        """
+        Mark the minutes of sample documents dirty. Samples without a
+        timestamp are given the current time by time series.
+        """
+        now = datetime.now(timezone.utc)
+        for document in documents:
+            key = (document["sensor"], bool(document.get("predicted")))
+            minute = millis(document.get("timestamp") or now)
+            minute -= minute % MINUTE
+            self.dirty.setdefault(key, set()).add(minute)
+
+    def touchDeleted(self, documents: list[dict]):
+        """Mark the minutes of deleted sample documents dirty."""
+        documents = [d for d in documents if d.get("timestamp") is not None]
+        self.touchDocuments(documents)
+        for document in documents:
+            key = (document["sensor"], bool(document.get("predicted")))
+            minute = millis(document["timestamp"])
+            minute -= minute % MINUTE
+            self.deleted.setdefault(key, set()).add(minute)
+
+    async def flush(self, state, keys: list[tuple] | None = None):
+        """
+        Roll up the dirty minutes of some sensors, or of all of them. Minutes
+        which fail to roll up are left dirty.
+        """
+        for key in list(self.dirty) if keys is None else keys:
+            # Waits for a flush of the same sensor already under way
+            async with self.locks.setdefault(key, asyncio.Lock()):
+                minutes = self.dirty.pop(key, None)
+                deleted = self.deleted.pop(key, set())
+                if not minutes:
+                    continue
+                try:
+                    await rollUp(state, key, sorted(minutes), sorted(deleted))
+                except BaseException:
+                    # Left dirty, whether the flush failed or was cancelled
+                    self.dirty.setdefault(key, set()).update(minutes)
+                    self.deleted.setdefault(key, set()).update(deleted)
+                    raise
+                self.flushed += len(minutes)
+
+    async def run(self, state):
+        """Flush every interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            start = time.perf_counter()
+            try:
+                await self.flush(state)
+            except Exception:
+                self.failures += 1
+                logger.exception("Could not roll up samples")
+            self.duration = time.perf_counter() - start
+
+    def stats(self) -> RollupStats:
+        return RollupStats(
+            interval=self.interval,
+            dirty=sum(len(minutes) for minutes in self.dirty.values()),
+            flushed=self.flushed,
+            failures=self.failures,
+            duration=self.duration,
+        )
+
+
+def choose(width: int | None) -> Rollup | None:
+    """
+    The coarsest rollup whose buckets fit whole into buckets of a width in
+    ms, or of whole days if None, or None if no rollup does.
+    """
+    for rollup in reversed(ROLLUPS):
+        if width is None or width % rollup.length == 0:
+            return rollup
+    return None
+
+
+def coveredPipeline(
+    samples, rollup: Rollup, key: tuple, start: datetime, end: datetime
+) -> list:
+    """
+    Aggregation stages, on a rollup, selecting its buckets within a time
+    range and, as buckets of one sample, the samples at either end of the
+    range which only part of a bucket covers.
+    """
+    sensor, predicted = key
+    first = millis(start) + (1 if start.microsecond % 1000 else 0)
+    last = millis(end)
+    inner_start = fromMillis(first + -first % rollup.length)
+    inner_end = fromMillis(last - last % rollup.length)
+    if inner_end < inner_start:
+        # No bucket is covered whole
+        inner_start = inner_end = end
+    edges = [
+        {"timestamp": {"$gte": a, "$lt": b}}
+        for a, b in ((start, inner_start), (inner_end, end))
+        if a < b
+    ]
+    stages = [
+        {
+            "$match": {
+                "sensor": sensor,
+                "predicted": predicted,
+                "timestamp": {"$gte": inner_start, "$lt": inner_end},
+            }
+        }
+    ]
+    if edges:
+        match = {
+            "sensor": sensor,
+            "predicted": True if predicted else {"$ne": True},
+            "$or": edges,
+        }
+        stages.append(
+            {
+                "$unionWith": {
+                    "coll": samples.name,
+                    "pipeline": [
+                        {"$match": storedQuery(samples, match)},
+                        AS_BUCKET,
+                    ],
+                }
+            }
+        )
+    return stages
+
+
+ROLLUP_TRACKER = RollupTracker(ROLLUP_INTERVAL)
@@ -0,0 +1,181 @@
+"""
+Downsampling and resampling of measurement series.
+
+Largest-Triangle-Three-Buckets (LTTB) reduces a series to a given number
+of points while keeping its visual shape: the first and last points are
+kept and, for each bucket in between, the point forming the largest
+triangle with the point kept from the previous bucket and the mean of the
+next bucket.
+
+Run over every raw point, LTTB would need the whole series read from the
+database. Instead, the minimum and maximum of a few times as many buckets
+as points are selected by the database first (MinMaxLTTB), which keeps
+the extremes LTTB favours while bounding the points read.
+
+Resampling aligns several series onto a common grid of times, so they can
+be combined point by point. Each grid time only depends on the samples
+either side of it, so the database first selects the first and last
+sample within each step of the grid, and the grid is then filled from
+those by nearest neighbour, linear interpolation or forward fill.
+"""
+
+import numpy as np
+
+# Buckets preselected, per point returned
+PRESELECT_RATIO = 4
+
+
+def lttb(times: np.ndarray, values: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of the points of a series, ordered by time, which LTTB keeps
+    when reducing it to a number of points.
+    """
+    size = len(times)
+    if points >= size or points < 3:
+        return np.arange(size)
+    # Relative times, so triangle areas are not dominated by the epoch
+    x = (times - times[0]).astype(np.float64)
+    y = values.astype(np.float64)
+    every = (size - 2) / (points - 2)
+
+    kept = np.empty(points, dtype=np.intp)
+    kept[0], kept[-1] = 0, size - 1
+    a = 0
+    for i in range(points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        following = slice(end, min(int((i + 2) * every) + 1, size))
+        mean_x, mean_y = x[following].mean(), y[following].mean()
+        areas = np.abs(
+            (x[a] - mean_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (mean_y - y[a])
+        )
+        a = start + int(areas.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def preselectPipeline(start, end, points: int) -> list:
+    """
+    Aggregation stages selecting the minimum and maximum sample of each of
+    PRESELECT_RATIO times as many buckets as points, across a time range.
+    """
+    span = (end - start).total_seconds() * 1000
+    width = max(span / (points * PRESELECT_RATIO), 1)
+    return [
+        {
+            "$group": {
+                "_id": {
+                    "$floor": {
+                        "$divide": [
+                            {"$subtract": ["$timestamp", start]},
+                            width,
+                        ]
+                    }
+                },
+                "low": {
+                    "$top": {
+                        "sortBy": {"value": 1},
+                        "output": ["$timestamp", "$value"],
+                    }
+                },
+                "high": {
+                    "$top": {
+                        "sortBy": {"value": -1},
+                        "output": ["$timestamp", "$value"],
+                    }
+                },
+            }
+        }
+    ]
+
+
+def preselected(buckets: list, fields=("low", "high")):
+    """Times and values of the samples preselected, ordered by time."""
+    samples = sorted({tuple(b[field]) for b in buckets for field in fields})
+    times = np.array([t for t, _ in samples], dtype="datetime64[ms]")
+    values = np.array([v for _, v in samples], dtype=np.float64)
+    return times, values
+
+
+def stepPipeline(start, step: int) -> list:
+    """
+    Aggregation stages selecting the first and last sample within each step,
+    in ms, of a grid from a start time.
+    """
+    return [
+        {
+            "$group": {
+                "_id": {
+                    "$floor": {
+                        "$divide": [{"$subtract": ["$timestamp", start]}, step]
+                    }
+                },
+                "first": {
+                    "$top": {
+                        "sortBy": {"timestamp": 1},
+                        "output": ["$timestamp", "$value"],
+                    }
+                },
+                "last": {
+                    "$bottom": {
+                        "sortBy": {"timestamp": 1},
+                        "output": ["$timestamp", "$value"],
+                    }
+                },
+            }
+        }
+    ]
+
+
+def resample(
+    times: np.ndarray,
+    values: np.ndarray,
+    grid: np.ndarray,
+    method: str,
+    tolerance: np.timedelta64,
+) -> np.ndarray:
+    """
+    Values of a series, ordered by time, at each time of a grid. Samples
+    further than the tolerance from a grid time are not used, leaving it
+    NaN if there are none.
+
+    'nearest' takes the closest sample, 'linear' interpolates between the
+    samples either side and 'ffill' takes the latest sample at or before.
+    """
+    result = np.full(len(grid), np.nan)
+    if len(times) == 0:
+        return result
+    before = np.searchsorted(times, grid, side="right") - 1
+    after = np.searchsorted(times, grid, side="left")
+    has_before = before >= 0
+    has_after = after < len(times)
+    before = np.clip(before, 0, len(times) - 1)
+    after = np.clip(after, 0, len(times) - 1)
+    to_before = grid - times[before]
+    to_after = times[after] - grid
+    has_before &= to_before <= tolerance
+    has_after &= to_after <= tolerance
+
+    if method == "ffill":
+        result[has_before] = values[before[has_before]]
+    elif method == "nearest":
+        use_after = has_after & (~has_before | (to_after < to_before))
+        use_before = has_before & ~use_after
+        result[use_before] = values[before[use_before]]
+        result[use_after] = values[after[use_after]]
+    else:
+        both = has_before & has_after
+        span = (times[after] - times[before]).astype(np.float64)
+        # A sample at the grid time is both before and after it
+        weight = np.divide(
+            to_before.astype(np.float64),
+            span,
+            out=np.zeros(len(grid)),
+            where=span > 0,
+        )
+        interpolated = values[before] + weight * (
+            values[after] - values[before]
+        )
+        result[both] = interpolated[both]
+    return result
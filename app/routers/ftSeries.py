@@ -0,0 +1,282 @@
+"""
+Time-series storage for measurement collections.
+
+MongoDB time-series collections store measurements in buckets, one per
+series and span of time, so the per-document overhead and index size of an
+ordinary collection are paid once per bucket rather than once per sample.
+
+A time-series collection has a single meta field identifying each series,
+so the fields which do (e.g. the sensor of a sample) are stored together
+under it. Collections are wrapped to move those fields in and out of the
+meta field as documents are written and read, and to rewrite queries,
+projections and updates on them, so routers and the common helpers work
+on documents in their usual shape whichever storage is used.
+
+Time-series collections cannot have unique indexes, so duplicate samples
+are not rejected. The change feed relies on the timestamps filled in by
+ordinary inserts, so documents stored as a time series are left out of it
+and are not stamped.
+"""
+
+import os
+from datetime import datetime, timezone
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo.errors import CollectionInvalid
+
+from .ftCommon import STAMP
+
+load_dotenv()
+SAMPLES_TIMESERIES = os.getenv("FT_SAMPLES_TIMESERIES", "false") == "true"
+# One of 'seconds', 'minutes' or 'hours', matching the interval of samples
+SAMPLES_GRANULARITY = os.getenv("FT_SAMPLES_GRANULARITY", "seconds")
+# Span of each bucket in seconds, overriding the granularity if set
+SAMPLES_BUCKET_SECONDS = os.getenv("FT_SAMPLES_BUCKET_SECONDS")
+
+# Field of stored documents holding the fields identifying their series
+SERIES = "series"
+
+# Logical operators whose operands are themselves queries
+LOGICAL = ("$and", "$or", "$nor")
+
+
+class SeriesLayout:
+    """How the documents of a collection are stored as a time series."""
+
+    def __init__(
+        self,
+        time: str,
+        meta: tuple[str, ...],
+        granularity: str = "seconds",
+        bucket_seconds: int | None = None,
+    ):
+        self.time = time
+        self.meta = meta
+        self.granularity = granularity
+        self.bucket_seconds = bucket_seconds
+
+    def options(self) -> dict:
+        """Options creating a time-series collection with this layout."""
+        options = {"timeField": self.time, "metaField": SERIES}
+        if self.bucket_seconds:
+            options["bucketMaxSpanSeconds"] = self.bucket_seconds
+            options["bucketRoundingSeconds"] = self.bucket_seconds
+        else:
+            options["granularity"] = self.granularity
+        return options
+
+    def field(self, field: str) -> str:
+        """Path of a field, or a field within it, as stored."""
+        if field.split(".")[0] in self.meta:
+            return f"{SERIES}.{field}"
+        return field
+
+    def toStored(self, document: dict) -> dict:
+        """
+        Copy a document into its stored shape. The time field is required,
+        so the current time is used if it is empty.
+        """
+        stored = {
+            k: v
+            for k, v in document.items()
+            if k not in self.meta and k != STAMP
+        }
+        stored[SERIES] = {k: document[k] for k in self.meta if k in document}
+        if stored.get(self.time) is None:
+            stored[self.time] = datetime.now(timezone.utc)
+        return stored
+
+    def fromStored(self, stored: dict | None) -> dict | None:
+        """Return a stored document to its usual shape."""
+        if stored is None or SERIES not in stored:
+            return stored
+        series = stored.pop(SERIES)
+        if "_id" in stored:
+            return {"_id": stored.pop("_id"), **series, **stored}
+        return {**series, **stored}
+
+    def query(self, query: dict) -> dict:
+        """Rewrite a query, or projection, on the stored fields."""
+        rewritten = {}
+        for k, v in (query or {}).items():
+            rewritten[self.field(k)] = (
+                [self.query(q) for q in v] if k in LOGICAL else v
+            )
+        return rewritten
+
+    def update(self, update: dict) -> dict:
+        """
+        Rewrite an update on the stored fields. An empty time is left as
+        it is, or given the current time if the update inserts.
+        """
+        update = {
+            op: self.query({k: v for k, v in fields.items() if k != STAMP})
+            for op, fields in update.items()
+        }
+        update = {op: fields for op, fields in update.items() if fields}
+        fields = update.get("$set", {})
+        if self.time in fields and fields[self.time] is None:
+            del fields[self.time]
+            update.setdefault("$setOnInsert", {})[self.time] = datetime.now(
+                timezone.utc
+            )
+        return update
+
+    def sort(self, keys):
+        if isinstance(keys, str):
+            return self.field(keys)
+        return [(self.field(k), d) for k, d in keys]
+
+
+SAMPLES = SeriesLayout(
+    time="timestamp",
+    meta=("sensor", "predicted"),
+    granularity=SAMPLES_GRANULARITY,
+    bucket_seconds=int(SAMPLES_BUCKET_SECONDS or 0) or None,
+)
+
+
+class SeriesCursor:
+    """Cursor returning stored documents in their usual shape."""
+
+    def __init__(self, cursor, layout: SeriesLayout):
+        self.cursor = cursor
+        self.layout = layout
+
+    def sort(self, keys, direction=None):
+        if direction is None:
+            self.cursor = self.cursor.sort(self.layout.sort(keys))
+        else:
+            self.cursor = self.cursor.sort(self.layout.sort(keys), direction)
+        return self
+
+    def limit(self, limit: int):
+        self.cursor = self.cursor.limit(limit)
+        return self
+
+    async def to_list(self, length: int | None = None) -> list:
+        return [
+            self.layout.fromStored(d)
+            for d in await self.cursor.to_list(length)
+        ]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return self.layout.fromStored(await anext(self.cursor))
+
+    async def close(self):
+        await self.cursor.close()
+
+
+class SeriesCollection:
+    """
+    A time-series collection, read and written with documents in their
+    usual shape. Operations not rewritten are those of the collection.
+    """
+
+    def __init__(self, collection, layout: SeriesLayout):
+        self.collection = collection
+        self.layout = layout
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def insert_one(self, document: dict, **kwargs):
+        # ObjectIDs are set on the given document, as the driver would
+        document.setdefault("_id", ObjectId())
+        return await self.collection.insert_one(
+            self.layout.toStored(document), **kwargs
+        )
+
+    async def insert_many(self, documents: list[dict], **kwargs):
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        return await self.collection.insert_many(
+            [self.layout.toStored(d) for d in documents], **kwargs
+        )
+
+    def find(self, query: dict | None = None, projection=None, **kwargs):
+        if projection is not None:
+            projection = self.layout.query(projection)
+        cursor = self.collection.find(
+            self.layout.query(query), projection, **kwargs
+        )
+        return SeriesCursor(cursor, self.layout)
+
+    async def find_one_and_update(
+        self, query: dict, update: dict, projection=None, **kwargs
+    ):
+        if projection is not None:
+            projection = self.layout.query(projection)
+        return self.layout.fromStored(
+            await self.collection.find_one_and_update(
+                self.layout.query(query),
+                self.layout.update(update),
+                projection=projection,
+                **kwargs,
+            )
+        )
+
+    async def aggregate(self, pipeline: list, **kwargs):
+        # Only $match stages are rewritten, so later stages must refer to
+        # the fields of the series by their stored paths
+        pipeline = [
+            {"$match": self.layout.query(stage["$match"])}
+            if "$match" in stage
+            else stage
+            for stage in pipeline
+        ]
+        return await self.collection.aggregate(pipeline, **kwargs)
+
+    async def delete_one(self, query: dict, **kwargs):
+        return await self.collection.delete_one(
+            self.layout.query(query), **kwargs
+        )
+
+    async def find_one_and_delete(
+        self, query: dict, projection=None, **kwargs
+    ):
+        if projection is not None:
+            projection = self.layout.query(projection)
+        return self.layout.fromStored(
+            await self.collection.find_one_and_delete(
+                self.layout.query(query), projection=projection, **kwargs
+            )
+        )
+
+    async def distinct(self, key: str, query: dict | None = None, **kwargs):
+        return await self.collection.distinct(
+            self.layout.field(key), self.layout.query(query), **kwargs
+        )
+
+
+async def is_timeseries(database, name: str) -> bool | None:
+    """Whether a collection is a time series, or None if it is missing."""
+    cursor = await database.list_collections(filter={"name": name})
+    for info in await cursor.to_list():
+        return info["type"] == "timeseries"
+    return None
+
+
+async def open_series(database, name: str, layout: SeriesLayout):
+    """
+    Open a time-series collection, creating it if it does not exist. An
+    existing ordinary collection must be migrated first.
+    """
+    exists = await is_timeseries(database, name)
+    if exists is None:
+        try:
+            await database.create_collection(name, timeseries=layout.options())
+        except CollectionInvalid:
+            # Created concurrently, e.g. by another worker
+            pass
+    elif not exists:
+        raise RuntimeError(
+            f"{name} is not a time-series collection. Migrate it with"
+            " 'python -m tools.migrate_samples' or unset"
+            " FT_SAMPLES_TIMESERIES."
+        )
+    return SeriesCollection(database[name], layout)
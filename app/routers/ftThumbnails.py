@@ -0,0 +1,330 @@
+"""
+Thumbnails of images, generated once and cached in GridFS.
+
+Galleries would otherwise download every original at full resolution.
+Thumbnails are instead generated on first request, in a pool of
+FT_THUMBNAIL_WORKERS processes so decoding large images neither blocks the
+event loop nor holds the GIL, and stored in a separate GridFS bucket keyed
+by the image, size and format. Workers read the image from GridFS
+themselves, a chunk at a time as it is decoded, so it is never held by the
+API process. Requests for the same thumbnail while it is generated wait
+for it rather than generating it again.
+
+Images never change once stored, so neither do their thumbnails, which
+are served with long-lived cache headers. The bucket is kept within
+FT_THUMBNAIL_BUDGET bytes by evicting the thumbnails least recently
+served, and the thumbnails of an image are removed with it. The size of
+the bucket is kept as thumbnails are stored and evicted, and counted
+again every FT_THUMBNAIL_RECONCILE seconds to include those stored by
+other processes.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+
+import gridfs
+import pymongo
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+from pydantic import BaseModel, Field
+
+load_dotenv()
+THUMBNAIL_BUDGET = int(os.getenv("FT_THUMBNAIL_BUDGET", 256 * 1024 * 1024))
+THUMBNAIL_WORKERS = int(os.getenv("FT_THUMBNAIL_WORKERS", 2))
+THUMBNAIL_RECONCILE = float(os.getenv("FT_THUMBNAIL_RECONCILE", 300))
+# Largest original a thumbnail is generated from
+THUMBNAIL_SOURCE_LIMIT = int(
+    os.getenv("FT_THUMBNAIL_SOURCE_LIMIT", 256 * 1024 * 1024)
+)
+MAX_THUMBNAIL_SIZE = 2048
+THUMBNAIL_BUCKET = "thumbnails"
+# Thumbnails are only marked as used once in this time, to save writes
+USE_RESOLUTION = timedelta(minutes=1)
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+FORMATS = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+class ThumbnailStats(BaseModel):
+    hits: int
+    misses: int
+    shared: int = Field(
+        json_schema_extra={
+            "description": "Requests which waited for a thumbnail already"
+            " being generated"
+        }
+    )
+    failures: int = Field(
+        json_schema_extra={
+            "description": "Images which could not be read as an image"
+        }
+    )
+    evictions: int
+    size: int | None = Field(
+        json_schema_extra={
+            "description": "Bytes of thumbnails stored, as last counted"
+        }
+    )
+    budget: int = Field(
+        json_schema_extra={"description": "Bytes of thumbnails kept at most"}
+    )
+
+
+def thumbnailName(ft, width: int, height: int, format: str) -> str:
+    return f"{ft}/{width}x{height}.{format}"
+
+
+# Connection of each worker in the process pool
+WORKER_CLIENT: pymongo.MongoClient | None = None
+
+
+def connect(url: str):
+    """Connect a worker in the process pool to the database."""
+    global WORKER_CLIENT
+    WORKER_CLIENT = pymongo.MongoClient(url, maxPoolSize=1)
+
+
+def render(database: str, ft, width: int, height: int, format: str) -> bytes:
+    """
+    Scale an image to fit within a width and height, keeping its aspect
+    ratio. Run in the process pool, reading the image from GridFS.
+    """
+    bucket = gridfs.GridFSBucket(WORKER_CLIENT[database])
+    with (
+        bucket.open_download_stream(ft) as file,
+        Image.open(file) as image,
+    ):
+        # Lets JPEGs be decoded at a fraction of their size
+        image.draft("RGB", (width, height))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((width, height))
+        if format == "jpeg" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        output = io.BytesIO()
+        image.save(output, format=format.upper(), quality=85)
+    return output.getvalue()
+
+
+class Thumbnails:
+    """Generates thumbnails in a process pool and caches them in GridFS."""
+
+    def __init__(self, budget: int, workers: int, reconcile: float):
+        self.budget = budget
+        self.workers = workers
+        self.reconcile = reconcile
+        self.url: str | None = None
+        self.pool: ProcessPoolExecutor | None = None
+        self.pending: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.failures = 0
+        self.evictions = 0
+        # Bytes stored, and when they were last counted
+        self.size: int | None = None
+        self.counted = 0.0
+
+    def start(self, url: str):
+        """Set the database the process pool reads images from."""
+        self.url = url
+
+    def executor(self) -> ProcessPoolExecutor:
+        if self.pool is None:
+            # Forking would copy the driver's threads and locks
+            self.pool = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=connect,
+                initargs=(self.url,),
+            )
+        return self.pool
+
+    async def cached(self, state, name: str) -> bytes | None:
+        """A thumbnail stored already, marking it as used."""
+        bucket = gridfs.AsyncGridFSBucket(
+            state.images, bucket_name=THUMBNAIL_BUCKET
+        )
+        try:
+            file = await bucket.open_download_stream_by_name(name)
+        except gridfs.errors.NoFile:
+            return None
+        data = await file.read()
+        now = datetime.now(timezone.utc)
+        await state.thumbnails.update_one(
+            {"_id": file._id, "metadata.used": {"$lt": now - USE_RESOLUTION}},
+            {"$set": {"metadata.used": now}},
+        )
+        return data
+
+    async def generate(self, state, ft, width, height, format) -> bytes:
+        """Generate a thumbnail from its image, then store it."""
+        bucket = gridfs.AsyncGridFSBucket(state.images)
+        file = await bucket.open_download_stream(ft)
+        await file.close()
+        if file.length > THUMBNAIL_SOURCE_LIMIT:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Images over {THUMBNAIL_SOURCE_LIMIT} bytes have no"
+                " thumbnail",
+            )
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(
+                self.executor(),
+                render,
+                state.images.name,
+                ft,
+                width,
+                height,
+                format,
+            )
+        except BrokenProcessPool:
+            # A worker died, e.g. out of memory, so start afresh next time
+            self.close()
+            raise HTTPException(
+                status_code=503, detail="Thumbnail generation failed"
+            )
+        except (
+            OSError,
+            ValueError,
+            SyntaxError,
+            Image.DecompressionBombError,
+        ):
+            # Raised by Pillow for content it cannot decode
+            self.failures += 1
+            raise HTTPException(
+                status_code=415,
+                detail=f"Image {ft} cannot be read as an image",
+            )
+        await self.store(
+            state, ft, thumbnailName(ft, width, height, format), data
+        )
+        return data
+
+    async def store(self, state, ft, name: str, data: bytes):
+        bucket = gridfs.AsyncGridFSBucket(
+            state.images, bucket_name=THUMBNAIL_BUCKET
+        )
+        grid_in = bucket.open_upload_stream(
+            name,
+            metadata={"image": ft, "used": datetime.now(timezone.utc)},
+        )
+        try:
+            await grid_in.write(data)
+            await grid_in.close()
+        except pymongo.errors.DuplicateKeyError:
+            # Stored by another process meanwhile
+            await state.thumbnail_chunks.delete_many({"files_id": grid_in._id})
+            return
+        if self.size is not None:
+            self.size += len(data)
+        await self.evict(state)
+
+    async def get(self, state, ft, width, height, format) -> bytes:
+        """
+        A thumbnail of an image, generating it if it is not stored. Raises
+        gridfs.errors.NoFile if there is no such image.
+        """
+        name = thumbnailName(ft, width, height, format)
+        if (data := await self.cached(state, name)) is not None:
+            self.hits += 1
+            return data
+        if name in self.pending:
+            self.shared += 1
+            return await asyncio.shield(self.pending[name])
+        self.misses += 1
+        task = asyncio.ensure_future(
+            self.generate(state, ft, width, height, format)
+        )
+        self.pending[name] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self.pending.pop(name, None)
+            else:
+                task.add_done_callback(lambda _: self.pending.pop(name, None))
+
+    async def count(self, state):
+        """Count the bytes of thumbnails stored, by every process."""
+        cursor = await state.thumbnails.aggregate(
+            [{"$group": {"_id": None, "size": {"$sum": "$length"}}}]
+        )
+        totals = await cursor.to_list()
+        self.size = totals[0]["size"] if totals else 0
+        self.counted = time.monotonic()
+
+    async def evict(self, state):
+        """Delete the thumbnails least recently used until within budget."""
+        if (
+            self.size is None
+            or time.monotonic() - self.counted >= self.reconcile
+        ):
+            await self.count(state)
+        excess = self.size - self.budget
+        if excess <= 0:
+            return
+        oldest = state.thumbnails.find({}, {"_id": 1, "length": 1})
+        oldest = oldest.sort("metadata.used", pymongo.ASCENDING)
+        evicted, freed = [], 0
+        async for file in oldest:
+            if freed >= excess:
+                break
+            evicted.append(file["_id"])
+            freed += file["length"]
+        await oldest.close()
+        deleted = await state.thumbnails.delete_many({"_id": {"$in": evicted}})
+        await state.thumbnail_chunks.delete_many(
+            {"files_id": {"$in": evicted}}
+        )
+        self.evictions += deleted.deleted_count
+        if deleted.deleted_count == len(evicted):
+            self.size -= freed
+        else:
+            # Some were evicted by another process, so count again
+            self.size = None
+
+    async def drop(self, state, ft):
+        """Delete the thumbnails of an image."""
+        cursor = state.thumbnails.find(
+            {"metadata.image": ft}, {"_id": 1, "length": 1}
+        )
+        thumbnails = await cursor.to_list()
+        ids = [file["_id"] for file in thumbnails]
+        deleted = await state.thumbnails.delete_many({"_id": {"$in": ids}})
+        await state.thumbnail_chunks.delete_many({"files_id": {"$in": ids}})
+        if self.size is not None:
+            if deleted.deleted_count == len(ids):
+                self.size -= sum(file["length"] for file in thumbnails)
+            else:
+                self.size = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def stats(self) -> ThumbnailStats:
+        return ThumbnailStats(
+            hits=self.hits,
+            misses=self.misses,
+            shared=self.shared,
+            failures=self.failures,
+            evictions=self.evictions,
+            size=self.size,
+            budget=self.budget,
+        )
+
+
+THUMBNAILS = Thumbnails(
+    THUMBNAIL_BUDGET, THUMBNAIL_WORKERS, THUMBNAIL_RECONCILE
+)
@@ -0,0 +1,261 @@
+"""
+Collects API calls related to the catalogue of imagery.
+
+This collection of endpoints allows images to be found by the details of
+their files and the metadata describing them, rather than by scanning
+every image and its metadata.
+
+Each entry joins the GridFS file document of an image with the metadata
+documents about it. Images are filtered by filename, content type and
+upload time, and by the metadata keys named in FT_CATALOGUE_KEYS, each of
+which is indexed along with the image described. Only those keys may be
+filtered on, so each filter is served by an index. Entries are ordered by
+the ObjectID of the image, and paged with the same cursors as other
+queries.
+"""
+
+import os
+from datetime import datetime
+from typing import List, Optional
+
+import pymongo
+from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException, Query, Request, Security
+from pydantic import BaseModel, Field
+from pydantic_extra_types import mongo_object_id
+from typing_extensions import Annotated
+
+from ..ftCommon import (
+    DEFAULT_PAGE_LIMIT,
+    HIDE_STAMP,
+    MAX_PAGE_LIMIT,
+    FTCollection,
+    decodeCursor,
+    encodeCursor,
+    filterQuery,
+)
+from ..ftIndexes import declare_indexes, index
+from ..users import User, get_current_active_user
+from .metadata import Metadata
+
+router = APIRouter(
+    prefix="/catalogue",
+    tags=["imagery"],
+    responses={404: {"description": "Not found"}},
+)
+
+load_dotenv()
+CATALOGUE_KEYS = [
+    key.strip()
+    for key in os.getenv(
+        "FT_CATALOGUE_KEYS", "Source,ObjectName,TaskingId"
+    ).split(",")
+    if key.strip()
+]
+# Images matching the first metadata filter checked against the others at
+# a time, for each entry wanted
+CANDIDATE_FACTOR = 4
+FILE_FIELDS = {
+    "_id": 1,
+    "filename": 1,
+    "uploadDate": 1,
+    "length": 1,
+    "metadata.contentType": 1,
+}
+
+
+class CatalogueEntry(BaseModel):
+    ft: mongo_object_id.MongoObjectId = Field(
+        json_schema_extra={"description": "ObjectID of the image"}
+    )
+    filename: Optional[str] = None
+    uploadDate: datetime
+    contentType: Optional[str] = None
+    length: int = Field(
+        json_schema_extra={"description": "Size of the image in bytes"}
+    )
+    metadata: List[Metadata] = Field(
+        default=[],
+        json_schema_extra={"description": "Metadata about the image"},
+    )
+
+
+class Catalogue(FTCollection):
+    images: List[CatalogueEntry]
+
+
+def metadataValues(value: str) -> list:
+    """Values a metadata filter matches, as numbers are stored as numbers."""
+    values = [value]
+    for number in (int, float):
+        try:
+            values.append(number(value))
+            break
+        except ValueError:
+            continue
+    return values
+
+
+def metadataFilters(meta: list[str]) -> list[dict]:
+    """Parse key:value filters on metadata into a query for each."""
+    filters = []
+    for item in meta:
+        key, separator, value = item.partition(":")
+        if not separator or key not in CATALOGUE_KEYS:
+            raise HTTPException(
+                status_code=400,
+                detail="Metadata filters must be key:value, with a key of "
+                + ", ".join(CATALOGUE_KEYS),
+            )
+        filters.append({f"metadata.{key}": {"$in": metadataValues(value)}})
+    return filters
+
+
+async def find_files(state, files: dict, after, limit: int) -> list[dict]:
+    """Files matching a query, ordered by ObjectID, after a cursor."""
+    if after is not None:
+        files = files | {"_id": {"$gt": after}}
+    cursor = state.files.find(files, FILE_FIELDS)
+    cursor = cursor.sort("_id", pymongo.ASCENDING)
+    return await cursor.limit(limit).to_list(limit)
+
+
+async def find_described(
+    state, files: dict, filters: list[dict], after, limit: int
+) -> list[dict]:
+    """
+    Files matching a query, described by metadata matching every filter,
+    ordered by ObjectID, after a cursor.
+
+    Images matching the first filter are read in order from its index, a
+    batch at a time, then checked against the other filters and the query
+    on their files, until enough are found or none are left.
+    """
+    first, others = filters[0], filters[1:]
+    batch = limit * CANDIDATE_FACTOR
+    found = []
+    while len(found) < limit:
+        query = first if after is None else first | {"image": {"$gt": after}}
+        cursor = state.metadata.find(query, {"_id": 0, "image": 1})
+        cursor = cursor.sort("image", pymongo.ASCENDING)
+        described = await cursor.limit(batch).to_list(batch)
+        if not described:
+            break
+        # An image described more than once by the filter appears as often
+        candidates = list(dict.fromkeys(d["image"] for d in described))
+        after = candidates[-1]
+        for other in others:
+            matched = set(
+                await state.metadata.distinct(
+                    "image", other | {"image": {"$in": candidates}}
+                )
+            )
+            candidates = [c for c in candidates if c in matched]
+        cursor = state.files.find(
+            files | {"_id": {"$in": candidates}}, FILE_FIELDS
+        )
+        found += await cursor.sort("_id", pymongo.ASCENDING).to_list()
+        if len(described) < batch:
+            break
+    return found[:limit]
+
+
+async def catalogue_entries(state, files: list[dict]) -> list[CatalogueEntry]:
+    """Join files with the metadata about them."""
+    cursor = state.metadata.find(
+        {"image": {"$in": [file["_id"] for file in files]}}, HIDE_STAMP
+    )
+    metadata = {}
+    async for document in cursor.sort("_id", pymongo.ASCENDING):
+        metadata.setdefault(document["image"], []).append(Metadata(**document))
+    return [
+        CatalogueEntry(
+            ft=file["_id"],
+            filename=file.get("filename"),
+            uploadDate=file["uploadDate"],
+            contentType=(file.get("metadata") or {}).get("contentType"),
+            length=file["length"],
+            metadata=metadata.get(file["_id"], []),
+        )
+        for file in files
+    ]
+
+
+INDEXES = declare_indexes(
+    "metadata",
+    *(
+        index(f"metadata.{key}", "image", serves=["meta"])
+        for key in CATALOGUE_KEYS
+    ),
+)
+# The first as GridFS creates
+FILE_INDEXES = declare_indexes(
+    "files",
+    index("filename", "uploadDate", serves=["filename"]),
+    index("uploadDate", serves=["uploadStart", "uploadEnd"]),
+    index("metadata.contentType", serves=["contentType"]),
+)
+
+
+@router.get(
+    "/",
+    response_description="Search the catalogue of images",
+    response_model=Catalogue,
+    response_model_by_alias=False,
+)
+async def catalogue_query(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_imagery"])
+    ],
+    filename: str | None = None,
+    contentType: str | None = None,
+    uploadStart: datetime | None = None,
+    uploadEnd: datetime | None = None,
+    meta: Annotated[
+        List[str],
+        Query(
+            max_length=len(CATALOGUE_KEYS) * 4,
+            description="Metadata filters as key:value, e.g. "
+            "'Source:Sentinel-2A', repeated for each. Keys must be one of "
+            + ", ".join(CATALOGUE_KEYS),
+        ),
+    ] = [],
+    cursor: str | None = None,
+    limit: Annotated[int, Query(gt=0, le=MAX_PAGE_LIMIT)] = DEFAULT_PAGE_LIMIT,
+):
+    """
+    Search for images given the provided criteria, each returned with the
+    details of its file and the metadata about it.
+
+    :param filename: Name of the image file
+    :param contentType: Content type of the image
+    :param uploadStart: Earliest time the image was uploaded
+    :param uploadEnd: Latest time the image was uploaded
+    :param meta: Metadata filters, all of which must match
+    :param cursor: Cursor of the page to return
+    :param limit: Number of images to return
+    """
+    state = request.app.state
+    files = filterQuery(
+        {
+            "filename": filename,
+            "metadata.contentType": contentType,
+            "uploadDate": {"$gte": uploadStart, "$lte": uploadEnd},
+        }
+    )
+    filters = metadataFilters(meta)
+    after = None if cursor is None else decodeCursor(cursor)
+    if filters:
+        found = await find_described(state, files, filters, after, limit + 1)
+    else:
+        found = await find_files(state, files, after, limit + 1)
+    if not found:
+        raise HTTPException(status_code=404, detail="No match found")
+    next_cursor = None
+    if len(found) > limit:
+        found = found[:limit]
+        next_cursor = encodeCursor(found[-1]["_id"])
+    return Catalogue(
+        images=await catalogue_entries(state, found), next=next_cursor
+    )
@@ -5,9 +5,9 @@ This collection of endpoints allows for the uploading, deletion
 and downloading of those images.
 """
 
-import io
+import hashlib
 from datetime import datetime
-from typing import List
+from typing import List, Literal
 
 import gridfs
 from bson.objectid import ObjectId
@@ -30,9 +30,24 @@ from ..ftCommon import (
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
+    etagMatches,
     find_in_db,
     update_one_in_db,
 )
+from ..ftGridFS import (
+    SHA256,
+    deduplicate,
+    download_response,
+    release_file,
+)
+from ..ftIndexes import declare_indexes, index
+from ..ftThumbnails import (
+    CACHE_CONTROL,
+    FORMATS,
+    MAX_THUMBNAIL_SIZE,
+    THUMBNAILS,
+    thumbnailName,
+)
 from ..users import User, get_current_active_user
 
 router = APIRouter(
@@ -59,14 +74,21 @@ async def create_image(
     """
     Upload a new image.
 
+    An image whose content is already stored is not stored again, and the
+    ObjectID of the image stored is returned instead.
+
     :param file: Image file  to be uploaded
     """
     bucket = gridfs.AsyncGridFSBucket(request.app.state.images)
+    digest = hashlib.sha256()
     async with bucket.open_upload_stream(
         file.filename, metadata={"contentType": file.content_type}
     ) as grid_in:
-        await grid_in.write(file)
-    return {"ft": str(grid_in._id)}
+        while data := await file.read(gridfs.DEFAULT_CHUNK_SIZE):
+            digest.update(data)
+            await grid_in.write(data)
+    ft = await deduplicate(request.app.state, grid_in._id, digest.hexdigest())
+    return {"ft": str(ft)}
 
 
 @router.delete("/{ft}", response_description="Delete an image")
@@ -78,15 +100,30 @@ async def remove_image(
     ],
 ):
     """
-    Delete an image file.
+    Delete an image file. An image uploaded more than once is only deleted
+    once it has been deleted as many times, along with its thumbnails.
 
     :param id: UUID of the image to delete
     """
-    try:
-        bucket = gridfs.AsyncGridFSBucket(request.app.state.images)
-        await bucket.delete(ObjectId(ft))
-    except gridfs.errors.NoFile:
+    state = request.app.state
+    if not await release_file(state, ObjectId(ft)):
         raise HTTPException(status_code=404, detail=f"Image {ft} not found")
+    if await state.files.count_documents({"_id": ObjectId(ft)}, limit=1) == 0:
+        await THUMBNAILS.drop(state, ObjectId(ft))
+
+
+INDEXES = declare_indexes(
+    "files", index(SHA256, unique=True, partial={SHA256: {"$type": "string"}})
+)
+THUMBNAIL_INDEXES = declare_indexes(
+    "thumbnails",
+    index("filename", unique=True),
+    index("metadata.image"),
+    index("metadata.used"),
+)
+THUMBNAIL_CHUNK_INDEXES = declare_indexes(
+    "thumbnail_chunks", index("files_id", "n", unique=True)
+)
 
 
 @router.get(
@@ -103,17 +140,66 @@ async def image_query(
 ):
     """
     Download an image given the provided criteria.
+
+    The image is streamed as it is read. A single byte range may be
+    requested with a Range header, e.g. to resume a download, along with
+    an If-Range header holding the ETag or Last-Modified time of the image
+    already partly downloaded.
     """
     bucket = gridfs.AsyncGridFSBucket(request.app.state.images)
     try:
         file = await bucket.open_download_stream(ObjectId(ft))
     except gridfs.errors.NoFile:
         raise HTTPException(status_code=404, detail=f"Image {ft} not found")
-    contents = await file.read()
-    return StreamingResponse(
-        io.BytesIO(contents),
-        media_type=file.content_type,
-        headers={
-            "Content-Disposition": f"attachment; filename={file.filename}"
-        },
+    return await download_response(
+        request,
+        file,
+        {"Content-Disposition": f"attachment; filename={file.filename}"},
     )
+
+
+@router.get(
+    "/{ft}/thumbnail",
+    response_description="Download a thumbnail of an image",
+    response_class=Response,
+)
+async def thumbnail_query(
+    request: Request,
+    ft: mongo_object_id.MongoObjectId,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_imagery"])
+    ],
+    w: Annotated[int, Query(ge=1, le=MAX_THUMBNAIL_SIZE)] = 256,
+    h: Annotated[int, Query(ge=1, le=MAX_THUMBNAIL_SIZE)] = 256,
+    format: Literal["jpeg", "png", "webp"] = "jpeg",
+):
+    """
+    Download a thumbnail of an image, scaled to fit within a width and
+    height while keeping its aspect ratio.
+
+    Thumbnails are generated on first request and cached. An image never
+    changes, so neither does its thumbnail, which may be cached by clients
+    indefinitely.
+
+    :param ft: ObjectID of the image
+    :param w: Largest width of the thumbnail in pixels
+    :param h: Largest height of the thumbnail in pixels
+    :param format: Image format of the thumbnail
+    """
+    headers = {
+        "ETag": f'"{thumbnailName(ft, w, h, format)}"',
+        "Cache-Control": CACHE_CONTROL,
+    }
+    state = request.app.state
+    if etagMatches(request, headers["ETag"]):
+        # The ETag outlives the image, so check it is still stored
+        if await state.files.count_documents({"_id": ObjectId(ft)}, limit=1):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        raise HTTPException(status_code=404, detail=f"Image {ft} not found")
+    try:
+        content = await THUMBNAILS.get(state, ObjectId(ft), w, h, format)
+    except gridfs.errors.NoFile:
+        raise HTTPException(status_code=404, detail=f"Image {ft} not found")
+    return Response(content, media_type=FORMATS[format], headers=headers)
@@ -7,12 +7,20 @@ and finding of that metadata.
 
 from typing import Any, Dict, List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, Request, Security, status
+from pydantic import Field
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
-from ..ftCommon import FTModel, add_one_to_db, delete_one_from_db, find_in_db
+from ..ftCommon import (
+    FTCollection,
+    FTModel,
+    Page,
+    add_one_to_db,
+    delete_one_from_db,
+    query_collection,
+)
+from ..ftIndexes import declare_indexes, index
 from ..users import User, get_current_active_user
 
 router = APIRouter(
@@ -37,7 +45,7 @@ class Metadata(FTModel):
     )
 
 
-class MetadataCollection(BaseModel):
+class MetadataCollection(FTCollection):
     metadata: List[Metadata]
 
 
@@ -83,6 +91,12 @@ async def remove_metadata(
     )
 
 
+INDEXES = declare_indexes(
+    "metadata",
+    index("image", serves=["image"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for metadata",
@@ -94,6 +108,7 @@ async def metadata_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_imagery"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     image: mongo_object_id.MongoObjectId | None = None,
 ):
@@ -102,5 +117,10 @@ async def metadata_query(
         "_id": ft,
         "image": image,
     }
-    result = await find_in_db(request.app.state.metadata, query)
-    return MetadataCollection(metadata=result)
+    return await query_collection(
+        request,
+        request.app.state.metadata,
+        query,
+        page,
+        "metadata",
+    )
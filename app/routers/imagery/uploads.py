@@ -0,0 +1,389 @@
+"""
+Collects API calls related to resumable uploads of imagery.
+
+This collection of endpoints allows large images to be uploaded a chunk
+at a time over unreliable links. A client opens an upload, PUTs its
+numbered chunks in any order, asks which have been received after a
+failure, and commits the upload once every chunk has arrived.
+
+Each chunk is written straight into GridFS as the chunk of the same number
+of the image, so only one chunk is held in memory at a time and nothing is
+copied on commit, which only adds the file document. Until then the
+chunks are not part of any file. Uploads not committed within
+FT_UPLOAD_TTL seconds are abandoned and their chunks removed.
+
+A committed upload records the image it was committed as, which may be
+another holding the same content, until it expires. A commit tried again,
+e.g. as its response was lost, returns that image rather than committing
+the chunks again, which may have been deleted as duplicates.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+import pymongo
+from bson.binary import Binary
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Path,
+    Request,
+    Response,
+    Security,
+    status,
+)
+from gridfs import DEFAULT_CHUNK_SIZE
+from pydantic import BaseModel, Field
+from pydantic_extra_types import mongo_object_id
+from typing_extensions import Annotated
+
+from ..ftGridFS import deduplicate, hash_chunks
+from ..ftIndexes import declare_indexes, index
+from ..users import User, get_current_active_user
+
+router = APIRouter(
+    prefix="/uploads",
+    tags=["imagery"],
+    responses={404: {"description": "Not found"}},
+)
+
+ERROR_MSG_OBJECT = "Upload"
+
+load_dotenv()
+UPLOAD_TTL = float(os.getenv("FT_UPLOAD_TTL", 24 * 60 * 60))
+# Chunks are stored as documents, which are at most 16 MB
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+# A commit not finished in this time is taken to have failed
+COMMIT_LEASE = timedelta(minutes=10)
+
+
+class NewUpload(BaseModel):
+    filename: str
+    contentType: Optional[str] = None
+    length: int = Field(
+        ge=0, json_schema_extra={"description": "Size of the image in bytes"}
+    )
+    chunkSize: int = Field(
+        default=DEFAULT_CHUNK_SIZE,
+        ge=MIN_CHUNK_SIZE,
+        le=MAX_CHUNK_SIZE,
+        json_schema_extra={
+            "description": "Size in bytes of every chunk but the last"
+        },
+    )
+
+
+class Upload(NewUpload):
+    ft: mongo_object_id.MongoObjectId = Field(
+        json_schema_extra={
+            "description": "ObjectID of the upload, and of the image once"
+            " committed"
+        }
+    )
+    chunks: int = Field(
+        json_schema_extra={"description": "Number of chunks to upload"}
+    )
+    expires: datetime
+    received: List[int] = Field(
+        default=[],
+        json_schema_extra={"description": "Numbers of the chunks received"},
+    )
+    committed: Optional[mongo_object_id.MongoObjectId] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "ObjectID of the image, once committed"
+        },
+    )
+
+
+def chunkCount(length: int, chunkSize: int) -> int:
+    return -(-length // chunkSize)
+
+
+def chunkLength(upload: dict, n: int) -> int:
+    """Size in bytes that chunk n of an upload must be."""
+    return min(upload["chunkSize"], upload["length"] - n * upload["chunkSize"])
+
+
+def uploadModel(upload: dict, received: list[int]) -> Upload:
+    return Upload(ft=upload["_id"], received=received, **upload)
+
+
+async def find_upload(request: Request, ft) -> dict:
+    """An upload which is still open, or 404."""
+    upload = await request.app.state.uploads.find_one(
+        {"_id": ft, "expires": {"$gt": datetime.now(timezone.utc)}}
+    )
+    if upload is None:
+        raise HTTPException(
+            status_code=404, detail=f"{ERROR_MSG_OBJECT} {ft} not found"
+        )
+    return upload
+
+
+def check_uncommitted(upload: dict):
+    """Raise 409 if an upload is committed, or being committed."""
+    if "committed" in upload or "committing" in upload:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{ERROR_MSG_OBJECT} {upload['_id']} is committed",
+        )
+
+
+async def purge_uploads(state):
+    """Remove the chunks of uploads which have expired, then the uploads."""
+    expired = state.uploads.find(
+        {"expires": {"$lte": datetime.now(timezone.utc)}},
+        {"_id": 1, "committed": 1},
+    )
+    uploads = await expired.to_list()
+    if not uploads:
+        return
+    ids = [upload["_id"] for upload in uploads]
+    # Chunks of an upload committed as it expired now belong to the image
+    stored = set(await state.files.distinct("_id", {"_id": {"$in": ids}}))
+    abandoned = [
+        upload["_id"]
+        for upload in uploads
+        if "committed" not in upload and upload["_id"] not in stored
+    ]
+    await state.chunks.delete_many({"files_id": {"$in": abandoned}})
+    await state.uploads.delete_many({"_id": {"$in": ids}})
+
+
+async def read_chunk(request: Request, limit: int) -> bytes:
+    """Read a request body of at most a limit of bytes."""
+    if int(request.headers.get("content-length") or 0) > limit:
+        raise HTTPException(status_code=413, detail="Chunk is too large")
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > limit:
+            raise HTTPException(status_code=413, detail="Chunk is too large")
+    return bytes(data)
+
+
+async def received_chunks(state, ft) -> list[int]:
+    cursor = state.chunks.find({"files_id": ft}, {"_id": 0, "n": 1})
+    cursor = cursor.sort("n", pymongo.ASCENDING)
+    return [chunk["n"] for chunk in await cursor.to_list()]
+
+
+async def commit_chunks(state, upload: dict):
+    """
+    Add the file document of an upload, returning the ObjectID of the image
+    holding its content.
+    """
+    try:
+        await state.files.insert_one(
+            {
+                "_id": upload["_id"],
+                "length": upload["length"],
+                "chunkSize": upload["chunkSize"],
+                "uploadDate": datetime.now(timezone.utc),
+                "filename": upload["filename"],
+                "metadata": {"contentType": upload["contentType"]},
+            }
+        )
+    except pymongo.errors.DuplicateKeyError:
+        # Added by a commit which failed before it was recorded
+        pass
+    return await deduplicate(
+        state, upload["_id"], await hash_chunks(state, upload["_id"])
+    )
+
+
+@router.post(
+    "/",
+    response_description="Open a resumable upload",
+    response_model=Upload,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_upload(
+    request: Request,
+    upload: NewUpload,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_imagery"])
+    ],
+):
+    """
+    Open an upload of an image, to be sent in chunks of chunkSize bytes,
+    numbered from 0, and committed once every chunk has been sent.
+
+    :param upload: Name, content type and size of the image
+    """
+    await purge_uploads(request.app.state)
+    document = upload.model_dump() | {
+        "_id": ObjectId(),
+        "chunks": chunkCount(upload.length, upload.chunkSize),
+        "created": datetime.now(timezone.utc),
+        "expires": datetime.now(timezone.utc) + timedelta(seconds=UPLOAD_TTL),
+    }
+    await request.app.state.uploads.insert_one(document)
+    return uploadModel(document, [])
+
+
+INDEXES = declare_indexes("uploads", index("expires"))
+# As GridFS creates, but needed before any image has been uploaded
+CHUNK_INDEXES = declare_indexes("chunks", index("files_id", "n", unique=True))
+
+
+@router.get(
+    "/{ft}",
+    response_description="Find the chunks of an upload received",
+    response_model=Upload,
+)
+async def upload_query(
+    request: Request,
+    ft: mongo_object_id.MongoObjectId,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_imagery"])
+    ],
+):
+    """
+    Find an open upload and the chunks of it received, so an interrupted
+    upload can send only those missing.
+
+    :param ft: ObjectID of the upload
+    """
+    upload = await find_upload(request, ft)
+    return uploadModel(
+        upload, await received_chunks(request.app.state, upload["_id"])
+    )
+
+
+@router.put(
+    "/{ft}/{n}",
+    response_description="Upload a chunk",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def upload_chunk(
+    request: Request,
+    ft: mongo_object_id.MongoObjectId,
+    n: Annotated[int, Path(ge=0)],
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_imagery"])
+    ],
+):
+    """
+    Upload chunk n of an upload, as the raw bytes of the request body.
+    Every chunk must be chunkSize bytes, but the last, which holds the rest
+    of the image. A chunk sent again replaces the one received.
+
+    :param ft: ObjectID of the upload
+    :param n: Number of the chunk, from 0
+    """
+    upload = await find_upload(request, ft)
+    check_uncommitted(upload)
+    if n >= upload["chunks"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{ERROR_MSG_OBJECT} has {upload['chunks']} chunks",
+        )
+    expected = chunkLength(upload, n)
+    data = await read_chunk(request, expected)
+    if len(data) != expected:
+        raise HTTPException(
+            status_code=400, detail=f"Chunk {n} must be {expected} bytes"
+        )
+    query = {"files_id": upload["_id"], "n": n}
+    try:
+        await request.app.state.chunks.replace_one(
+            query, query | {"data": Binary(data)}, upsert=True
+        )
+    except pymongo.errors.DuplicateKeyError:
+        # Sent twice at once, and inserted by the other
+        pass
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    "/{ft}/commit",
+    response_description="Commit an upload as an image",
+    status_code=status.HTTP_201_CREATED,
+)
+async def commit_upload(
+    request: Request,
+    ft: mongo_object_id.MongoObjectId,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_imagery"])
+    ],
+):
+    """
+    Commit an upload whose chunks have all been received as an image, with
+    the same ObjectID, unless its content is already stored, when the
+    ObjectID of the image stored is returned instead. Committing an upload
+    again returns the same ObjectID.
+
+    :param ft: ObjectID of the upload
+    """
+    state = request.app.state
+    upload = await find_upload(request, ft)
+    if "committed" in upload:
+        return {"ft": str(upload["committed"])}
+    received = await state.chunks.count_documents({"files_id": upload["_id"]})
+    if received != upload["chunks"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{received} of {upload['chunks']} chunks received",
+        )
+    now = datetime.now(timezone.utc)
+    claimed = await state.uploads.update_one(
+        {
+            "_id": upload["_id"],
+            "committed": {"$exists": False},
+            "$or": [
+                {"committing": {"$exists": False}},
+                {"committing": {"$lt": now - COMMIT_LEASE}},
+            ],
+        },
+        {"$set": {"committing": now}},
+    )
+    if claimed.modified_count == 0:
+        upload = await find_upload(request, ft)
+        if "committed" in upload:
+            return {"ft": str(upload["committed"])}
+        raise HTTPException(
+            status_code=409,
+            detail=f"{ERROR_MSG_OBJECT} {ft} is being committed",
+        )
+    try:
+        ft = await commit_chunks(state, upload)
+        await state.uploads.update_one(
+            {"_id": upload["_id"]}, {"$set": {"committed": ft}}
+        )
+    finally:
+        # Lets a commit which failed be tried again
+        await state.uploads.update_one(
+            {"_id": upload["_id"]}, {"$unset": {"committing": ""}}
+        )
+    return {"ft": str(ft)}
+
+
+@router.delete(
+    "/{ft}",
+    response_description="Abandon an upload",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def remove_upload(
+    request: Request,
+    ft: mongo_object_id.MongoObjectId,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_imagery"])
+    ],
+):
+    """
+    Abandon an upload, removing the chunks received. Uploads which are
+    committed cannot be abandoned.
+
+    :param ft: ObjectID of the upload
+    """
+    upload = await find_upload(request, ft)
+    check_uncommitted(upload)
+    await request.app.state.chunks.delete_many({"files_id": upload["_id"]})
+    await request.app.state.uploads.delete_one({"_id": upload["_id"]})
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,133 @@
+"""
+Collects API calls related to following the digital twin live.
+
+This collection of endpoints allows displays to be sent documents as they
+are written, rather than polling for them.
+"""
+
+from typing import List
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request, Security
+from fastapi.responses import StreamingResponse
+from pydantic_extra_types import mongo_object_id
+from typing_extensions import Annotated
+
+from .ftChanges import feed_collections
+from .ftCommon import MAX_PAGE_LIMIT, STAMP, bsonDefault, documentToFT
+from .ftLive import LIVE, LIVE_KEEPALIVE, Published, Subscriber
+from .users import User, get_current_active_user
+
+router = APIRouter(
+    prefix="/live",
+    tags=["live"],
+    responses={404: {"description": "Not found"}},
+)
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+def live_collections(state) -> set[str]:
+    """Names of the collections which may be followed."""
+    return {db.name for db in feed_collections(state)} | {state.samples.name}
+
+
+def encodeEvent(message: Published) -> bytes:
+    """A document as a server-sent event, encoded once for every subscriber."""
+    if message.encoded is None:
+        document = {k: v for k, v in message.document.items() if k != STAMP}
+        content = {
+            "collection": message.collection,
+            "document": documentToFT(document),
+        }
+        message.encoded = (
+            b"event: document\ndata: "
+            + orjson.dumps(content, default=bsonDefault)
+            + b"\n\n"
+        )
+    return message.encoded
+
+
+async def events(subscriber: Subscriber):
+    """Send documents as they are published, until the client leaves."""
+    try:
+        while True:
+            messages, dropped = await subscriber.next(LIVE_KEEPALIVE)
+            if dropped:
+                yield f"event: dropped\ndata: {dropped}\n\n".encode()
+            if messages:
+                yield b"".join(encodeEvent(m) for m in messages)
+            elif not dropped:
+                # Keeps proxies from closing an idle connection
+                yield b": keepalive\n\n"
+    finally:
+        LIVE.unsubscribe(subscriber)
+
+
+@router.get(
+    "/",
+    response_description="Follow documents as they are written",
+    response_class=StreamingResponse,
+    responses={200: {"content": {EVENT_STREAM_MEDIA_TYPE: {}}}},
+)
+async def live_query(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_changes"])
+    ],
+    collection: Annotated[
+        List[str],
+        Query(
+            max_length=MAX_PAGE_LIMIT,
+            description="Names of collections, as in the change feed",
+        ),
+    ] = [],
+    sensor: Annotated[
+        List[mongo_object_id.MongoObjectId],
+        Query(max_length=MAX_PAGE_LIMIT, description="ObjectIDs of sensors"),
+    ] = [],
+    animal: Annotated[
+        List[str],
+        Query(
+            max_length=MAX_PAGE_LIMIT,
+            description="Identifiers of animals, as the animal.id of events",
+        ),
+    ] = [],
+):
+    """
+    Follow the documents added or updated in collections, or about sensors
+    or animals, as server-sent events.
+
+    Each document is sent as a `document` event holding its collection and
+    the document. A client which falls behind is sent a `dropped` event
+    with the number of documents it missed, which can be caught up from
+    the change feed.
+
+    :param collection: Names of collections, repeated for each
+    :param sensor: ObjectIDs of sensors, repeated for each
+    :param animal: Identifiers of animals, repeated for each
+    """
+    if not (collection or sensor or animal):
+        raise HTTPException(
+            status_code=400,
+            detail="Follow at least one collection, sensor or animal",
+        )
+    allowed = live_collections(request.app.state)
+    unknown = sorted(set(collection) - allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Collections cannot be followed: {', '.join(unknown)}",
+        )
+    subscriber = LIVE.subscribe(collection, sensor, animal, allowed)
+    if subscriber is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many subscribers",
+            headers={"Retry-After": str(round(LIVE_KEEPALIVE))},
+        )
+    return StreamingResponse(
+        events(subscriber),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
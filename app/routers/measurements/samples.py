@@ -15,21 +15,63 @@ This collection of endpoints allows for the addition, deletion
 and finding of those samples.
 """
 
-from datetime import datetime
-from typing import List, Optional
+import asyncio
+import re
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel, Field
+import numpy as np
+import orjson
+from bson.objectid import ObjectId
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, ValidationError
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftBuffer import add_many_to_buffer, add_one_to_buffer, write_buffer
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    MAX_PAGE_LIMIT,
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
     FTModel,
+    Page,
+    add_batch_to_db,
     add_one_to_db,
     dateBuild,
-    delete_one_from_db,
-    find_in_db,
+    find_one_and_delete_from_db,
+    insert_many_to_db,
+    query_collection,
+)
+from ..ftIndexes import declare_indexes, index, meta_indexes
+from ..ftLatest import LATEST
+from ..ftRollups import (
+    ACCUMULATORS,
+    ROLLUP_TRACKER,
+    ROLLUPS,
+    choose,
+    coveredPipeline,
+    millis,
+)
+from ..ftSampling import (
+    lttb,
+    preselected,
+    preselectPipeline,
+    resample,
+    stepPipeline,
 )
+from ..ftSeries import SAMPLES_TIMESERIES, SERIES
 from ..users import User, get_current_active_user
 
 router = APIRouter(
@@ -40,6 +82,41 @@ router = APIRouter(
 
 ERROR_MSG_OBJECT = "Sample"
 
+MAX_BATCH_SAMPLES = 100000
+BATCH_MEDIA_TYPE = "application/octet-stream"
+MAX_AGGREGATE_BUCKETS = MAX_PAGE_LIMIT
+MAX_RESAMPLE_SENSORS = 500
+# Sensors resampled from the database at once, so resampling many holds
+# few connections from the pool
+RESAMPLE_CONCURRENCY = 8
+# Values returned across every sensor resampled
+MAX_RESAMPLE_VALUES = 2500000
+# Accumulators of the functions which can be applied to each bucket
+AGGREGATES = {
+    "min": {"$min": "$value"},
+    "max": {"$max": "$value"},
+    "mean": {"$avg": "$value"},
+    "count": {"$sum": 1},
+    "first": {"$first": "$value"},
+    "last": {"$last": "$value"},
+}
+# $dateTrunc units of bucket widths, and their shortest length in ms
+WIDTH_UNITS = {
+    "ms": ("millisecond", 1),
+    "s": ("second", 1000),
+    "m": ("minute", 60 * 1000),
+    "h": ("hour", 60 * 60 * 1000),
+    "d": ("day", 24 * 60 * 60 * 1000),
+    "w": ("week", 7 * 24 * 60 * 60 * 1000),
+    "mo": ("month", 28 * 24 * 60 * 60 * 1000),
+    "y": ("year", 365 * 24 * 60 * 60 * 1000),
+}
+# Range of timestamps, in ms since the epoch, which can be stored
+MIN_TIMESTAMP = int(datetime(1, 1, 1, tzinfo=timezone.utc).timestamp()) * 1000
+MAX_TIMESTAMP = (
+    int(datetime(9999, 12, 31, tzinfo=timezone.utc).timestamp()) * 1000
+)
+
 
 class Sample(FTModel):
     sensor: mongo_object_id.MongoObjectId = Field(
@@ -71,10 +148,108 @@ class Sample(FTModel):
     )
 
 
-class SampleCollection(BaseModel):
+class SampleCollection(FTCollection):
     samples: List[Sample]
 
 
+class SampleBatch(BaseModel):
+    sensor: mongo_object_id.MongoObjectId = Field(
+        json_schema_extra={
+            "description": "ObjectID of sensor",
+            "example": str(mongo_object_id.MongoObjectId()),
+        }
+    )
+    timestamps: List[int] = Field(
+        max_length=MAX_BATCH_SAMPLES,
+        json_schema_extra={
+            "description": "Times when samples recorded, in milliseconds"
+            " since the Unix epoch",
+            "example": [1735689600000, 1735689601000],
+        },
+    )
+    values: List[float] = Field(
+        max_length=MAX_BATCH_SAMPLES,
+        json_schema_extra={
+            "description": "Values recorded by sensor, one per timestamp",
+            "example": [4.3, 4.4],
+        },
+    )
+    predicted: bool = Field(
+        default=False,
+        json_schema_extra={
+            "description": "Flag if the values are predicted values or not"
+        },
+    )
+
+
+class SampleBucket(BaseModel):
+    timestamp: datetime = Field(
+        json_schema_extra={"description": "Start of the bucket"}
+    )
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    count: Optional[int] = None
+    first: Optional[float] = None
+    last: Optional[float] = None
+
+
+class SamplePoint(BaseModel):
+    timestamp: datetime
+    value: float
+
+
+class SampleAggregate(BaseModel):
+    buckets: Optional[List[SampleBucket]] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "Requested functions of each bucket, in 'buckets'"
+            " mode"
+        },
+    )
+    points: Optional[List[SamplePoint]] = Field(
+        default=None,
+        json_schema_extra={
+            "description": "Points of the downsampled series, in 'lttb' mode"
+        },
+    )
+
+
+class SampleResample(BaseModel):
+    sensors: List[mongo_object_id.MongoObjectId]
+    timestamps: List[int] = Field(
+        json_schema_extra={
+            "description": "Times of the grid, in milliseconds since the"
+            " Unix epoch"
+        }
+    )
+    values: List[List[Optional[float]]] = Field(
+        json_schema_extra={
+            "description": "Values of each sensor, in the order given, at"
+            " each time of the grid. Null where no sample is within the"
+            " tolerance"
+        }
+    )
+
+
+class SampleBatchOutcome(BaseModel):
+    inserted: int
+    duplicates: List[int] = Field(
+        json_schema_extra={
+            "description": "Positions of samples which already exist"
+        }
+    )
+
+
+def samplesWritten(documents: list[dict]):
+    """Keep rollups and the latest samples up to date with new samples."""
+    ROLLUP_TRACKER.touchDocuments(documents)
+    LATEST.observe(documents)
+
+
+BUFFER = write_buffer("samples", written=samplesWritten)
+
+
 @router.post(
     "/",
     response_description="Add new sample",
@@ -84,6 +259,7 @@ class SampleCollection(BaseModel):
 )
 async def create_sample(
     request: Request,
+    response: Response,
     sample: Sample,
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["write_measurements"])
@@ -95,11 +271,174 @@ async def create_sample(
     Adds a timestamp if one is not included (useful for devices without an
     accurate clock).
 
+    Where samples are written behind, the sample is accepted once valid
+    and written shortly after.
+
     :param sample: Sample to be added
     """
-    return await add_one_to_db(
+    if BUFFER is not None:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await add_one_to_buffer(sample, BUFFER)
+    document = await add_one_to_db(
         sample, request.app.state.samples, ERROR_MSG_OBJECT
     )
+    samplesWritten([document])
+    return document
+
+
+@router.post(
+    "/bulk",
+    response_description="Add new samples in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_sample_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_measurements"])
+    ],
+):
+    """
+    Create new samples in bulk.
+
+    Where samples are written behind, valid samples are accepted and
+    written shortly after.
+
+    :param items: New samples to be added
+    """
+    if BUFFER is not None:
+        return await add_many_to_buffer(Sample, items, BUFFER)
+    outcomes, written = await insert_many_to_db(
+        Sample, items, request.app.state.samples
+    )
+    samplesWritten(written)
+    return outcomes
+
+
+def unpackBatch(body: bytes):
+    """
+    Unpack a binary batch: little-endian int64 timestamps, in milliseconds
+    since the epoch, followed by the same number of float64 values.
+    """
+    if len(body) % 16 or len(body) > MAX_BATCH_SAMPLES * 16:
+        raise HTTPException(
+            status_code=400,
+            detail="Body must hold up to"
+            f" {MAX_BATCH_SAMPLES} int64 timestamps followed by as many"
+            " float64 values",
+        )
+    count = len(body) // 16
+    timestamps = np.frombuffer(body, dtype="<i8", count=count)
+    values = np.frombuffer(body, dtype="<f8", count=count, offset=count * 8)
+    return timestamps, values
+
+
+def validateBatch(timestamps: np.ndarray, values: np.ndarray):
+    """Check the arrays of a batch as a whole, rather than per sample."""
+    if len(timestamps) != len(values):
+        raise HTTPException(
+            status_code=422,
+            detail="timestamps and values must be the same length",
+        )
+    if len(timestamps) == 0:
+        raise HTTPException(status_code=422, detail="Batch is empty")
+    invalid = ~np.isfinite(values)
+    invalid |= (timestamps < MIN_TIMESTAMP) | (timestamps > MAX_TIMESTAMP)
+    if invalid.any():
+        position = int(np.flatnonzero(invalid)[0])
+        raise HTTPException(
+            status_code=422,
+            detail=f"Sample {position} has an invalid timestamp or value",
+        )
+
+
+def batchDocuments(sensor, predicted: bool, timestamps, values):
+    """Sample documents, with timestamps converted in a single pass."""
+    times = timestamps.astype("datetime64[ms]").astype(object)
+    return [
+        {
+            "sensor": sensor,
+            "timestamp": time,
+            "value": value,
+            "predicted": predicted,
+        }
+        for time, value in zip(times.tolist(), values.tolist())
+    ]
+
+
+@router.post(
+    "/batch",
+    response_description="Add a batch of samples from one sensor",
+    response_model=SampleBatchOutcome,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": SampleBatch.model_json_schema()
+                },
+                BATCH_MEDIA_TYPE: {
+                    "schema": {"type": "string", "format": "binary"}
+                },
+            },
+        }
+    },
+)
+async def create_sample_batch(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_measurements"])
+    ],
+    sensor: Annotated[
+        mongo_object_id.MongoObjectId | None,
+        Query(description="ObjectID of sensor, for binary batches"),
+    ] = None,
+    predicted: Annotated[
+        bool, Query(description="Flag if binary batch values are predicted")
+    ] = False,
+):
+    """
+    Create many samples from one sensor, given as parallel arrays of
+    timestamps and values.
+
+    Batches are sent as JSON or, with Content-Type
+    application/octet-stream, as little-endian int64 timestamps in
+    milliseconds since the epoch followed by the same number of float64
+    values, with the sensor given as a query parameter.
+
+    Samples which already exist are skipped and reported by position.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(BATCH_MEDIA_TYPE):
+        if sensor is None:
+            raise HTTPException(
+                status_code=422, detail="sensor is required for binary batches"
+            )
+        timestamps, values = unpackBatch(body)
+    else:
+        try:
+            batch = SampleBatch.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors(include_url=False))
+        # ObjectIDs are validated as strings from JSON
+        sensor, predicted = ObjectId(batch.sensor), batch.predicted
+        timestamps = np.array(batch.timestamps, dtype=np.int64)
+        values = np.array(batch.values, dtype=np.float64)
+    validateBatch(timestamps, values)
+
+    documents = batchDocuments(sensor, predicted, timestamps, values)
+    # Only the latest sample of the batch is needed by its ObjectID
+    last = int(np.argmax(timestamps))
+    documents[last]["_id"] = ObjectId()
+    inserted, duplicates = await add_batch_to_db(
+        request.app.state.samples, documents
+    )
+    ROLLUP_TRACKER.touch(sensor, predicted, timestamps)
+    if last not in duplicates:
+        LATEST.observe([documents[last]])
+    return SampleBatchOutcome(inserted=inserted, duplicates=duplicates)
 
 
 @router.delete("/{ft}", response_description="Delete a sample")
@@ -115,9 +454,71 @@ async def remove_samples(
 
     :param ft: ObjectID of the sample to delete
     """
-    return await delete_one_from_db(
-        request.app.state.samples, ft, ERROR_MSG_OBJECT
+    deleted = await find_one_and_delete_from_db(
+        request.app.state.samples,
+        ft,
+        {"sensor": 1, "predicted": 1, "timestamp": 1},
+        ERROR_MSG_OBJECT,
     )
+    # The minute it was rolled up into is rolled up again without it
+    ROLLUP_TRACKER.touchDeleted([deleted])
+    LATEST.forget(ft)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get(
+    "/changes",
+    response_description="List changes to samples",
+    response_model=ChangeCollection,
+)
+async def sample_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_measurements"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List samples added, updated or deleted since a token or time, in the
+    order they were changed.
+
+    Not available where samples are stored as a time series.
+    """
+    if SAMPLES_TIMESERIES:
+        raise HTTPException(
+            status_code=404, detail="Changes to samples are not recorded"
+        )
+    return await changes_response(request, [request.app.state.samples], feed)
+
+
+def sample_indexes(timeseries: bool) -> list:
+    """
+    Indexes serving sample queries, as stored in an ordinary or time-series
+    collection. Unique indexes, and the change feed, are not available to
+    time series.
+    """
+    if timeseries:
+        return [
+            index(SERIES, "timestamp"),
+            index(
+                f"{SERIES}.sensor",
+                "timestamp",
+                serves=["sensor", "timestampStart", "timestampEnd"],
+            ),
+        ]
+    return [
+        *meta_indexes(upserts=False),
+        index(
+            "sensor",
+            "timestamp",
+            "predicted",
+            unique=True,
+            serves=["sensor", "timestampStart", "timestampEnd"],
+        ),
+    ]
+
+
+INDEXES = declare_indexes("samples", *sample_indexes(SAMPLES_TIMESERIES))
 
 
 @router.get(
@@ -131,6 +532,7 @@ async def sample_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_measurements"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     sensor: mongo_object_id.MongoObjectId | None = None,
     timestampStart: datetime | None = None,
@@ -151,5 +553,361 @@ async def sample_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.samples, query)
-    return SampleCollection(samples=result)
+    return await query_collection(
+        request,
+        request.app.state.samples,
+        query,
+        page,
+        "samples",
+    )
+
+
+def parseWidth(width: str):
+    """The $dateTrunc unit and bin size of a width such as '15m'."""
+    match = re.fullmatch(r"(\d+)(ms|s|mo|m|h|d|w|y)", width)
+    if match is None or int(match[1]) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid width '{width}'. Widths are a number followed"
+            f" by one of {', '.join(WIDTH_UNITS)}, e.g. '15m'",
+        )
+    return int(match[1]), *WIDTH_UNITS[match[2]]
+
+
+def parseStep(width: str) -> int:
+    """Length in ms of a width such as '15m', which must be fixed."""
+    binSize, unit, length = parseWidth(width)
+    if unit in ("month", "year"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid width '{width}'. Months and years vary in length",
+        )
+    return binSize * length
+
+
+def timeRange(timestampStart: datetime, timestampEnd: datetime | None):
+    """
+    Start and end of a range, ending now by default. Times without a zone
+    are taken as UTC, as stored.
+    """
+    start = timestampStart.replace(
+        tzinfo=timestampStart.tzinfo or timezone.utc
+    )
+    end = timestampEnd or datetime.now(timezone.utc)
+    end = end.replace(tzinfo=end.tzinfo or timezone.utc)
+    if end <= start:
+        raise HTTPException(
+            status_code=400, detail="timestampEnd must be after timestampStart"
+        )
+    return start, end
+
+
+def parseFunctions(functions: str) -> list[str]:
+    names = [name.strip() for name in functions.split(",")]
+    if not names or any(name not in AGGREGATES for name in names):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Functions must be from {', '.join(AGGREGATES)}",
+        )
+    return names
+
+
+def bucketPipeline(binSize: int, unit: str, functions: list[str]) -> list:
+    """Aggregation stages grouping samples into buckets of a width."""
+    stages = []
+    if "first" in functions or "last" in functions:
+        stages.append({"$sort": {"timestamp": 1}})
+    truncated = {"date": "$timestamp", "unit": unit, "binSize": binSize}
+    return stages + [
+        {
+            "$group": {
+                "_id": {"$dateTrunc": truncated},
+                **{name: AGGREGATES[name] for name in functions},
+            }
+        },
+        {"$sort": {"_id": 1}},
+        {"$set": {"timestamp": "$_id"}},
+        {"$unset": "_id"},
+    ]
+
+
+def rollupBucketPipeline(
+    binSize: int, unit: str, functions: list[str]
+) -> list:
+    """
+    Aggregation stages grouping the buckets of a rollup into wider buckets.
+    Means are weighted by the count of each bucket.
+    """
+    stages = []
+    if "first" in functions or "last" in functions:
+        stages.append({"$sort": {"timestamp": 1}})
+    accumulators = {
+        name: ACCUMULATORS[name] for name in functions if name != "mean"
+    }
+    computed = {"timestamp": "$_id"}
+    if "mean" in functions:
+        accumulators |= {
+            "_sum": ACCUMULATORS["sum"],
+            "_count": ACCUMULATORS["count"],
+        }
+        computed["mean"] = {"$divide": ["$_sum", "$_count"]}
+    truncated = {"date": "$timestamp", "unit": unit, "binSize": binSize}
+    return stages + [
+        {"$group": {"_id": {"$dateTrunc": truncated}, **accumulators}},
+        {"$sort": {"_id": 1}},
+        {"$set": computed},
+        {"$unset": ["_id", "_sum", "_count"]},
+    ]
+
+
+ROLLUP_INDEXES = [
+    declare_indexes(
+        rollup.name,
+        index(
+            "sensor",
+            "predicted",
+            "timestamp",
+            unique=True,
+            serves=["sensor", "predicted", "timestampStart", "timestampEnd"],
+        ),
+    )
+    for rollup in ROLLUPS
+]
+
+
+@router.get(
+    "/aggregate",
+    response_description="Aggregate samples over time",
+    response_model=SampleAggregate,
+    response_model_exclude_none=True,
+)
+async def sample_aggregate(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_measurements"])
+    ],
+    sensor: mongo_object_id.MongoObjectId,
+    timestampStart: datetime,
+    timestampEnd: datetime | None = None,
+    predicted: bool = False,
+    mode: Annotated[
+        Literal["buckets", "lttb"],
+        Query(
+            description="'buckets' applies functions to buckets of a width,"
+            " 'lttb' downsamples to a number of points for plotting"
+        ),
+    ] = "buckets",
+    width: Annotated[
+        str,
+        Query(
+            description="Width of each bucket: a number followed by ms, s,"
+            " m, h, d, w, mo or y"
+        ),
+    ] = "1h",
+    functions: Annotated[
+        str,
+        Query(
+            description="Comma separated functions applied to each bucket,"
+            " from min, max, mean, count, first and last"
+        ),
+    ] = "mean",
+    points: Annotated[
+        int,
+        Query(
+            ge=3,
+            le=MAX_PAGE_LIMIT,
+            description="Number of points in 'lttb' mode",
+        ),
+    ] = 1000,
+    rollups: Annotated[
+        bool,
+        Query(
+            description="Read buckets from the minute, hour or day rollups"
+            " where the width allows, rather than from every sample"
+        ),
+    ] = True,
+):
+    """
+    Aggregate the samples of a sensor over a time range.
+
+    In 'buckets' mode, the samples are grouped into buckets of a given
+    width, aligned to calendar boundaries, and each bucket reports the
+    functions requested. In 'lttb' mode, the samples are downsampled to a
+    number of points which keep the shape of the series when plotted.
+
+    Buckets whose width is a whole number of minutes, hours or days are
+    aggregated from the coarsest rollup that fits, with only the samples
+    at either end of the range which part of a rollup bucket covers read
+    individually.
+    """
+    start, end = timeRange(timestampStart, timestampEnd)
+    match = {
+        "$match": {
+            "sensor": sensor,
+            "predicted": True if predicted else {"$ne": True},
+            "timestamp": {"$gte": start, "$lt": end},
+        }
+    }
+    db = request.app.state.samples
+
+    if mode == "lttb":
+        pipeline = [match, *preselectPipeline(start, end, points)]
+        cursor = await db.aggregate(pipeline)
+        times, values = preselected(await cursor.to_list())
+        kept = lttb(times, values, points)
+        return SampleAggregate(
+            points=[
+                SamplePoint(timestamp=t, value=v)
+                for t, v in zip(
+                    times[kept].astype(object).tolist(), values[kept].tolist()
+                )
+            ]
+        )
+
+    binSize, unit, length = parseWidth(width)
+    span = (end - start).total_seconds() * 1000
+    if span / (binSize * length) > MAX_AGGREGATE_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Width would give more than {MAX_AGGREGATE_BUCKETS}"
+            " buckets",
+        )
+    names = parseFunctions(functions)
+    # Months and years are whole days, but of varying lengths
+    fixed = unit not in ("month", "year")
+    rollup = choose(binSize * length if fixed else None) if rollups else None
+    if rollup is None:
+        pipeline = [match, *bucketPipeline(binSize, unit, names)]
+    else:
+        key = (sensor, predicted)
+        await ROLLUP_TRACKER.flush(request.app.state, [key])
+        db = getattr(request.app.state, rollup.name)
+        pipeline = [
+            *coveredPipeline(
+                request.app.state.samples, rollup, key, start, end
+            ),
+            *rollupBucketPipeline(binSize, unit, names),
+        ]
+    cursor = await db.aggregate(pipeline)
+    return SampleAggregate(buckets=await cursor.to_list())
+
+
+async def resampleSensors(
+    db,
+    sensors: list,
+    predicted: bool,
+    start: datetime,
+    end: datetime,
+    step: int,
+    tolerance: int,
+    method: str,
+):
+    """
+    Resample the samples of sensors onto a grid of times every step ms from
+    the start to the end, returning the grid and a row of values for each
+    sensor.
+    """
+    grid = np.arange(millis(start), millis(end) + 1, step)
+    grid = grid.astype("datetime64[ms]")
+    window = np.timedelta64(tolerance, "ms")
+    limit = asyncio.Semaphore(RESAMPLE_CONCURRENCY)
+
+    async def series(sensor):
+        match = {
+            "sensor": sensor,
+            "predicted": True if predicted else {"$ne": True},
+            "timestamp": {
+                "$gte": start - window.item(),
+                "$lte": end + window.item(),
+            },
+        }
+        pipeline = [{"$match": match}, *stepPipeline(start, step)]
+        async with limit:
+            cursor = await db.aggregate(pipeline)
+            selected = await cursor.to_list()
+        return preselected(selected, ("first", "last"))
+
+    rows = await asyncio.gather(*(series(s) for s in sensors))
+    values = np.vstack([resample(t, v, grid, method, window) for t, v in rows])
+    return grid, values
+
+
+@router.get(
+    "/resample",
+    response_description="Resample sensors onto a common grid",
+    response_model=SampleResample,
+)
+async def sample_resample(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_measurements"])
+    ],
+    sensor: Annotated[
+        List[mongo_object_id.MongoObjectId],
+        Query(
+            max_length=MAX_RESAMPLE_SENSORS,
+            description="ObjectIDs of sensors, repeated for each",
+        ),
+    ],
+    timestampStart: datetime,
+    timestampEnd: datetime | None = None,
+    step: Annotated[
+        str,
+        Query(
+            description="Interval of the grid: a number followed by ms, s,"
+            " m, h, d or w"
+        ),
+    ] = "1m",
+    method: Annotated[
+        Literal["nearest", "linear", "ffill"],
+        Query(
+            description="'nearest' takes the closest sample, 'linear'"
+            " interpolates between the samples either side and 'ffill'"
+            " takes the latest sample at or before each time"
+        ),
+    ] = "linear",
+    tolerance: Annotated[
+        str | None,
+        Query(
+            description="Furthest a sample may be from a time of the grid"
+            " to be used, as for step. Defaults to the step"
+        ),
+    ] = None,
+    predicted: bool = False,
+):
+    """
+    Resample the samples of several sensors onto a common grid of times,
+    every step from timestampStart to timestampEnd, so they can be
+    combined time by time (e.g. for a temperature-humidity index).
+
+    The result is columnar: the times of the grid, then the values of each
+    sensor at those times.
+    """
+    start, end = timeRange(timestampStart, timestampEnd)
+    step_ms = parseStep(step)
+    tolerance_ms = step_ms if tolerance is None else parseStep(tolerance)
+    points = (end - start).total_seconds() * 1000 // step_ms + 1
+    if points * len(sensor) > MAX_RESAMPLE_VALUES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Step would give more than {MAX_RESAMPLE_VALUES} values",
+        )
+    grid, values = await resampleSensors(
+        request.app.state.samples,
+        sensor,
+        predicted,
+        start,
+        end,
+        step_ms,
+        tolerance_ms,
+        method,
+    )
+    content = {
+        "sensors": [str(s) for s in sensor],
+        "timestamps": grid.astype(np.int64),
+        "values": values,
+    }
+    return Response(
+        content=orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+    )
@@ -16,20 +16,38 @@ and finding of those sensors.
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Request, Security, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Security,
+    status,
+)
 from pydantic import BaseModel, Field
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    MAX_PAGE_LIMIT,
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
     FTModel,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
+from ..ftLatest import LATEST
 from ..users import User, get_current_active_user
+from .samples import Sample
 
 router = APIRouter(
     prefix="/sensors",
@@ -69,10 +87,19 @@ class Sensor(FTModel):
     )
 
 
-class SensorCollection(BaseModel):
+class SensorCollection(FTCollection):
     sensors: List[Sensor]
 
 
+class LatestSampleCollection(BaseModel):
+    samples: List[Sample] = Field(
+        json_schema_extra={"description": "Latest sample of each sensor"}
+    )
+    missing: List[mongo_object_id.MongoObjectId] = Field(
+        json_schema_extra={"description": "Sensors without any samples"}
+    )
+
+
 @router.post(
     "/",
     response_description="Add new sensor",
@@ -97,6 +124,27 @@ async def create_sensor(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new sensors in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_sensor_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_measurements"])
+    ],
+):
+    """
+    Create new sensors in bulk.
+
+    :param items: New sensors to be added
+    """
+    return await add_many_to_db(Sensor, items, request.app.state.sensors)
+
+
 @router.patch(
     "/{ft}",
     response_description="Update a sensor",
@@ -140,6 +188,100 @@ async def remove_sensor(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to sensors",
+    response_model=ChangeCollection,
+)
+async def sensor_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_measurements"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List sensors added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.sensors], feed)
+
+
+@router.get(
+    "/latest",
+    response_description="Latest samples of sensors",
+    response_model=LatestSampleCollection,
+    response_model_by_alias=False,
+)
+async def sensors_latest(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_measurements"])
+    ],
+    sensor: Annotated[
+        List[mongo_object_id.MongoObjectId],
+        Query(max_length=MAX_PAGE_LIMIT, description="ObjectIDs of sensors"),
+    ],
+    predicted: bool = False,
+):
+    """
+    Find the latest sample of each of several sensors, by timestamp.
+
+    :param sensor: ObjectIDs of the sensors, repeated for each
+    :param predicted: Find the latest predicted samples instead
+    """
+    documents = await LATEST.get(
+        request.app.state.samples, [(s, predicted) for s in sensor]
+    )
+    return LatestSampleCollection(
+        samples=[d for d in documents if d is not None],
+        missing=[s for s, d in zip(sensor, documents) if d is None],
+    )
+
+
+@router.get(
+    "/{ft}/latest",
+    response_description="Latest sample of a sensor",
+    response_model=Sample,
+    response_model_by_alias=False,
+)
+async def sensor_latest(
+    request: Request,
+    ft: mongo_object_id.MongoObjectId,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_measurements"])
+    ],
+    predicted: bool = False,
+):
+    """
+    Find the latest sample of a sensor, by timestamp.
+
+    :param ft: ObjectID of the sensor
+    :param predicted: Find the latest predicted sample instead
+    """
+    (document,) = await LATEST.get(
+        request.app.state.samples, [(ft, predicted)]
+    )
+    if document is None:
+        raise HTTPException(
+            status_code=404, detail=f"No samples from {ERROR_MSG_OBJECT} {ft}"
+        )
+    return document
+
+
+INDEXES = declare_indexes(
+    "sensors",
+    *meta_indexes(modified=True, upserts=False),
+    index(
+        "device",
+        "serial",
+        "measurement",
+        unique=True,
+        serves=["device"],
+    ),
+)
+
+
 @router.get(
     "/",
     response_description="Search for sensors",
@@ -151,6 +293,7 @@ async def sensor_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_measurements"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     device: mongo_object_id.MongoObjectId | None = None,
     serial: str | None = None,
@@ -175,5 +318,10 @@ async def sensor_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.sensors, query)
-    return SensorCollection(sensors=result)
+    return await query_collection(
+        request,
+        request.app.state.sensors,
+        query,
+        page,
+        "sensors",
+    )
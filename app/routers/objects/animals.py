@@ -17,18 +17,34 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarAnimalCoreResource.json
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Query, Request, Security, status
-from pydantic import BaseModel
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar import icarEnums, icarTypes
 from ..icar.icarResources import icarAnimalCoreResource as Animal
 from ..users import User, get_current_active_user
@@ -42,7 +58,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Animal"
 
 
-class AnimalCollection(BaseModel):
+class AnimalCollection(FTCollection):
     animals: List[Animal]
 
 
@@ -70,6 +86,83 @@ async def create_animal(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new animals in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_animal_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_animals"])
+    ],
+):
+    """
+    Create new animals in bulk.
+
+    :param items: New animals to be added
+    """
+    return await add_many_to_db(Animal, items, request.app.state.animals)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace animal by source",
+    response_model=Animal,
+    response_model_by_alias=False,
+)
+async def upsert_animal(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    animal: Animal,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_animals"])
+    ],
+):
+    """
+    Add an animal, or replace the one with the same source and sourceId.
+
+    :param source: Source of the animal
+    :param sourceId: ID of the animal in its source
+    :param animal: Animal to add or replace
+    """
+    return await upsert_one_by_source(
+        animal,
+        request.app.state.animals,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace animals in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_animal_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_animals"])
+    ],
+):
+    """
+    Add animals in bulk, replacing any with the same source and sourceId.
+
+    :param items: Animals to add or replace
+    """
+    return await upsert_many_by_source(
+        Animal, items, request.app.state.animals
+    )
+
+
 @router.delete("/{ft}", response_description="Delete an animal")
 async def remove_animal(
     request: Request,
@@ -113,6 +206,32 @@ async def update_animal(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to animals",
+    response_model=ChangeCollection,
+)
+async def animal_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_animals"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List animals added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.animals], feed)
+
+
+INDEXES = declare_indexes(
+    "animals",
+    *meta_indexes(modified=True),
+    index("identifier", serves=["identifier"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for animals",
@@ -124,6 +243,7 @@ async def animal_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_animals"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     identifier: icarTypes.icarAnimalIdentifierType | None = None,
     alternativeIdentifiers: Annotated[list[str] | None, Query()] = [],
@@ -178,5 +298,10 @@ async def animal_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.animals, query)
-    return AnimalCollection(animals=result)
+    return await query_collection(
+        request,
+        request.app.state.animals,
+        query,
+        page,
+        "animals",
+    )
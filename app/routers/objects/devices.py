@@ -17,17 +17,33 @@ https://github.com/adewg/ICAR/blob/v1.5.0/resources/icarDeviceResource.json
 from datetime import datetime
 from typing import Annotated, List
 
-from fastapi import APIRouter, Query, Request, Security, status
-from pydantic import BaseModel
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
 from pydantic_extra_types import mongo_object_id
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar import icarTypes
 from ..icar.icarResources import icarDeviceResource as Device
 from ..users import User, get_current_active_user
@@ -41,7 +57,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Device"
 
 
-class DeviceCollection(BaseModel):
+class DeviceCollection(FTCollection):
     devices: List[Device]
 
 
@@ -69,6 +85,27 @@ async def create_device(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new devices in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_device_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_devices"])
+    ],
+):
+    """
+    Create new devices in bulk.
+
+    :param items: New devices to be added
+    """
+    return await add_many_to_db(Device, items, request.app.state.devices)
+
+
 @router.patch(
     "/{ft}",
     response_description="Update a device",
@@ -94,6 +131,62 @@ async def update_device(
     )
 
 
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace device by source",
+    response_model=Device,
+    response_model_by_alias=False,
+)
+async def upsert_device(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    device: Device,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_devices"])
+    ],
+):
+    """
+    Add a device, or replace the one with the same source and sourceId.
+
+    :param source: Source of the device
+    :param sourceId: ID of the device in its source
+    :param device: Device to add or replace
+    """
+    return await upsert_one_by_source(
+        device,
+        request.app.state.devices,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace devices in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_device_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_devices"])
+    ],
+):
+    """
+    Add devices in bulk, replacing any with the same source and sourceId.
+
+    :param items: Devices to add or replace
+    """
+    return await upsert_many_by_source(
+        Device, items, request.app.state.devices
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a device")
 async def remove_device(
     request: Request,
@@ -112,6 +205,33 @@ async def remove_device(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to devices",
+    response_model=ChangeCollection,
+)
+async def device_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_devices"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List devices added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.devices], feed)
+
+
+INDEXES = declare_indexes(
+    "devices",
+    *meta_indexes(modified=True),
+    index("serial", "manufacturer", unique=True, serves=["serial"]),
+    index("id", serves=["id"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for devices",
@@ -123,6 +243,7 @@ async def device_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_devices"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     id: str | None = None,
     serial: str | None = None,
@@ -159,5 +280,10 @@ async def device_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.devices, query)
-    return DeviceCollection(devices=result)
+    return await query_collection(
+        request,
+        request.app.state.devices,
+        query,
+        page,
+        "devices",
+    )
@@ -8,18 +8,26 @@ and finding of embryos.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar.icarResources import icarReproEmbryoResource as Embryo
 from ..users import User, get_current_active_user
 
@@ -32,7 +40,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Embryo"
 
 
-class EmbryoCollection(BaseModel):
+class EmbryoCollection(FTCollection):
     embryo: List[Embryo]
 
 
@@ -60,6 +68,81 @@ async def create_embryo(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new embryos in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_embryo_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_embryo"])
+    ],
+):
+    """
+    Create new embryos in bulk.
+
+    :param items: New embryos to be added
+    """
+    return await add_many_to_db(Embryo, items, request.app.state.embryo)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace embryo by source",
+    response_model=Embryo,
+    response_model_by_alias=False,
+)
+async def upsert_embryo(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    embryo: Embryo,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_embryo"])
+    ],
+):
+    """
+    Add an embryo, or replace the one with the same source and sourceId.
+
+    :param source: Source of the embryo
+    :param sourceId: ID of the embryo in its source
+    :param embryo: Embryo to add or replace
+    """
+    return await upsert_one_by_source(
+        embryo,
+        request.app.state.embryo,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace embryos in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_embryo_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_embryo"])
+    ],
+):
+    """
+    Add embryos in bulk, replacing any with the same source and sourceId.
+
+    :param items: Embryos to add or replace
+    """
+    return await upsert_many_by_source(Embryo, items, request.app.state.embryo)
+
+
 @router.delete("/{ft}", response_description="Delete an embryo")
 async def remove_embryo(
     request: Request,
@@ -103,6 +186,32 @@ async def update_embryo(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to embryos",
+    response_model=ChangeCollection,
+)
+async def embryo_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_embryo"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List embryos added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.embryo], feed)
+
+
+INDEXES = declare_indexes(
+    "embryo",
+    *meta_indexes(modified=True),
+    index("id", serves=["id"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for an embryo",
@@ -114,6 +223,7 @@ async def embryo_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_embryo"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     id: str | None = None,
     name: str | None = None,
@@ -144,5 +254,10 @@ async def embryo_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.embryo, query)
-    return EmbryoCollection(embryo=result)
+    return await query_collection(
+        request,
+        request.app.state.embryo,
+        query,
+        page,
+        "embryo",
+    )
@@ -8,18 +8,26 @@ and finding of feeds.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar import icarEnums
 from ..icar.icarResources import icarFeedResource as Feed
 from ..users import User, get_current_active_user
@@ -33,7 +41,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Feed"
 
 
-class FeedCollection(BaseModel):
+class FeedCollection(FTCollection):
     feed: List[Feed]
 
 
@@ -59,6 +67,81 @@ async def create_feed(
     return await add_one_to_db(feed, request.app.state.feed, ERROR_MSG_OBJECT)
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new feeds in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_feed_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feed"])
+    ],
+):
+    """
+    Create new feeds in bulk.
+
+    :param items: New feeds to be added
+    """
+    return await add_many_to_db(Feed, items, request.app.state.feed)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace feed by source",
+    response_model=Feed,
+    response_model_by_alias=False,
+)
+async def upsert_feed(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    feed: Feed,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feed"])
+    ],
+):
+    """
+    Add a feed, or replace the one with the same source and sourceId.
+
+    :param source: Source of the feed
+    :param sourceId: ID of the feed in its source
+    :param feed: Feed to add or replace
+    """
+    return await upsert_one_by_source(
+        feed,
+        request.app.state.feed,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace feeds in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_feed_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feed"])
+    ],
+):
+    """
+    Add feeds in bulk, replacing any with the same source and sourceId.
+
+    :param items: Feeds to add or replace
+    """
+    return await upsert_many_by_source(Feed, items, request.app.state.feed)
+
+
 @router.delete("/{ft}", response_description="Delete a feed")
 async def remove_feed(
     request: Request,
@@ -102,6 +185,32 @@ async def update_feed(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to feed",
+    response_model=ChangeCollection,
+)
+async def feed_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_feed"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List feed added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.feed], feed)
+
+
+INDEXES = declare_indexes(
+    "feed",
+    *meta_indexes(modified=True),
+    index("id", serves=["id"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for feed",
@@ -113,6 +222,7 @@ async def feed_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_feed"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     id: str | None = None,
     category: icarEnums.icarFeedCategoryType | None = None,
@@ -139,5 +249,6 @@ async def feed_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.feed, query)
-    return FeedCollection(feed=result)
+    return await query_collection(
+        request, request.app.state.feed, query, page, "feed"
+    )
@@ -8,18 +8,26 @@ and finding of feed storages.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar.icarResources import icarFeedStorageResource as FeedStorage
 from ..users import User, get_current_active_user
 
@@ -32,7 +40,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Feed Storage"
 
 
-class FeedStorageCollection(BaseModel):
+class FeedStorageCollection(FTCollection):
     feed_storage: List[FeedStorage]
 
 
@@ -60,6 +68,85 @@ async def create_feed_storage(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new feed storages in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_feed_storage_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feed_storage"])
+    ],
+):
+    """
+    Create new feed storages in bulk.
+
+    :param items: New feed storages to be added
+    """
+    return await add_many_to_db(
+        FeedStorage, items, request.app.state.feed_storage
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace feed storage by source",
+    response_model=FeedStorage,
+    response_model_by_alias=False,
+)
+async def upsert_feed_storage(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    feed_storage: FeedStorage,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feed_storage"])
+    ],
+):
+    """
+    Add a feed storage, or replace the one with the same source and sourceId.
+
+    :param source: Source of the feed storage
+    :param sourceId: ID of the feed storage in its source
+    :param feed_storage: Feed storage to add or replace
+    """
+    return await upsert_one_by_source(
+        feed_storage,
+        request.app.state.feed_storage,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace feed storages in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_feed_storage_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_feed_storage"])
+    ],
+):
+    """
+    Add feed storages in bulk, replacing any with the same source and sourceId.
+
+    :param items: Feed storages to add or replace
+    """
+    return await upsert_many_by_source(
+        FeedStorage, items, request.app.state.feed_storage
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a feed storage")
 async def remove_feed_storage(
     request: Request,
@@ -103,6 +190,34 @@ async def update_feed_storage(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to feed storage",
+    response_model=ChangeCollection,
+)
+async def feed_storage_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_feed_storage"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List feed storage added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.feed_storage], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "feed_storage",
+    *meta_indexes(modified=True),
+    index("id", serves=["id"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for feed_storage",
@@ -114,6 +229,7 @@ async def feed_storage_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_feed_storage"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     id: str | None = None,
     serial: str | None = None,
@@ -146,5 +262,10 @@ async def feed_storage_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.feed_storage, query)
-    return FeedStorageCollection(feed_storage=result)
+    return await query_collection(
+        request,
+        request.app.state.feed_storage,
+        query,
+        page,
+        "feed_storage",
+    )
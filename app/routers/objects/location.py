@@ -8,18 +8,34 @@ and finding of locations.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Query, Request, Security, status
-from pydantic import BaseModel
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar import icarTypes
 from ..icar.icarResources import icarLocationResource as Location
 from ..users import User, get_current_active_user
@@ -33,7 +49,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Location"
 
 
-class LocationCollection(BaseModel):
+class LocationCollection(FTCollection):
     location: List[Location]
 
 
@@ -61,6 +77,83 @@ async def create_location(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new locations in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_location_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_location"])
+    ],
+):
+    """
+    Create new locations in bulk.
+
+    :param items: New locations to be added
+    """
+    return await add_many_to_db(Location, items, request.app.state.location)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace location by source",
+    response_model=Location,
+    response_model_by_alias=False,
+)
+async def upsert_location(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    location: Location,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_location"])
+    ],
+):
+    """
+    Add a location, or replace the one with the same source and sourceId.
+
+    :param source: Source of the location
+    :param sourceId: ID of the location in its source
+    :param location: Location to add or replace
+    """
+    return await upsert_one_by_source(
+        location,
+        request.app.state.location,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace locations in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_location_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_location"])
+    ],
+):
+    """
+    Add locations in bulk, replacing any with the same source and sourceId.
+
+    :param items: Locations to add or replace
+    """
+    return await upsert_many_by_source(
+        Location, items, request.app.state.location
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a location")
 async def remove_location(
     request: Request,
@@ -104,6 +197,32 @@ async def update_location(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to location",
+    response_model=ChangeCollection,
+)
+async def location_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_location"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List location added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.location], feed)
+
+
+INDEXES = declare_indexes(
+    "location",
+    *meta_indexes(modified=True),
+    index("identifier", serves=["identifier"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for location",
@@ -115,6 +234,7 @@ async def location_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_location"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     identifier: icarTypes.icarAnimalIdentifierType | None = None,
     alternativeIdentifiers: Annotated[list[str] | None, Query()] = [],
@@ -139,5 +259,10 @@ async def location_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.location, query)
-    return LocationCollection(location=result)
+    return await query_collection(
+        request,
+        request.app.state.location,
+        query,
+        page,
+        "location",
+    )
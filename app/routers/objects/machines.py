@@ -14,19 +14,33 @@ and finding of those machines.
 from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Query, Request, Security, status
-from pydantic import BaseModel, Field
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    Security,
+    status,
+)
+from pydantic import Field
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
     FTModel,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
 )
+from ..ftIndexes import declare_indexes, meta_indexes
 from ..users import User, get_current_active_user
 
 router = APIRouter(
@@ -66,7 +80,7 @@ class Machine(FTModel):
     )
 
 
-class MachineCollection(BaseModel):
+class MachineCollection(FTCollection):
     machines: List[Machine]
 
 
@@ -94,6 +108,27 @@ async def create_machine(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new machines in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_machine_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_machines"])
+    ],
+):
+    """
+    Create new machines in bulk.
+
+    :param items: New machines to be added
+    """
+    return await add_many_to_db(Machine, items, request.app.state.machines)
+
+
 @router.delete("/{ft}", response_description="Delete a machine")
 async def remove_machine(
     request: Request,
@@ -137,6 +172,31 @@ async def update_machine(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to machines",
+    response_model=ChangeCollection,
+)
+async def machine_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_machines"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List machines added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.machines], feed)
+
+
+INDEXES = declare_indexes(
+    "machines",
+    *meta_indexes(modified=True, upserts=False),
+)
+
+
 @router.get(
     "/",
     response_description="Search for machines",
@@ -148,6 +208,7 @@ async def machine_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_machines"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     manufacturer: str | None = None,
     model: str | None = None,
@@ -181,5 +242,10 @@ async def machine_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.machines, query)
-    return MachineCollection(machines=result)
+    return await query_collection(
+        request,
+        request.app.state.machines,
+        query,
+        page,
+        "machines",
+    )
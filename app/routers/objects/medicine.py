@@ -8,18 +8,26 @@ and finding of medicines.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar.icarResources import icarMedicineResource as Medicine
 from ..users import User, get_current_active_user
 
@@ -32,7 +40,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Medicine"
 
 
-class MedicineCollection(BaseModel):
+class MedicineCollection(FTCollection):
     medicine: List[Medicine]
 
 
@@ -60,6 +68,83 @@ async def create_medicine(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new medicines in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_medicine_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_medicine"])
+    ],
+):
+    """
+    Create new medicines in bulk.
+
+    :param items: New medicines to be added
+    """
+    return await add_many_to_db(Medicine, items, request.app.state.medicine)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace medicine by source",
+    response_model=Medicine,
+    response_model_by_alias=False,
+)
+async def upsert_medicine(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    medicine: Medicine,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_medicine"])
+    ],
+):
+    """
+    Add a medicine, or replace the one with the same source and sourceId.
+
+    :param source: Source of the medicine
+    :param sourceId: ID of the medicine in its source
+    :param medicine: Medicine to add or replace
+    """
+    return await upsert_one_by_source(
+        medicine,
+        request.app.state.medicine,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace medicines in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_medicine_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_medicine"])
+    ],
+):
+    """
+    Add medicines in bulk, replacing any with the same source and sourceId.
+
+    :param items: Medicines to add or replace
+    """
+    return await upsert_many_by_source(
+        Medicine, items, request.app.state.medicine
+    )
+
+
 @router.delete("/{ft}", response_description="Delete a medicine")
 async def remove_medicine(
     request: Request,
@@ -103,6 +188,32 @@ async def update_medicine(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to medicine",
+    response_model=ChangeCollection,
+)
+async def medicine_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_medicine"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List medicine added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.medicine], feed)
+
+
+INDEXES = declare_indexes(
+    "medicine",
+    *meta_indexes(modified=True),
+    index("name", serves=["name"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for medicine",
@@ -114,6 +225,7 @@ async def medicine_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_medicine"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     name: str | None = None,
     approved: str | None = None,
@@ -136,5 +248,10 @@ async def medicine_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.medicine, query)
-    return MedicineCollection(medicine=result)
+    return await query_collection(
+        request,
+        request.app.state.medicine,
+        query,
+        page,
+        "medicine",
+    )
@@ -27,7 +27,14 @@ from pydantic import BaseModel, Field
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
-from ..ftCommon import add_one_to_db, delete_one_from_db
+from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    add_many_to_db,
+    add_one_to_db,
+    delete_one_from_db,
+)
+from ..ftIndexes import declare_indexes, index
 from ..users import User, get_current_active_user
 
 router = APIRouter(
@@ -80,6 +87,27 @@ async def create_point(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new points in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_point_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_points"])
+    ],
+):
+    """
+    Create new points in bulk.
+
+    :param items: New points to be added
+    """
+    return await add_many_to_db(Point, items, request.app.state.points)
+
+
 @router.delete("/{id}", response_description="Delete a point")
 async def remove_point(
     request: Request,
@@ -98,6 +126,13 @@ async def remove_point(
     )
 
 
+INDEXES = declare_indexes(
+    "points",
+    index(("point", "2dsphere"), unique=True),
+    index("tags", serves=["tag"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for points",
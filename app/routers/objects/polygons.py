@@ -29,7 +29,14 @@ from pydantic import BaseModel, Field
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
-from ..ftCommon import add_one_to_db, delete_one_from_db
+from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    add_many_to_db,
+    add_one_to_db,
+    delete_one_from_db,
+)
+from ..ftIndexes import declare_indexes, index
 from ..users import User, get_current_active_user
 
 router = APIRouter(
@@ -82,6 +89,27 @@ async def create_polygon(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new polygons in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_polygon_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_polygons"])
+    ],
+):
+    """
+    Create new polygons in bulk.
+
+    :param items: New polygons to be added
+    """
+    return await add_many_to_db(Polygon, items, request.app.state.polygons)
+
+
 @router.delete("/{id}", response_description="Delete a polygon")
 async def remove_polygon(
     request: Request,
@@ -100,6 +128,13 @@ async def remove_polygon(
     )
 
 
+INDEXES = declare_indexes(
+    "polygons",
+    index("polygon", unique=True),
+    index("tags", serves=["tag"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for polygon",
@@ -8,18 +8,26 @@ and finding of rations.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar.icarResources import icarRationResource as Ration
 from ..users import User, get_current_active_user
 
@@ -32,7 +40,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Ration"
 
 
-class RationCollection(BaseModel):
+class RationCollection(FTCollection):
     ration: List[Ration]
 
 
@@ -60,6 +68,81 @@ async def create_ration(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new rations in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_ration_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_ration"])
+    ],
+):
+    """
+    Create new rations in bulk.
+
+    :param items: New rations to be added
+    """
+    return await add_many_to_db(Ration, items, request.app.state.ration)
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace ration by source",
+    response_model=Ration,
+    response_model_by_alias=False,
+)
+async def upsert_ration(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    ration: Ration,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_ration"])
+    ],
+):
+    """
+    Add a ration, or replace the one with the same source and sourceId.
+
+    :param source: Source of the ration
+    :param sourceId: ID of the ration in its source
+    :param ration: Ration to add or replace
+    """
+    return await upsert_one_by_source(
+        ration,
+        request.app.state.ration,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace rations in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_ration_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_ration"])
+    ],
+):
+    """
+    Add rations in bulk, replacing any with the same source and sourceId.
+
+    :param items: Rations to add or replace
+    """
+    return await upsert_many_by_source(Ration, items, request.app.state.ration)
+
+
 @router.delete("/{ft}", response_description="Delete a ration")
 async def remove_ration(
     request: Request,
@@ -103,6 +186,32 @@ async def update_ration(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to ration",
+    response_model=ChangeCollection,
+)
+async def ration_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_ration"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List ration added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(request, [request.app.state.ration], feed)
+
+
+INDEXES = declare_indexes(
+    "ration",
+    *meta_indexes(modified=True),
+    index("id", serves=["id"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for ration",
@@ -114,6 +223,7 @@ async def ration_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_ration"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     id: str | None = None,
     name: str | None = None,
@@ -136,5 +246,10 @@ async def ration_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.ration, query)
-    return RationCollection(ration=result)
+    return await query_collection(
+        request,
+        request.app.state.ration,
+        query,
+        page,
+        "ration",
+    )
@@ -8,18 +8,26 @@ and finding of semen straws.
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Request, Security, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, Response, Security, status
 from pydantic_extra_types import mongo_object_id
 from typing_extensions import Annotated
 
+from ..ftChanges import ChangeCollection, ChangeFeed, changes_response
 from ..ftCommon import (
+    BulkItems,
+    BulkOutcomeCollection,
+    FTCollection,
+    Page,
+    add_many_to_db,
     add_one_to_db,
     dateBuild,
     delete_one_from_db,
-    find_in_db,
+    query_collection,
     update_one_in_db,
+    upsert_many_by_source,
+    upsert_one_by_source,
 )
+from ..ftIndexes import declare_indexes, index, meta_indexes
 from ..icar import icarEnums
 from ..icar.icarResources import icarReproSemenStrawResource as SemenStraw
 from ..users import User, get_current_active_user
@@ -33,7 +41,7 @@ router = APIRouter(
 ERROR_MSG_OBJECT = "Semen Straw"
 
 
-class SemenStrawCollection(BaseModel):
+class SemenStrawCollection(FTCollection):
     semen_straw: List[SemenStraw]
 
 
@@ -61,6 +69,85 @@ async def create_semen_straw(
     )
 
 
+@router.post(
+    "/bulk",
+    response_description="Add new semen straws in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def create_semen_straw_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_semen_straw"])
+    ],
+):
+    """
+    Create new semen straws in bulk.
+
+    :param items: New semen straws to be added
+    """
+    return await add_many_to_db(
+        SemenStraw, items, request.app.state.semen_straw
+    )
+
+
+@router.put(
+    "/by-source/{source}/{sourceId}",
+    response_description="Add or replace semen straw by source",
+    response_model=SemenStraw,
+    response_model_by_alias=False,
+)
+async def upsert_semen_straw(
+    request: Request,
+    response: Response,
+    source: str,
+    sourceId: str,
+    semen_straw: SemenStraw,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_semen_straw"])
+    ],
+):
+    """
+    Add a semen straw, or replace the one with the same source and sourceId.
+
+    :param source: Source of the semen straw
+    :param sourceId: ID of the semen straw in its source
+    :param semen_straw: Semen straw to add or replace
+    """
+    return await upsert_one_by_source(
+        semen_straw,
+        request.app.state.semen_straw,
+        source,
+        sourceId,
+        response,
+        ERROR_MSG_OBJECT,
+    )
+
+
+@router.put(
+    "/by-source/bulk",
+    response_description="Add or replace semen straws in bulk",
+    response_model=BulkOutcomeCollection,
+    response_model_by_alias=False,
+)
+async def upsert_semen_straw_bulk(
+    request: Request,
+    items: BulkItems,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["write_semen_straw"])
+    ],
+):
+    """
+    Add semen straws in bulk, replacing any with the same source and sourceId.
+
+    :param items: Semen straws to add or replace
+    """
+    return await upsert_many_by_source(
+        SemenStraw, items, request.app.state.semen_straw
+    )
+
+
 @router.delete("/{ft}", response_description="Delete an semen straw")
 async def remove_semen_straw(
     request: Request,
@@ -104,6 +191,34 @@ async def update_semen_straw(
     )
 
 
+@router.get(
+    "/changes",
+    response_description="List changes to semen straws",
+    response_model=ChangeCollection,
+)
+async def semen_straw_changes(
+    request: Request,
+    current_user: Annotated[
+        User, Security(get_current_active_user, scopes=["read_semen_straw"])
+    ],
+    feed: Annotated[ChangeFeed, Depends()],
+):
+    """
+    List semen straws added, updated or deleted since a token or time, in the
+    order they were changed.
+    """
+    return await changes_response(
+        request, [request.app.state.semen_straw], feed
+    )
+
+
+INDEXES = declare_indexes(
+    "semen_straw",
+    *meta_indexes(modified=True),
+    index("id", serves=["id"]),
+)
+
+
 @router.get(
     "/",
     response_description="Search for an semen straw",
@@ -115,6 +230,7 @@ async def semen_straw_query(
     current_user: Annotated[
         User, Security(get_current_active_user, scopes=["read_semen_straw"])
     ],
+    page: Annotated[Page, Depends()],
     ft: mongo_object_id.MongoObjectId | None = None,
     id: str | None = None,
     batch: str | None = None,
@@ -151,5 +267,10 @@ async def semen_straw_query(
         "meta.source": source,
         "meta.sourceId": sourceId,
     }
-    result = await find_in_db(request.app.state.semen_straw, query)
-    return SemenStrawCollection(semen_straw=result)
+    return await query_collection(
+        request,
+        request.app.state.semen_straw,
+        query,
+        page,
+        "semen_straw",
+    )
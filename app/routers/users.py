@@ -21,6 +21,8 @@ from fastapi.security import (
 from pwdlib import PasswordHash
 from pydantic import BaseModel, Field, ValidationError
 
+from .ftIndexes import declare_indexes, index
+
 router = APIRouter(
     tags=["users"],
     prefix="/users",
@@ -118,6 +120,7 @@ SCOPES = {
     "write_measurements": "Write info about sensor objects and sample events.",
     "read_imagery": "Read info about imagery.",
     "write_imagery": "Write info about imagery.",
+    "read_changes": "Read changes across all collections.",
 }
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token", scopes=SCOPES)
@@ -140,6 +143,11 @@ def get_password_hash(password):
     return password_hash.hash(password)
 
 
+INDEXES = declare_indexes(
+    "users", index("username", unique=True, serves=["username"])
+)
+
+
 async def get_user(db, username: str):
     """Fetch a user from the database."""
     user = await db.find_one({"username": username})
@@ -0,0 +1,117 @@
+"""
+Benchmark sample ingest rates.
+
+Compares adding samples through the bulk endpoint's helper, which
+validates each item as a Sample, with the batch endpoint's path, where a
+packed binary batch from one sensor is validated as whole arrays and
+written in one unordered insert.
+
+Requires a running MongoDB, configured with the same .env settings as the
+API:
+
+    python -m benchmarks.batch_ingest --samples 100000
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from bson.objectid import ObjectId
+
+from app.routers.ftCommon import (
+    MAX_BULK_ITEMS,
+    add_batch_to_db,
+    add_many_to_db,
+)
+from app.routers.measurements.samples import (
+    MAX_BATCH_SAMPLES,
+    Sample,
+    batchDocuments,
+    unpackBatch,
+    validateBatch,
+)
+
+from .common import BENCHMARK_DB, open_db
+
+START = 1735689600000
+
+
+def packed(count: int, offset: int) -> bytes:
+    """A binary batch of samples one second apart."""
+    timestamps = np.arange(count, dtype="<i8") * 1000 + START + offset
+    values = np.random.default_rng().uniform(-10, 30, count)
+    return timestamps.tobytes() + values.astype("<f8").tobytes()
+
+
+def bulk_requests(sensor, count: int) -> list:
+    """Bodies of bulk requests, each a list of samples as JSON items."""
+    requests = []
+    for offset in range(0, count, MAX_BULK_ITEMS):
+        timestamps, values = unpackBatch(
+            packed(min(MAX_BULK_ITEMS, count - offset), offset * 1000)
+        )
+        requests.append(
+            [
+                {
+                    "sensor": str(sensor),
+                    "timestamp": str(np.datetime64(int(t), "ms")),
+                    "value": float(v),
+                }
+                for t, v in zip(timestamps, values)
+            ]
+        )
+    return requests
+
+
+def batch_requests(sensor, count: int) -> list:
+    """Bodies of binary batch requests."""
+    return [
+        packed(min(MAX_BATCH_SAMPLES, count - offset), offset * 1000)
+        for offset in range(0, count, MAX_BATCH_SAMPLES)
+    ]
+
+
+async def bulk(db, sensor, requests: list):
+    """Validate each item as a Sample and insert through the bulk path."""
+    for items in requests:
+        await add_many_to_db(Sample, items, db)
+
+
+async def batch(db, sensor, requests: list):
+    """Validate whole arrays and insert through the batch path."""
+    for body in requests:
+        timestamps, values = unpackBatch(body)
+        validateBatch(timestamps, values)
+        await add_batch_to_db(
+            db, batchDocuments(sensor, False, timestamps, values)
+        )
+
+
+async def main(count: int):
+    client = open_db()
+    try:
+        db = client[BENCHMARK_DB]["samples"]
+        for name, prepare, ingest in (
+            ("bulk", bulk_requests, bulk),
+            ("batch", batch_requests, batch),
+        ):
+            await db.drop()
+            sensor = ObjectId()
+            requests = prepare(sensor, count)
+            start = time.perf_counter()
+            await ingest(db, sensor, requests)
+            duration = time.perf_counter() - start
+            print(
+                f"{name:<8} {count} samples in {duration:8.3f}s"
+                f" ({count / duration:10.0f} samples/s)"
+            )
+    finally:
+        await client.drop_database(BENCHMARK_DB)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--samples", type=int, default=100000)
+    asyncio.run(main(parser.parse_args().samples))
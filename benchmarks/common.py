@@ -0,0 +1,38 @@
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from pymongo import AsyncMongoClient
+
+load_dotenv()
+DB_USER = os.getenv("MONGO_INITDB_ROOT_USERNAME")
+DB_PASS = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
+DB_HOST = os.getenv("MONGO_HOST")
+DB_PORT = os.getenv("MONGO_PORT")
+DB_URL = f"mongodb://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}"
+
+BENCHMARK_DB = "farm-twin-benchmark"
+
+
+def open_db() -> AsyncMongoClient:
+    """Connect to the benchmark database, separate from farm-twin data."""
+    return AsyncMongoClient(DB_URL)
+
+
+async def timed(coroutine):
+    """Await a coroutine, returning its result and duration in ms."""
+    start = time.perf_counter()
+    result = await coroutine
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarise(name: str, durations: list[float]) -> str:
+    """Summarise a list of durations (ms) as a single report line."""
+    p95 = statistics.quantiles(durations, n=20)[-1]
+    return (
+        f"{name:<40} n={len(durations):<6}"
+        f" median={statistics.median(durations):8.3f}ms"
+        f" p95={p95:8.3f}ms"
+        f" total={sum(durations):10.1f}ms"
+    )
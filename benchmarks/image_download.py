@@ -0,0 +1,114 @@
+"""
+Benchmark the memory held while downloading large images.
+
+A large file is uploaded to GridFS, then downloaded by reading it whole,
+as downloads once were, and by streaming it a chunk at a time, both whole
+and from half way through, as a resumed download would be. For each, the
+resident memory of the process is sampled as the file is sent, and the
+rise above the memory held before the download is reported, along with
+the rate it was sent at. Streamed downloads should stay flat whatever the
+size of the file.
+
+Requires a running MongoDB, configured with the same .env settings as the
+API, on Linux, where resident memory is read from /proc:
+
+    python -m benchmarks.image_download --size 500
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import time
+
+import gridfs
+from starlette.requests import Request
+
+from app.routers.ftGridFS import download_response
+
+from .common import BENCHMARK_DB, open_db
+
+MB = 1024 * 1024
+PAGE = os.sysconf("SC_PAGE_SIZE")
+
+
+def rss() -> int:
+    """Resident memory of the process in bytes."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE
+
+
+def request(headers: dict) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (k.lower().encode(), v.encode()) for k, v in headers.items()
+            ],
+        }
+    )
+
+
+async def upload(bucket, size: int):
+    """Upload a file of a size in MB, written a MB at a time."""
+    block = os.urandom(MB)
+    async with bucket.open_upload_stream(
+        "benchmark.bin", metadata={"contentType": "application/octet-stream"}
+    ) as grid_in:
+        for _ in range(size):
+            await grid_in.write(block)
+    return grid_in._id
+
+
+async def buffered(bucket, ft):
+    """Read the file whole before sending it, in one piece."""
+    file = await bucket.open_download_stream(ft)
+    contents = await file.read()
+    yield contents
+
+
+async def streamed(bucket, ft, headers: dict):
+    """Send the file as the API does, a chunk at a time."""
+    file = await bucket.open_download_stream(ft)
+    response = await download_response(request(headers), file, {})
+    async for chunk in response.body_iterator:
+        yield chunk
+
+
+async def measure(name: str, body):
+    gc.collect()
+    baseline = peak = rss()
+    sent, start = 0, time.perf_counter()
+    async for chunk in body:
+        sent += len(chunk)
+        peak = max(peak, rss())
+        del chunk
+    duration = time.perf_counter() - start
+    print(
+        f"{name:<10} {sent / MB:8.1f}MB in {duration:7.2f}s"
+        f" ({sent / MB / duration:8.1f}MB/s)"
+        f" rss +{(peak - baseline) / MB:8.1f}MB"
+    )
+
+
+async def main(size: int):
+    client = open_db()
+    try:
+        bucket = gridfs.AsyncGridFSBucket(client[BENCHMARK_DB])
+        ft = await upload(bucket, size)
+        half = {"Range": f"bytes={size * MB // 2}-"}
+        # Streamed first, as memory freed is not always returned to the OS
+        await measure("streamed", streamed(bucket, ft, {}))
+        await measure("resumed", streamed(bucket, ft, half))
+        await measure("buffered", buffered(bucket, ft))
+    finally:
+        await client.drop_database(BENCHMARK_DB)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--size", type=int, default=500, help="Size of the file in MB"
+    )
+    asyncio.run(main(parser.parse_args().size))
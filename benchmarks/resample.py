@@ -0,0 +1,126 @@
+"""
+Benchmark resampling sensors onto a common grid.
+
+Many sensors, each sampling about once a minute with jitter so that no two
+share timestamps, are resampled onto a grid by each method. The samples
+within each step are reduced to their first and last in the database
+before being resampled, which is compared with reading every sample of
+the range.
+
+Requires a running MongoDB, configured with the same .env settings as the
+API:
+
+    python -m benchmarks.resample --sensors 50 --days 30 --step 15m
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pymongo
+from bson.objectid import ObjectId
+
+from app.routers.ftCommon import add_batch_to_db
+from app.routers.ftRollups import millis
+from app.routers.ftSampling import resample
+from app.routers.measurements.samples import (
+    MAX_BATCH_SAMPLES,
+    batchDocuments,
+    parseStep,
+    resampleSensors,
+)
+
+from .common import BENCHMARK_DB, open_db
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+METHODS = ("nearest", "linear", "ffill")
+
+
+async def ingest(db, sensors: list, days: int):
+    """Add samples about a minute apart from each sensor."""
+    rng = np.random.default_rng()
+    count = days * 24 * 60
+    for sensor in sensors:
+        jitter = rng.integers(-20000, 20000, count)
+        timestamps = millis(START) + np.arange(count) * 60000 + jitter
+        values = np.cumsum(rng.normal(0, 0.1, count)) + 15
+        for offset in range(0, count, MAX_BATCH_SAMPLES):
+            part = slice(offset, offset + MAX_BATCH_SAMPLES)
+            await add_batch_to_db(
+                db,
+                batchDocuments(sensor, False, timestamps[part], values[part]),
+            )
+    return count * len(sensors)
+
+
+async def raw(
+    db, sensors: list, predicted, start, end, step, tolerance, method
+):
+    """Read every sample of each sensor and resample them in the API."""
+    grid = np.arange(millis(start), millis(end) + 1, step)
+    grid = grid.astype("datetime64[ms]")
+    window = np.timedelta64(tolerance, "ms")
+
+    async def series(sensor):
+        query = {
+            "sensor": sensor,
+            "predicted": predicted,
+            "timestamp": {
+                "$gte": start - window.item(),
+                "$lte": end + window.item(),
+            },
+        }
+        cursor = db.find(query, {"_id": 0, "timestamp": 1, "value": 1})
+        documents = await cursor.sort("timestamp", 1).to_list()
+        times = np.array(
+            [d["timestamp"] for d in documents], dtype="datetime64[ms]"
+        )
+        values = np.array([d["value"] for d in documents], dtype=np.float64)
+        return times, values
+
+    rows = await asyncio.gather(*(series(s) for s in sensors))
+    return grid, np.vstack(
+        [resample(t, v, grid, method, window) for t, v in rows]
+    )
+
+
+async def main(count: int, days: int, width: str):
+    client = open_db()
+    try:
+        db = client[BENCHMARK_DB]["samples"]
+        await db.drop()
+        await db.create_index(
+            [("sensor", pymongo.ASCENDING), ("timestamp", pymongo.ASCENDING)]
+        )
+        sensors = [ObjectId() for _ in range(count)]
+        start = time.perf_counter()
+        total = await ingest(db, sensors, days)
+        print(f"Added {total} samples in {time.perf_counter() - start:.1f}s")
+        step = parseStep(width)
+        end = START + timedelta(days=days)
+        for method in METHODS:
+            for name, read in (("stepped", resampleSensors), ("raw", raw)):
+                start = time.perf_counter()
+                grid, values = await read(
+                    db, sensors, False, START, end, step, step, method
+                )
+                duration = time.perf_counter() - start
+                print(
+                    f"{method:<8} {name:<8} {values.size} values"
+                    f" ({len(grid)} times) in {duration:8.3f}s"
+                    f" ({np.isnan(values).sum()} missing)"
+                )
+    finally:
+        await client.drop_database(BENCHMARK_DB)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sensors", type=int, default=50)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--step", default="15m")
+    args = parser.parse_args()
+    asyncio.run(main(args.sensors, args.days, args.step))
@@ -0,0 +1,140 @@
+"""
+Benchmark sample storage in ordinary and time-series collections.
+
+Samples are written, one per sensor per second, through the bulk helper
+the API uses into an ordinary collection with the samples indexes and
+into a time-series collection with the layout set in .env. For each, the
+ingest rate, the size of the stored data and indexes, and the latency of
+one hour range queries for a single sensor are reported.
+
+Requires a running MongoDB, configured with the same .env settings as the
+API:
+
+    python -m benchmarks.samples_storage --sensors 10 --hours 6
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+
+from app.routers.ftCommon import (
+    MAX_PAGE_LIMIT,
+    Page,
+    add_many_to_db,
+    dateBuild,
+    find_in_db,
+)
+from app.routers.ftSeries import SAMPLES, SeriesCollection
+from app.routers.measurements.samples import Sample, sample_indexes
+
+from .common import BENCHMARK_DB, open_db, summarise, timed
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+async def open_ordinary(database):
+    db = database["samples"]
+    await db.create_indexes([i.model() for i in sample_indexes(False)])
+    return db
+
+
+async def open_timeseries(database):
+    await database.create_collection(
+        "samples_timeseries", timeseries=SAMPLES.options()
+    )
+    db = database["samples_timeseries"]
+    await db.create_indexes([i.model() for i in sample_indexes(True)])
+    return SeriesCollection(db, SAMPLES)
+
+
+def samples(sensors: list, seconds: int):
+    """Samples in order of time, one from each sensor every second."""
+    for second in range(seconds):
+        timestamp = START + timedelta(seconds=second)
+        for sensor in sensors:
+            yield {
+                "sensor": str(sensor),
+                "timestamp": timestamp.isoformat(),
+                "value": random.uniform(-10, 30),
+                "predicted": False,
+            }
+
+
+async def ingest(db, sensors: list, seconds: int, batch: int) -> float:
+    """Write every sample in bulk, returning the samples written per s."""
+    items, written = [], 0
+    start = time.perf_counter()
+    for item in samples(sensors, seconds):
+        items.append(item)
+        if len(items) == batch:
+            await add_many_to_db(Sample, items, db)
+            written, items = written + len(items), []
+    if items:
+        await add_many_to_db(Sample, items, db)
+        written += len(items)
+    return written / (time.perf_counter() - start)
+
+
+async def storage(collection) -> dict:
+    """Storage statistics of a collection, or the buckets of a series."""
+    pipeline = [{"$collStats": {"storageStats": {}}}]
+    cursor = await collection.aggregate(pipeline)
+    stats = (await cursor.to_list(1))[0]["storageStats"]
+    return {k: stats.get(k, 0) for k in ("storageSize", "totalIndexSize")}
+
+
+async def range_queries(db, sensors: list, seconds: int, queries: int):
+    """Durations of one hour range queries for random sensors."""
+    durations = []
+    for _ in range(queries):
+        start = START + timedelta(seconds=random.randrange(seconds - 3600))
+        query = {
+            "sensor": random.choice(sensors),
+            "predicted": False,
+            "timestamp": dateBuild(start, start + timedelta(hours=1)),
+        }
+        _, duration = await timed(
+            find_in_db(db, query, Page(limit=MAX_PAGE_LIMIT))
+        )
+        durations.append(duration)
+    return durations
+
+
+async def main(sensors: int, hours: int, batch: int, queries: int):
+    client = open_db()
+    ids = [ObjectId() for _ in range(sensors)]
+    seconds = hours * 3600
+    try:
+        database = client[BENCHMARK_DB]
+        for name, opener in (
+            ("ordinary", open_ordinary),
+            ("timeseries", open_timeseries),
+        ):
+            db = await opener(database)
+            rate = await ingest(db, ids, seconds, batch)
+            raw = db.collection if isinstance(db, SeriesCollection) else db
+            sizes = await storage(raw)
+            durations = await range_queries(db, ids, seconds, queries)
+            print(
+                f"{name:<12} ingest={rate:10.0f}/s"
+                f" storage={sizes['storageSize'] / 2**20:8.1f}MiB"
+                f" indexes={sizes['totalIndexSize'] / 2**20:8.1f}MiB"
+            )
+            print(summarise(f"{name} 1 hour range query", durations))
+    finally:
+        await client.drop_database(BENCHMARK_DB)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sensors", type=int, default=10)
+    parser.add_argument("--hours", type=int, default=6)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.sensors, args.hours, args.batch, args.queries))
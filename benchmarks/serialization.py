@@ -0,0 +1,110 @@
+"""
+Benchmark query response serialization.
+
+Compares the previous response path for animal queries, where stored
+documents are built into an AnimalCollection and then validated and
+serialised again by FastAPI through the route's response_model, with the
+trusted path, which encodes stored documents directly as JSON bytes.
+
+Documents are round tripped through BSON, so they are as the database
+would return them. No database is required:
+
+    python -m benchmarks.serialization --documents 1000 --iterations 100
+"""
+
+import argparse
+import asyncio
+import copy
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import bson
+import orjson
+from bson.objectid import ObjectId
+from fastapi.routing import serialize_response
+
+from app.routers.ftCommon import encodeDocuments
+from app.routers.objects.animals import (
+    Animal,
+    AnimalCollection,
+    animal_query,
+    router,
+)
+
+from .common import summarise
+
+
+def animal(i: int) -> dict:
+    """An animal document as stored by add_one_to_db."""
+    model = Animal.model_validate(
+        {
+            "identifier": {"id": f"UK23001120{i:04}", "scheme": "uk.gov"},
+            "specie": "Cattle",
+            "gender": "Female",
+            "birthDate": datetime(2020, 1, 1) + timedelta(days=i),
+            "productionPurpose": "Milk",
+            "status": "Alive",
+            "reproductionStatus": "Open",
+            "lactationStatus": "Fresh",
+            "healthStatus": "Healthy",
+            "meta": {
+                "source": "{ farm-twin } benchmark",
+                "sourceId": str(uuid.uuid4()),
+                "modified": datetime.now(),
+            },
+        }
+    )
+    document = model.model_dump(by_alias=True, exclude=["ft"])
+    document["_id"] = ObjectId()
+    return bson.decode(bson.encode(document))
+
+
+def response_field():
+    """The response field FastAPI serialises animal queries through."""
+    for route in router.routes:
+        if route.endpoint is animal_query:
+            return route.response_field
+    raise LookupError("Animal query route not found")
+
+
+async def before(field, documents: list) -> bytes:
+    """The response path as it was, through the response_model."""
+    return await serialize_response(
+        field=field,
+        response_content=AnimalCollection(animals=documents),
+        by_alias=False,
+        dump_json=True,
+    )
+
+
+async def after(field, documents: list) -> bytes:
+    """The trusted response path."""
+    return encodeDocuments("animals", documents, None)
+
+
+async def main(documents: int, iterations: int):
+    field = response_field()
+    stored = [animal(i) for i in range(documents)]
+
+    before_body = await before(field, copy.deepcopy(stored))
+    after_body = await after(field, copy.deepcopy(stored))
+    assert orjson.loads(before_body) == orjson.loads(after_body)
+
+    for name, serialise in (("before", before), ("after", after)):
+        durations = []
+        for _ in range(iterations):
+            # Encoding renames _id in place, so each run needs fresh copies
+            batch = copy.deepcopy(stored)
+            start = time.perf_counter()
+            await serialise(field, batch)
+            durations.append((time.perf_counter() - start) * 1000)
+        print(summarise(f"{documents} animals ({name})", durations))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.documents, args.iterations))
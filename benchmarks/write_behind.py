@@ -0,0 +1,98 @@
+"""
+Benchmark write-behind buffering of single samples.
+
+Many clients each add samples one at a time, as sensors do, either
+inserting each sample before acknowledging it or buffering it to be
+written in batches. For each, the latency of acknowledging a sample and
+the rate at which samples reach the database, including the final
+flush, are reported.
+
+Requires a running MongoDB, configured with the same .env settings as the
+API:
+
+    python -m benchmarks.write_behind --clients 50 --samples 200
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+from app.routers.ftBuffer import (
+    WRITE_BEHIND_BATCH,
+    WRITE_BEHIND_CAPACITY,
+    WRITE_BEHIND_INTERVAL,
+    WRITE_BEHIND_TIMEOUT,
+    WriteBuffer,
+    add_one_to_buffer,
+)
+from app.routers.ftCommon import add_one_to_db
+from app.routers.measurements.samples import Sample
+
+from .common import BENCHMARK_DB, open_db, summarise, timed
+
+START = datetime(2025, 1, 1)
+
+
+async def client(add, count: int) -> list[float]:
+    """Add samples from one sensor in turn, returning each latency."""
+    sensor, durations = ObjectId(), []
+    for i in range(count):
+        sample = Sample(
+            sensor=sensor, timestamp=START + timedelta(seconds=i), value=i
+        )
+        _, duration = await timed(add(sample))
+        durations.append(duration)
+    return durations
+
+
+async def run(add, clients: int, count: int, flush=None):
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(client(add, count) for _ in range(clients))
+    )
+    if flush is not None:
+        await flush()
+    duration = time.perf_counter() - start
+    return [d for durations in results for d in durations], duration
+
+
+async def main(clients: int, count: int):
+    connection = open_db()
+    try:
+        db = connection[BENCHMARK_DB]["samples"]
+        await db.drop()
+        buffer = WriteBuffer(
+            "samples",
+            WRITE_BEHIND_CAPACITY,
+            WRITE_BEHIND_BATCH,
+            WRITE_BEHIND_INTERVAL,
+            WRITE_BEHIND_TIMEOUT,
+        )
+        buffer.start(db)
+        for name, add, flush in (
+            ("direct", lambda s: add_one_to_db(s, db, "Sample"), None),
+            ("buffered", lambda s: add_one_to_buffer(s, buffer), buffer.close),
+        ):
+            await db.drop()
+            durations, duration = await run(add, clients, count, flush)
+            written = await db.count_documents({})
+            print(summarise(f"{name} acknowledge", durations))
+            print(
+                f"{name:<8} {written} samples written in {duration:8.3f}s"
+                f" ({written / duration:10.0f} samples/s)"
+            )
+        print(buffer.stats())
+    finally:
+        await connection.drop_database(BENCHMARK_DB)
+        await connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.samples))
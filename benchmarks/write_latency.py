@@ -0,0 +1,103 @@
+"""
+Benchmark single document write latency.
+
+Compares the previous read-after-write implementation of add_one_to_db and
+update_one_in_db (a write followed by find_one) with the current one, which
+returns the inserted document directly and updates with a single
+find_one_and_update.
+
+Uses the samples and milking visit models. Requires a running MongoDB,
+configured with the same .env settings as the API:
+
+    python -m benchmarks.write_latency --iterations 1000
+"""
+
+import argparse
+import asyncio
+import uuid
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+from app.routers.ftCommon import add_one_to_db, update_one_in_db
+from app.routers.icar.icarResources import (
+    icarMilkingVisitEventResource as Visit,
+)
+from app.routers.measurements.samples import Sample
+
+from .common import BENCHMARK_DB, open_db, summarise, timed
+
+
+async def add_then_find(model, db, error_msg_object: str):
+    """add_one_to_db as it was, with a find_one after the insert."""
+    new = await db.insert_one(model.model_dump(by_alias=True, exclude=["ft"]))
+    return await db.find_one({"_id": new.inserted_id})
+
+
+async def update_then_find(model, db, ft, error_msg_object: str):
+    """update_one_in_db as it was, with a find_one after the update."""
+    await db.update_one(
+        {"_id": ft},
+        {"$set": model.model_dump(by_alias=True, exclude=["ft", "created"])},
+        upsert=False,
+    )
+    return await db.find_one({"_id": ft})
+
+
+def sample(i: int) -> Sample:
+    return Sample(sensor=ObjectId(), timestamp=datetime.now(), value=i)
+
+
+def visit(i: int) -> Visit:
+    return Visit.model_validate(
+        {
+            "animal": {"id": f"UK23001120{i:04}", "scheme": "uk.gov"},
+            "milkingStartingDateTime": datetime.now(),
+            "milkingMilkWeight": {"unitCode": "KGM", "value": i % 30},
+            "meta": {
+                "source": "{ farm-twin } benchmark",
+                "sourceId": str(uuid.uuid4()),
+                "modified": datetime.now(),
+            },
+        }
+    )
+
+
+async def run(db, factory, iterations: int):
+    results = {}
+    for name, add, update in (
+        ("before", add_then_find, update_then_find),
+        ("after", add_one_to_db, update_one_in_db),
+    ):
+        await db.drop()
+        adds, updates = [], []
+        for i in range(iterations):
+            created, duration = await timed(add(factory(i), db, "Benchmark"))
+            adds.append(duration)
+            _, duration = await timed(
+                update(factory(i + 1), db, created["_id"], "Benchmark")
+            )
+            updates.append(duration)
+        results[name] = adds, updates
+    await db.drop()
+    return results
+
+
+async def main(iterations: int):
+    client = open_db()
+    try:
+        database = client[BENCHMARK_DB]
+        for name, factory in (("samples", sample), ("visit", visit)):
+            results = await run(database[name], factory, iterations)
+            for label, (adds, updates) in results.items():
+                print(summarise(f"{name} create ({label})", adds))
+                print(summarise(f"{name} update ({label})", updates))
+    finally:
+        await client.drop_database(BENCHMARK_DB)
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--iterations", type=int, default=1000)
+    asyncio.run(main(parser.parse_args().iterations))
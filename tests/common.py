@@ -1,3 +1,7 @@
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
 from dateutil.parser import parse
 
 
@@ -80,6 +84,152 @@ def create_get_update(
     return response_json
 
 
+def create_get_cached(
+    test_client, path, header, payload, payload_updated, key
+):
+    """
+    POST an object, GET it again to check it is served from the query
+    cache, then PATCH it and GET it to check the cache was invalidated.
+    """
+    response_json = create_get(test_client, path, header, payload, key)
+    _id = response_json["ft"]
+    hits = test_client.get("/admin/cache", headers=header).json()["hits"]
+    response = test_client.get(path + f"/?ft={_id}", headers=header)
+    assert response.status_code == 200
+    assert response.json()[key][0] == response_json
+    response = test_client.get("/admin/cache", headers=header)
+    assert response.json()["hits"] == hits + 1
+    response = test_client.patch(
+        path + f"/{_id}", headers=header, json=payload_updated
+    )
+    assert response.status_code == 202
+    response = test_client.get(path + f"/?ft={_id}", headers=header)
+    assert response.status_code == 200
+    check_object_similarity(payload_updated, response.json()[key][0])
+
+
+def create_get_etag(test_client, path, header, payload, payload_updated, key):
+    """
+    POST an object and GET it, then GET it again with its ETag to check it
+    is not modified, then PATCH it and check the ETag no longer matches.
+    """
+    response_json = create_get(test_client, path, header, payload, key)
+    _id = response_json["ft"]
+    response = test_client.get(path + f"/?ft={_id}", headers=header)
+    etag = response.headers["ETag"]
+    conditional = {**header, "If-None-Match": etag}
+    response = test_client.get(path + f"/?ft={_id}", headers=conditional)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    response = test_client.patch(
+        path + f"/{_id}", headers=header, json=payload_updated
+    )
+    assert response.status_code == 202
+    response = test_client.get(path + f"/?ft={_id}", headers=conditional)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def upsert(test_client, path, header, payload, payload_updated, key):
+    """
+    PUT an object by its source twice, checking it is created and then
+    replaced, then GET it by source to check only one copy exists.
+    """
+    source, source_id = payload["meta"]["source"], payload["meta"]["sourceId"]
+    url = path + f"/by-source/{source}/{source_id}"
+    response = test_client.put(url, headers=header, json=payload)
+    assert response.status_code == 201
+    _id = response.json()["ft"]
+    payload_updated = payload_updated | {"meta": payload["meta"]}
+    response = test_client.put(url, headers=header, json=payload_updated)
+    assert response.status_code == 200
+    assert response.json()["ft"] == _id
+    response = test_client.get(
+        path + f"/?source={source}&sourceId={source_id}", headers=header
+    )
+    assert response.status_code == 200
+    assert len(response.json()[key]) == 1
+    check_object_similarity(payload_updated, response.json()[key][0])
+    response = test_client.put(
+        path + f"/by-source/{source}/other", headers=header, json=payload
+    )
+    assert response.status_code == 400
+
+
+def upsert_bulk(test_client, path, header, payload, key):
+    """
+    PUT several objects by source in bulk twice, checking they are created
+    and then updated rather than duplicated.
+    """
+    payloads = [payload, {k: v for k, v in payload.items() if k != "meta"}]
+    response = test_client.put(
+        path + "/by-source/bulk", headers=header, json=payloads
+    )
+    assert response.status_code == 200
+    outcomes = response.json()["outcomes"]
+    assert [outcome["status"] for outcome in outcomes] == [
+        "created",
+        "invalid",
+    ]
+    response = test_client.put(
+        path + "/by-source/bulk", headers=header, json=payloads[:1]
+    )
+    assert response.json()["outcomes"][0]["status"] == "updated"
+    response = test_client.get(
+        path + f"/?sourceId={payload['meta']['sourceId']}", headers=header
+    )
+    assert response.status_code == 200
+    assert [item["ft"] for item in response.json()[key]] == [outcomes[0]["ft"]]
+
+
+def create_changes(test_client, path, header, payload, payload_updated):
+    """
+    POST two objects, PATCH one and DELETE the other, then GET the changes
+    since before the first was posted, checking the one updated is listed
+    as it now is and the one deleted as deleted. Resuming from the token
+    returned must not list them again.
+    """
+    since = (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat()
+    kept = test_client.post(path + "/", headers=header, json=payload)
+    assert kept.status_code == 201
+    kept = kept.json()["ft"]
+    response = test_client.patch(
+        path + f"/{kept}", headers=header, json=payload_updated
+    )
+    assert response.status_code == 202
+    other = {**payload, "meta": {**payload["meta"], "sourceId": str(uuid4())}}
+    deleted = test_client.post(path + "/", headers=header, json=other)
+    deleted = deleted.json()["ft"]
+    response = test_client.delete(path + f"/{deleted}", headers=header)
+    assert response.status_code == 204
+    response = test_client.get(
+        path + "/changes", headers=header, params={"since": since}
+    )
+    assert response.status_code == 200
+    changes = {
+        change["ft"]: change
+        for change in response.json()["changes"]
+        if change["ft"] in (kept, deleted)
+    }
+    assert not changes[kept]["deleted"]
+    check_object_similarity(payload_updated, changes[kept]["document"])
+    assert changes[deleted]["deleted"]
+    assert list(changes) == [kept, deleted]
+    token = response.json()["next"]
+    response = test_client.get(
+        path + "/changes", headers=header, params={"token": token}
+    )
+    assert response.status_code == 200
+    assert not any(
+        change["ft"] in (kept, deleted)
+        for change in response.json()["changes"]
+    )
+    response = test_client.get(
+        path + "/changes", headers=header, params={"token": "invalid"}
+    )
+    assert response.status_code == 400
+
+
 def create_delete(test_client, path, header, payload, key):
     """
     POST an object with a given payload, DELETE an object with a given payload
@@ -135,3 +285,83 @@ def test_endpoint(tc, path, header, payload, key, oid, update):
         create_delete(tc, path, header, payload, key)
         get_not_found(tc, path, header, oid)
         create_wrong_payload(tc, path, header)
+
+
+def create_paginate(test_client, path, header, payloads, key, query):
+    """
+    POST several objects, then GET them back one page at a time by
+    following the returned cursor until no further pages remain.
+    """
+    for payload in payloads:
+        response = test_client.post(path, headers=header, json=payload)
+        assert response.status_code == 201
+    url = path + f"/?{query}&limit=1"
+    response = test_client.get(url, headers=header)
+    found = []
+    while True:
+        assert response.status_code == 200
+        assert len(response.json()[key]) == 1
+        found += response.json()[key]
+        cursor = response.json()["next"]
+        if cursor is None:
+            break
+        response = test_client.get(url + f"&cursor={cursor}", headers=header)
+    assert len({item["ft"] for item in found}) == len(payloads)
+
+
+def get_invalid_cursor(test_client, path, header):
+    """GET with a cursor that was not issued by the server."""
+    response = test_client.get(path + "/?cursor=not-a-cursor", headers=header)
+    assert response.status_code == 400
+
+
+def create_get_ndjson(test_client, path, header, payload, key):
+    """
+    POST an object with a given payload and then GET the contents as a
+    newline delimited JSON stream.
+    """
+    response_json = create_get(test_client, path, header, payload, key)
+    response = test_client.get(
+        path + f"/?ft={response_json['ft']}",
+        headers=header | {"Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+    check_object_similarity(payload, json.loads(lines[0]))
+
+
+def create_get_fields(test_client, path, header, payload, key, fields):
+    """
+    POST an object with a given payload and then GET only the given fields
+    of it, checking no others are returned.
+    """
+    response_json = create_get(test_client, path, header, payload, key)
+    response = test_client.get(
+        path + f"/?ft={response_json['ft']}&fields={','.join(fields)}",
+        headers=header,
+    )
+    assert response.status_code == 200
+    assert len(response.json()[key]) == 1
+    response_json = response.json()[key][0]
+    assert set(response_json) == {"ft"} | {f.split(".")[0] for f in fields}
+    return response_json
+
+
+def create_bulk(test_client, path, header, payloads, key, expected):
+    """
+    POST several objects in bulk, check the outcome of each, then GET the
+    contents of those created to check they exist.
+    """
+    response = test_client.post(path + "/bulk", headers=header, json=payloads)
+    assert response.status_code == 200
+    outcomes = response.json()["outcomes"]
+    assert [outcome["status"] for outcome in outcomes] == expected
+    for payload, outcome in zip(payloads, outcomes):
+        if outcome["status"] == "created":
+            response = test_client.get(
+                path + f"/?ft={outcome['ft']}", headers=header
+            )
+            assert response.status_code == 200
+            check_object_similarity(payload, response.json()[key][0])
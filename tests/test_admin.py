@@ -0,0 +1,94 @@
+class TestAdmin:
+    def test_get_indexes(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/admin/indexes", headers=header)
+        assert response.status_code == 200
+        for report in response.json()["indexes"]:
+            assert all(index["present"] for index in report["declared"])
+
+    def test_get_indexes_tombstone_expiry(
+        self, test_client, fetch_token_admin
+    ):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/admin/indexes", headers=header)
+        assert response.status_code == 200
+        (tombstones,) = [
+            report
+            for report in response.json()["indexes"]
+            if report["collection"] == "tombstones"
+        ]
+        assert any(index["expire"] for index in tombstones["declared"])
+
+    def test_get_indexes_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get("/admin/indexes", headers=header)
+        assert response.status_code == 401
+
+    def test_get_cache(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/admin/cache", headers=header)
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["size"] <= stats["budget"]
+
+    def test_get_cache_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get("/admin/cache", headers=header)
+        assert response.status_code == 401
+
+    def test_get_pool(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/admin/pool", headers=header)
+        assert response.status_code == 200
+        pools = response.json()["pools"]
+        assert any(pool["checkouts"] > 0 for pool in pools)
+
+    def test_get_pool_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get("/admin/pool", headers=header)
+        assert response.status_code == 401
+
+    def test_get_rollups(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/admin/rollups", headers=header)
+        assert response.status_code == 200
+        assert response.json()["dirty"] >= 0
+
+    def test_get_rollups_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get("/admin/rollups", headers=header)
+        assert response.status_code == 401
+
+    def test_get_buffers(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/admin/buffers", headers=header)
+        assert response.status_code == 200
+        for buffer in response.json()["buffers"]:
+            assert buffer["depth"] <= buffer["capacity"]
+
+    def test_get_buffers_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get("/admin/buffers", headers=header)
+        assert response.status_code == 401
+
+    def test_get_live(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/admin/live", headers=header)
+        assert response.status_code == 200
+        assert response.json()["delivered"] >= 0
+
+    def test_get_live_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get("/admin/live", headers=header)
+        assert response.status_code == 401
+
+    def test_get_thumbnails(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/admin/thumbnails", headers=header)
+        assert response.status_code == 200
+        assert response.json()["budget"] > 0
+
+    def test_get_thumbnails_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get("/admin/thumbnails", headers=header)
+        assert response.status_code == 401
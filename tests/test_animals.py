@@ -14,6 +14,42 @@ class TestAnimals:
             test_client, path, header, data, animal_data_updated, key
         )
 
+    def test_create_get_cached_animal(
+        self, test_client, setup_animal, animal_data_updated
+    ):
+        path, header, key, data = setup_animal
+        common.create_get_cached(
+            test_client, path, header, data, animal_data_updated, key
+        )
+
+    def test_create_get_etag_animal(
+        self, test_client, setup_animal, animal_data_updated
+    ):
+        path, header, key, data = setup_animal
+        common.create_get_etag(
+            test_client, path, header, data, animal_data_updated, key
+        )
+
+    def test_upsert_animal(
+        self, test_client, setup_animal, animal_data_updated
+    ):
+        path, header, key, data = setup_animal
+        common.upsert(
+            test_client, path, header, data, animal_data_updated, key
+        )
+
+    def test_upsert_bulk_animal(self, test_client, setup_animal):
+        path, header, key, data = setup_animal
+        common.upsert_bulk(test_client, path, header, data, key)
+
+    def test_changes_animal(
+        self, test_client, setup_animal, animal_data_updated
+    ):
+        path, header, _, data = setup_animal
+        common.create_changes(
+            test_client, path, header, data, animal_data_updated
+        )
+
     def test_create_delete_animal(self, test_client, setup_animal):
         path, header, key, data = setup_animal
         common.create_delete(test_client, path, header, data, key)
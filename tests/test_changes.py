@@ -0,0 +1,25 @@
+class TestChanges:
+    def test_get_changes(self, test_client, setup_animal):
+        path, header, _, data = setup_animal
+        response = test_client.post(path + "/", headers=header, json=data)
+        assert response.status_code == 201
+        _id = response.json()["ft"]
+        response = test_client.get(
+            "/changes/", headers=header, params={"limit": 10000}
+        )
+        assert response.status_code == 200
+        changes = response.json()["changes"]
+        assert _id in [change["ft"] for change in changes]
+        assert all(change["collection"] for change in changes)
+
+    def test_get_changes_invalid_token(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get(
+            "/changes/", headers=header, params={"token": "invalid"}
+        )
+        assert response.status_code == 400
+
+    def test_get_changes_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get("/changes/", headers=header)
+        assert response.status_code == 401
@@ -296,6 +296,36 @@ class TestEvents:
                 path, header, _, _ = setup_milking_visit
                 common.create_wrong_payload(test_client, path, header)
 
+            def test_create_get_milking_visit_ndjson(
+                self, test_client, setup_milking_visit
+            ):
+                path, header, key, data = setup_milking_visit
+                common.create_get_ndjson(test_client, path, header, data, key)
+
+            def test_create_get_milking_visit_fields(
+                self, test_client, setup_milking_visit
+            ):
+                path, header, key, data = setup_milking_visit
+                fields = ["animal.id", "milkingMilkWeight"]
+                response_json = common.create_get_fields(
+                    test_client, path, header, data, key, fields
+                )
+                assert response_json["animal"] == {"id": data["animal"]["id"]}
+
+            def test_create_get_milking_visit_fields_overlapping(
+                self, test_client, setup_milking_visit
+            ):
+                path, header, key, data = setup_milking_visit
+                fields = ["animal.id", "animal", "milkingMilkWeight"]
+                response_json = common.create_get_fields(
+                    test_client, path, header, data, key, fields
+                )
+                # The whole of the animal, as it holds the id
+                assert (
+                    response_json["animal"]["scheme"]
+                    == (data["animal"]["scheme"])
+                )
+
     class TestObservations:
         class TestCarcass:
             def test_create_carcass_event(self, test_client, setup_carcass):
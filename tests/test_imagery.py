@@ -37,6 +37,102 @@ class TestImagery:
         response = test_client.get(path + f"/?ft={ft}", headers=header)
         assert response.status_code == 200
 
+    def test_get_image_range(self, test_client, setup_image):
+        path, header, data, filename = setup_image
+        contents = data.read()
+        data.seek(0)
+        response = test_client.post(
+            path, headers=header, files={"file": (filename, data)}
+        )
+        assert response.status_code == 201
+        ft = response.json()["ft"]
+        response = test_client.get(path + f"/?ft={ft}", headers=header)
+        assert response.status_code == 200
+        assert response.content == contents
+        assert response.headers["accept-ranges"] == "bytes"
+        etag = response.headers["etag"]
+        response = test_client.get(
+            path + f"/?ft={ft}",
+            headers=header | {"Range": "bytes=100-", "If-Range": etag},
+        )
+        assert response.status_code == 206
+        assert response.content == contents[100:]
+        assert response.headers["content-range"] == (
+            f"bytes 100-{len(contents) - 1}/{len(contents)}"
+        )
+        # A different file is sent whole
+        response = test_client.get(
+            path + f"/?ft={ft}",
+            headers=header | {"Range": "bytes=100-", "If-Range": '"other"'},
+        )
+        assert response.status_code == 200
+        assert response.content == contents
+        response = test_client.get(
+            path + f"/?ft={ft}",
+            headers=header | {"Range": f"bytes={len(contents)}-"},
+        )
+        assert response.status_code == 416
+
+    def test_create_image_twice(self, test_client, setup_image):
+        path, header, data, filename = setup_image
+        # Unique to this test, so no other upload shares it
+        contents = data.read() + str(ObjectId()).encode()
+        fts = []
+        for _ in range(2):
+            response = test_client.post(
+                path, headers=header, files={"file": (filename, contents)}
+            )
+            assert response.status_code == 201
+            fts.append(response.json()["ft"])
+        assert fts[0] == fts[1]
+        response = test_client.delete(path + f"/{fts[0]}", headers=header)
+        assert response.status_code == 200
+        # Still held by the other upload
+        response = test_client.get(path + f"/?ft={fts[0]}", headers=header)
+        assert response.status_code == 200
+        assert response.content == contents
+        response = test_client.delete(path + f"/{fts[0]}", headers=header)
+        assert response.status_code == 200
+        response = test_client.get(path + f"/?ft={fts[0]}", headers=header)
+        assert response.status_code == 404
+
+    def test_get_thumbnail(self, test_client, setup_image):
+        path, header, data, filename = setup_image
+        response = test_client.post(
+            path, headers=header, files={"file": (filename, data)}
+        )
+        assert response.status_code == 201
+        ft = response.json()["ft"]
+        response = test_client.get(
+            path + f"/{ft}/thumbnail?w=64&h=64&format=png", headers=header
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        assert "immutable" in response.headers["cache-control"]
+        # Served from the cache
+        cached = test_client.get(
+            path + f"/{ft}/thumbnail?w=64&h=64&format=png", headers=header
+        )
+        assert cached.status_code == 200
+        assert cached.content == response.content
+        etag = response.headers["etag"]
+        response = test_client.get(
+            path + f"/{ft}/thumbnail?w=64&h=64&format=png",
+            headers=header | {"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        response = test_client.delete(path + f"/{ft}", headers=header)
+        assert response.status_code == 200
+        response = test_client.get(
+            path + f"/{ft}/thumbnail?w=64&h=64&format=png",
+            headers=header | {"If-None-Match": etag},
+        )
+        assert response.status_code == 404
+        response = test_client.get(
+            path + f"/{str(ObjectId())}/thumbnail", headers=header
+        )
+        assert response.status_code == 404
+
     def test_get_image_doesnt_exist(self, test_client, setup_image):
         path, header, _, _ = setup_image
         response = test_client.get(
@@ -52,6 +148,198 @@ class TestImagery:
         assert response.status_code == 404
 
 
+class TestUploads:
+    def test_upload_chunks_commit(self, test_client, setup_image):
+        path, header, data, filename = setup_image
+        contents = data.read()
+        chunkSize = 64 * 1024
+        upload = {
+            "filename": filename,
+            "contentType": "image/tiff",
+            "length": len(contents),
+            "chunkSize": chunkSize,
+        }
+        response = test_client.post(
+            "/imagery/uploads/", headers=header, json=upload
+        )
+        assert response.status_code == 201
+        ft, chunks = response.json()["ft"], response.json()["chunks"]
+        assert chunks == -(-len(contents) // chunkSize)
+        # Sent in any order, with one sent twice and one missing
+        for n in [*reversed(range(1, chunks)), 1]:
+            start, end = n * chunkSize, (n + 1) * chunkSize
+            response = test_client.put(
+                f"/imagery/uploads/{ft}/{n}",
+                headers=header,
+                content=contents[start:end],
+            )
+            assert response.status_code == 204
+        response = test_client.get(f"/imagery/uploads/{ft}", headers=header)
+        assert response.status_code == 200
+        assert response.json()["received"] == list(range(1, chunks))
+        response = test_client.post(
+            f"/imagery/uploads/{ft}/commit", headers=header
+        )
+        assert response.status_code == 409
+        response = test_client.put(
+            f"/imagery/uploads/{ft}/0",
+            headers=header,
+            content=contents[:chunkSize],
+        )
+        assert response.status_code == 204
+        response = test_client.post(
+            f"/imagery/uploads/{ft}/commit", headers=header
+        )
+        assert response.status_code == 201
+        assert response.json()["ft"] == ft
+        response = test_client.post(
+            f"/imagery/uploads/{ft}/commit", headers=header
+        )
+        assert response.status_code == 201
+        assert response.json()["ft"] == ft
+        response = test_client.put(
+            f"/imagery/uploads/{ft}/0",
+            headers=header,
+            content=contents[:chunkSize],
+        )
+        assert response.status_code == 409
+        response = test_client.get(path + f"/?ft={ft}", headers=header)
+        assert response.status_code == 200
+        assert response.content == contents
+        assert response.headers["content-type"] == "image/tiff"
+        response = test_client.delete(path + f"/{ft}", headers=header)
+        assert response.status_code == 200
+
+    def test_upload_commit_duplicate_again(self, test_client, setup_image):
+        path, header, data, filename = setup_image
+        contents = data.read()
+        data.seek(0)
+        response = test_client.post(
+            path, headers=header, files={"file": (filename, data)}
+        )
+        assert response.status_code == 201
+        stored = response.json()["ft"]
+        upload = {"filename": filename, "length": len(contents)}
+        response = test_client.post(
+            "/imagery/uploads/", headers=header, json=upload
+        )
+        assert response.status_code == 201
+        ft, chunkSize = response.json()["ft"], response.json()["chunkSize"]
+        for n in range(response.json()["chunks"]):
+            start, end = n * chunkSize, (n + 1) * chunkSize
+            response = test_client.put(
+                f"/imagery/uploads/{ft}/{n}",
+                headers=header,
+                content=contents[start:end],
+            )
+            assert response.status_code == 204
+        # Committed as the image stored, then as if the response was lost
+        for _ in range(2):
+            response = test_client.post(
+                f"/imagery/uploads/{ft}/commit", headers=header
+            )
+            assert response.status_code == 201
+            assert response.json()["ft"] == stored
+        response = test_client.get(path + f"/?ft={ft}", headers=header)
+        assert response.status_code == 404
+        response = test_client.get(path + f"/?ft={stored}", headers=header)
+        assert response.status_code == 200
+        assert response.content == contents
+        for image in [stored, stored]:
+            response = test_client.delete(path + f"/{image}", headers=header)
+            assert response.status_code == 200
+
+    def test_upload_chunk_wrong_size(self, test_client, setup_image):
+        _, header, _, filename = setup_image
+        upload = {"filename": filename, "length": 100000}
+        response = test_client.post(
+            "/imagery/uploads/", headers=header, json=upload
+        )
+        assert response.status_code == 201
+        ft = response.json()["ft"]
+        response = test_client.put(
+            f"/imagery/uploads/{ft}/0", headers=header, content=b"0" * 10
+        )
+        assert response.status_code == 400
+        response = test_client.put(
+            f"/imagery/uploads/{ft}/1", headers=header, content=b"0" * 10
+        )
+        assert response.status_code == 400
+        response = test_client.delete(f"/imagery/uploads/{ft}", headers=header)
+        assert response.status_code == 204
+        response = test_client.get(f"/imagery/uploads/{ft}", headers=header)
+        assert response.status_code == 404
+
+
+class TestCatalogue:
+    def test_catalogue_query(self, test_client, setup_image, setup_metadata):
+        path, header, data, filename = setup_image
+        _, _, _, metadata = setup_metadata
+        contents = data.read()
+        # Unique to this test, so only its images are found
+        source = str(ObjectId())
+        fts = []
+        for name in ["visible", "infrared"]:
+            response = test_client.post(
+                path,
+                headers=header,
+                files={
+                    "file": (filename, contents + (source + name).encode())
+                },
+            )
+            assert response.status_code == 201
+            fts.append(response.json()["ft"])
+            described = metadata | {
+                "image": fts[-1],
+                "metadata": metadata["metadata"]
+                | {"Source": source, "ObjectName": name},
+            }
+            response = test_client.post(
+                "/imagery/metadata", headers=header, json=described
+            )
+            assert response.status_code == 201
+        response = test_client.get(
+            f"/imagery/catalogue/?meta=Source:{source}&limit=1",
+            headers=header,
+        )
+        assert response.status_code == 200
+        images = response.json()["images"]
+        assert [image["ft"] for image in images] == sorted(fts)[:1]
+        assert images[0]["filename"] == filename
+        assert images[0]["metadata"][0]["metadata"]["Source"] == source
+        response = test_client.get(
+            f"/imagery/catalogue/?meta=Source:{source}"
+            f"&cursor={response.json()['next']}",
+            headers=header,
+        )
+        assert response.status_code == 200
+        assert [i["ft"] for i in response.json()["images"]] == sorted(fts)[1:]
+        assert response.json()["next"] is None
+        response = test_client.get(
+            "/imagery/catalogue/",
+            headers=header,
+            params={"meta": [f"Source:{source}", "ObjectName:infrared"]},
+        )
+        assert response.status_code == 200
+        assert [i["ft"] for i in response.json()["images"]] == fts[1:]
+        response = test_client.get(
+            f"/imagery/catalogue/?meta=Source:{source}"
+            "&uploadStart=2100-01-01T00:00:00",
+            headers=header,
+        )
+        assert response.status_code == 404
+        for ft in fts:
+            response = test_client.delete(path + f"/{ft}", headers=header)
+            assert response.status_code == 200
+
+    def test_catalogue_query_unindexed_key(self, test_client, setup_image):
+        _, header, _, _ = setup_image
+        response = test_client.get(
+            "/imagery/catalogue/?meta=Unindexed:value", headers=header
+        )
+        assert response.status_code == 400
+
+
 class TestMetadata:
     def test_create_get_metadata(self, test_client, setup_metadata):
         path, header, key, data = setup_metadata
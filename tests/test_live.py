@@ -0,0 +1,45 @@
+from app.routers.ftLive import LIVE
+from app.routers.live import live_collections
+
+
+class TestLive:
+    def test_get_live_without_subscriptions(
+        self, test_client, fetch_token_admin
+    ):
+        header, _, _ = fetch_token_admin
+        response = test_client.get("/live/", headers=header)
+        assert response.status_code == 400
+
+    def test_get_live_unknown_collection(self, test_client, fetch_token_admin):
+        header, _, _ = fetch_token_admin
+        response = test_client.get(
+            "/live/", headers=header, params={"collection": "users"}
+        )
+        assert response.status_code == 400
+
+    def test_get_live_outside_scope(self, test_client, fetch_token_user):
+        header, _, _ = fetch_token_user
+        response = test_client.get(
+            "/live/",
+            headers=header,
+            params={"collection": "events.observations.position"},
+        )
+        assert response.status_code == 401
+
+    def test_publish_event_for_animal(self, test_client, setup_position):
+        path, header, key, data = setup_position
+        # Streams never end in the test client, so follow the hub directly
+        subscriber = LIVE.subscribe(
+            [],
+            [],
+            [data["animal"]["id"]],
+            live_collections(test_client.app.state),
+        )
+        try:
+            response = test_client.post(path, headers=header, json=data)
+            assert response.status_code == 201
+            assert [str(m.document["_id"]) for m in subscriber.pending] == [
+                response.json()["ft"]
+            ]
+        finally:
+            LIVE.unsubscribe(subscriber)
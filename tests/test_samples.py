@@ -1,3 +1,8 @@
+import struct
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+
 from . import common
 
 
@@ -6,6 +11,13 @@ class TestSamples:
         path, header, key, data = setup_sample
         common.create_get(test_client, path, header, data, key)
 
+    def test_create_get_sample_without_timestamp(
+        self, test_client, setup_sample
+    ):
+        path, header, key, data = setup_sample
+        del data["timestamp"]
+        common.create_get(test_client, path, header, data, key)
+
     def test_create_delete_sample(self, test_client, setup_sample):
         path, header, key, data = setup_sample
         common.create_delete(test_client, path, header, data, key)
@@ -21,3 +33,243 @@ class TestSamples:
     def test_create_duplicate_sample(self, test_client, setup_sample):
         path, header, key, data = setup_sample
         common.create_duplicate(test_client, path, header, data, key)
+
+    def test_create_paginate_sample(self, test_client, setup_sample):
+        path, header, key, data = setup_sample
+        payloads = [
+            data | {"timestamp": str(datetime.now() + timedelta(seconds=i))}
+            for i in range(3)
+        ]
+        common.create_paginate(
+            test_client,
+            path,
+            header,
+            payloads,
+            key,
+            f"sensor={data['sensor']}",
+        )
+
+    def test_get_sample_invalid_cursor(self, test_client, setup_sample):
+        path, header, _, _ = setup_sample
+        common.get_invalid_cursor(test_client, path, header)
+
+    def test_create_get_sample_ndjson(self, test_client, setup_sample):
+        path, header, key, data = setup_sample
+        common.create_get_ndjson(test_client, path, header, data, key)
+
+    def test_create_bulk_sample(self, test_client, setup_sample):
+        path, header, key, data = setup_sample
+        common.create_bulk(
+            test_client,
+            path,
+            header,
+            [data, data, {}],
+            key,
+            ["created", "duplicate", "invalid"],
+        )
+
+    def test_create_batch_sample(self, test_client, setup_sample):
+        path, header, key, data = setup_sample
+        start = int(datetime.now().timestamp() * 1000)
+        batch = {
+            "sensor": data["sensor"],
+            "timestamps": [start + i * 1000 for i in range(3)],
+            "values": [1.0, 2.0, 3.0],
+        }
+        response = test_client.post(
+            path + "/batch", headers=header, json=batch
+        )
+        assert response.status_code == 201
+        assert response.json() == {"inserted": 3, "duplicates": []}
+        response = test_client.get(
+            path + f"/?sensor={data['sensor']}", headers=header
+        )
+        assert response.status_code == 200
+        values = [sample["value"] for sample in response.json()[key]]
+        assert sorted(values) == batch["values"]
+        batch["timestamps"][2] += 1000
+        response = test_client.post(
+            path + "/batch", headers=header, json=batch
+        )
+        assert response.json() == {"inserted": 1, "duplicates": [0, 1]}
+
+    def test_create_batch_sample_binary(self, test_client, setup_sample):
+        path, header, key, data = setup_sample
+        start = int(datetime.now().timestamp() * 1000)
+        timestamps = [start + i * 1000 for i in range(3)]
+        body = struct.pack("<3q3d", *timestamps, 1.0, 2.0, 3.0)
+        response = test_client.post(
+            path + f"/batch?sensor={data['sensor']}",
+            headers=header | {"Content-Type": "application/octet-stream"},
+            content=body,
+        )
+        assert response.status_code == 201
+        assert response.json()["inserted"] == 3
+        response = test_client.post(
+            path + f"/batch?sensor={data['sensor']}",
+            headers=header | {"Content-Type": "application/octet-stream"},
+            content=body[:-1],
+        )
+        assert response.status_code == 400
+
+    def test_create_batch_sample_invalid(self, test_client, setup_sample):
+        path, header, _, data = setup_sample
+        body = struct.pack("<2q2d", 0, 1000, 1.0, float("nan"))
+        response = test_client.post(
+            path + f"/batch?sensor={data['sensor']}",
+            headers=header | {"Content-Type": "application/octet-stream"},
+            content=body,
+        )
+        assert response.status_code == 422
+        batch = {"sensor": data["sensor"], "timestamps": [0], "values": []}
+        response = test_client.post(
+            path + "/batch", headers=header, json=batch
+        )
+        assert response.status_code == 422
+
+    def test_aggregate_sample(self, test_client, setup_sample):
+        path, header, _, data = setup_sample
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        batch = {
+            "sensor": data["sensor"],
+            "timestamps": [
+                int(start.timestamp() * 1000) + i * 60000 for i in range(10)
+            ],
+            "values": [float(i) for i in range(10)],
+        }
+        response = test_client.post(
+            path + "/batch", headers=header, json=batch
+        )
+        assert response.status_code == 201
+        query = {
+            "sensor": data["sensor"],
+            "timestampStart": start.isoformat(),
+            "timestampEnd": (start + timedelta(hours=1)).isoformat(),
+        }
+        response = test_client.get(
+            path + "/aggregate",
+            headers=header,
+            params=query | {"width": "5m", "functions": "count,min,last"},
+        )
+        assert response.status_code == 200
+        buckets = response.json()["buckets"]
+        assert [bucket["count"] for bucket in buckets] == [5, 5]
+        assert [bucket["min"] for bucket in buckets] == [0.0, 5.0]
+        assert [bucket["last"] for bucket in buckets] == [4.0, 9.0]
+        assert "mean" not in buckets[0]
+        response = test_client.get(
+            path + "/aggregate",
+            headers=header,
+            params=query | {"mode": "lttb", "points": 3},
+        )
+        assert response.status_code == 200
+        assert len(response.json()["points"]) == 3
+
+    def test_aggregate_sample_rollups(self, test_client, setup_sample):
+        path, header, _, data = setup_sample
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        batch = {
+            "sensor": data["sensor"],
+            "timestamps": [
+                int(start.timestamp() * 1000) + i * 7 * 60000
+                for i in range(30)
+            ],
+            "values": [float(i) for i in range(30)],
+        }
+        response = test_client.post(
+            path + "/batch", headers=header, json=batch
+        )
+        assert response.status_code == 201
+        # Arrives late, into buckets already rolled up
+        late = data | {
+            "timestamp": (start + timedelta(minutes=95)).isoformat(),
+            "value": 100.0,
+        }
+        response = test_client.post(path, headers=header, json=late)
+        assert response.status_code == 201
+        late_ft = response.json()["ft"]
+        query = {
+            "sensor": data["sensor"],
+            "timestampStart": (start + timedelta(minutes=30)).isoformat(),
+            "timestampEnd": (start + timedelta(hours=3)).isoformat(),
+            "width": "1h",
+            "functions": "min,max,mean,count,first,last",
+        }
+
+        def aggregate():
+            buckets = []
+            for rollups in ("true", "false"):
+                response = test_client.get(
+                    path + "/aggregate",
+                    headers=header,
+                    params=query | {"rollups": rollups},
+                )
+                assert response.status_code == 200
+                buckets.append(response.json()["buckets"])
+            assert buckets[0] == buckets[1]
+            return buckets[0]
+
+        buckets = aggregate()
+        assert sum(bucket["count"] for bucket in buckets) == 22
+        assert buckets[1]["max"] == 100.0
+        # Deleted from a minute it was alone in, which is then emptied
+        response = test_client.delete(path + f"/{late_ft}", headers=header)
+        assert response.status_code == 204
+        buckets = aggregate()
+        assert sum(bucket["count"] for bucket in buckets) == 21
+        assert buckets[1]["max"] != 100.0
+
+    def test_aggregate_sample_invalid_width(self, test_client, setup_sample):
+        path, header, _, data = setup_sample
+        query = {
+            "sensor": data["sensor"],
+            "timestampStart": "2025-01-01T00:00:00Z",
+            "width": "5 minutes",
+        }
+        response = test_client.get(
+            path + "/aggregate", headers=header, params=query
+        )
+        assert response.status_code == 400
+
+    def test_resample_samples(self, test_client, setup_sample):
+        path, header, _, data = setup_sample
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        ms = int(start.timestamp() * 1000)
+        other = str(ObjectId())
+        for sensor, offsets, values in (
+            (data["sensor"], [0, 60, 120], [0.0, 1.0, 2.0]),
+            (other, [30, 90], [10.0, 20.0]),
+        ):
+            batch = {
+                "sensor": sensor,
+                "timestamps": [ms + offset * 1000 for offset in offsets],
+                "values": values,
+            }
+            response = test_client.post(
+                path + "/batch", headers=header, json=batch
+            )
+            assert response.status_code == 201
+        query = {
+            "sensor": [data["sensor"], other],
+            "timestampStart": start.isoformat(),
+            "timestampEnd": (start + timedelta(minutes=2)).isoformat(),
+            "step": "30s",
+        }
+        response = test_client.get(
+            path + "/resample", headers=header, params=query
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert result["sensors"] == [data["sensor"], other]
+        assert result["timestamps"] == [ms + i * 30000 for i in range(5)]
+        assert result["values"] == [
+            [0.0, 0.5, 1.0, 1.5, 2.0],
+            [None, 10.0, 15.0, 20.0, None],
+        ]
+        response = test_client.get(
+            path + "/resample",
+            headers=header,
+            params=query | {"method": "ffill"},
+        )
+        assert response.status_code == 200
+        assert response.json()["values"][1] == [None, 10.0, 10.0, 20.0, 20.0]
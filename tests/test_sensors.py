@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 from . import common
 
 
@@ -14,6 +16,14 @@ class TestSensors:
             test_client, path, header, data, sensor_payload_updated, key
         )
 
+    def test_create_get_etag_sensor(
+        self, test_client, setup_sensor, sensor_payload_updated
+    ):
+        path, header, key, data = setup_sensor
+        common.create_get_etag(
+            test_client, path, header, data, sensor_payload_updated, key
+        )
+
     def test_create_delete_sensor(self, test_client, setup_sensor):
         path, header, key, data = setup_sensor
         common.create_delete(test_client, path, header, data, key)
@@ -55,3 +65,42 @@ class TestSensors:
         common.update_doesnt_exist(
             test_client, path, header, sensor_payload_updated, object_id
         )
+
+    def test_latest_sensor(self, test_client, object_id, setup_sample):
+        samples, header, _, data = setup_sample
+        path = "/measurements/sensors"
+        now = datetime.now()
+        created = []
+        for value, offset in enumerate((0, 2, 1)):
+            payload = data | {
+                "timestamp": str(now + timedelta(seconds=offset)),
+                "value": float(value),
+            }
+            response = test_client.post(samples, headers=header, json=payload)
+            assert response.status_code == 201
+            created.append(response.json()["ft"])
+        response = test_client.get(
+            f"{path}/{data['sensor']}/latest", headers=header
+        )
+        assert response.status_code == 200
+        assert response.json()["value"] == 1.0
+        response = test_client.get(
+            f"{path}/latest",
+            headers=header,
+            params={"sensor": [data["sensor"], object_id]},
+        )
+        assert response.status_code == 200
+        assert [s["value"] for s in response.json()["samples"]] == [1.0]
+        assert response.json()["missing"] == [object_id]
+        response = test_client.delete(
+            f"{samples}/{created[1]}", headers=header
+        )
+        assert response.status_code == 204
+        response = test_client.get(
+            f"{path}/{data['sensor']}/latest", headers=header
+        )
+        assert response.json()["value"] == 2.0
+        response = test_client.get(
+            f"{path}/{object_id}/latest", headers=header
+        )
+        assert response.status_code == 404
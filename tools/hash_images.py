@@ -0,0 +1,82 @@
+"""
+Hash the images stored before uploads were deduplicated.
+
+Images uploaded since are hashed as they are stored, and stored once for
+each content. Those stored before are hashed from their chunks, and any
+with the same content as an image already hashed are dropped in favour
+of it. Image metadata referring to a dropped image is pointed at the one
+kept. Other references to dropped images, held outside the API, no longer
+resolve, so should be updated from the report printed:
+
+    python -m tools.hash_images
+
+The image kept holds a reference for each image dropped in its favour.
+Deleting a dropped image by its old ObjectID finds nothing, so the
+reference it held is only released by deleting the image kept.
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from pymongo import AsyncMongoClient
+
+from app.routers.ftCommon import stampUpdate
+from app.routers.ftGridFS import SHA256, deduplicate, hash_chunks
+
+from .migrate_samples import DB_URL
+
+
+async def repoint(metadata, dropped, kept) -> int:
+    """
+    Point the metadata of a dropped image at the image kept. Returns the
+    number of metadata documents updated.
+    """
+    updated = 0
+    # ObjectIDs of images are stored as given, as strings or ObjectIDs
+    for old, new in [(dropped, kept), (str(dropped), str(kept))]:
+        result = await metadata.update_many(
+            {"image": old}, stampUpdate({"$set": {"image": new}})
+        )
+        updated += result.modified_count
+    return updated
+
+
+async def main(database: str):
+    client = AsyncMongoClient(DB_URL)
+    try:
+        db = client[database]
+        state = SimpleNamespace(
+            files=db["fs"]["files"], chunks=db["fs"]["chunks"]
+        )
+        cursor = state.files.find({SHA256: {"$exists": False}}, {"_id": 1})
+        metadata = db["imagery"]["metadata"]
+        start, hashed, dropped, repointed = time.perf_counter(), 0, 0, 0
+        for file in await cursor.to_list():
+            ft = await deduplicate(
+                state, file["_id"], await hash_chunks(state, file["_id"])
+            )
+            hashed += 1
+            if ft != file["_id"]:
+                dropped += 1
+                updated = await repoint(metadata, file["_id"], ft)
+                repointed += updated
+                print(
+                    f"Dropped image {file['_id']}, the same as {ft},"
+                    f" pointing {updated} metadata at it"
+                )
+        duration = time.perf_counter() - start
+        print(
+            f"Hashed {hashed} images in {duration:.1f}s,"
+            f" dropping {dropped} duplicates and pointing {repointed}"
+            " metadata at the images kept"
+        )
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database", default="farm-twin")
+    asyncio.run(main(parser.parse_args().database))
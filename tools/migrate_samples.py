@@ -0,0 +1,141 @@
+"""
+Migrate samples to a time-series collection.
+
+The ordinary samples collection is renamed out of the way, a time-series
+collection is created in its place with the layout and granularity set in
+.env, and the samples are copied into it in batches. The original is kept
+as a backup until it is dropped by hand, once the migration is verified.
+
+The API should be stopped while migrating, then restarted with
+FT_SAMPLES_TIMESERIES=true. The last sample of each batch copied is
+recorded in measurements.samples_migration, so a migration interrupted is
+resumed after it by running it again, skipping any samples of the batch
+interrupted which were written:
+
+    python -m tools.migrate_samples --batch 10000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from dotenv import load_dotenv
+from pymongo import AsyncMongoClient
+
+from app.routers.ftSeries import SAMPLES, is_timeseries
+
+load_dotenv()
+DB_USER = os.getenv("MONGO_INITDB_ROOT_USERNAME")
+DB_PASS = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
+DB_HOST = os.getenv("MONGO_HOST")
+DB_PORT = os.getenv("MONGO_PORT")
+DB_URL = f"mongodb://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}"
+
+SAMPLES_COLLECTION = "measurements.samples"
+BACKUP_COLLECTION = "measurements.samples_backup"
+PROGRESS_COLLECTION = "measurements.samples_migration"
+
+
+async def last_copied(progress):
+    """
+    ObjectID of the last sample of the last batch copied, or None if none
+    have been.
+    """
+    document = await progress.find_one({"_id": SAMPLES_COLLECTION})
+    return None if document is None else document["after"]
+
+
+async def unwritten(target, documents: list[dict]) -> list[dict]:
+    """
+    The samples of a batch not in the target, as a batch interrupted may
+    have been partly written. Time series have no index on _id, so the
+    samples are looked for within the times of the batch.
+    """
+    times = [document[SAMPLES.time] for document in documents]
+    cursor = target.find(
+        {
+            "_id": {"$in": [document["_id"] for document in documents]},
+            SAMPLES.time: {"$gte": min(times), "$lte": max(times)},
+        },
+        {"_id": 1},
+    )
+    written = {document["_id"] for document in await cursor.to_list()}
+    return [d for d in documents if d["_id"] not in written]
+
+
+async def copy(source, target, progress, batch: int):
+    """Copy samples in order of _id, after any copied already."""
+    after = await last_copied(progress)
+    copied, start = 0, time.perf_counter()
+    resumed = False
+    while True:
+        query = {} if after is None else {"_id": {"$gt": after}}
+        cursor = source.find(query).sort("_id", 1).limit(batch)
+        documents = await cursor.to_list(batch)
+        if not documents:
+            break
+        stored = [SAMPLES.toStored(d) for d in documents]
+        if not resumed:
+            # Only the first batch may have been written in part before
+            stored = await unwritten(target, stored)
+            resumed = True
+        if stored:
+            await target.insert_many(stored)
+        after = documents[-1]["_id"]
+        await progress.update_one(
+            {"_id": SAMPLES_COLLECTION},
+            {"$set": {"after": after}},
+            upsert=True,
+        )
+        copied += len(documents)
+        rate = copied / (time.perf_counter() - start)
+        print(f"Copied {copied} samples ({rate:.0f}/s)")
+    return copied
+
+
+async def main(database: str, batch: int):
+    client = AsyncMongoClient(DB_URL)
+    try:
+        db = client[database]
+        samples = await is_timeseries(db, SAMPLES_COLLECTION)
+        backup = await is_timeseries(db, BACKUP_COLLECTION)
+        if samples is None and backup is None:
+            print("There are no samples to migrate")
+            return
+        if samples is False:
+            if backup is not None:
+                raise SystemExit(f"{BACKUP_COLLECTION} already exists")
+            await db[SAMPLES_COLLECTION].rename(BACKUP_COLLECTION)
+            print(f"Renamed {SAMPLES_COLLECTION} to {BACKUP_COLLECTION}")
+            samples = None
+        if samples is None:
+            await db.create_collection(
+                SAMPLES_COLLECTION, timeseries=SAMPLES.options()
+            )
+            print(f"Created {SAMPLES_COLLECTION} with {SAMPLES.options()}")
+        if backup is None and samples:
+            print(f"{SAMPLES_COLLECTION} is already a time series")
+            return
+        copied = await copy(
+            db[BACKUP_COLLECTION],
+            db[SAMPLES_COLLECTION],
+            db[PROGRESS_COLLECTION],
+            batch,
+        )
+        total = await db[SAMPLES_COLLECTION].count_documents({})
+        expected = await db[BACKUP_COLLECTION].count_documents({})
+        print(f"Copied {copied} samples, {total} of {expected} in total")
+        if total == expected:
+            await db[PROGRESS_COLLECTION].drop()
+            print(f"Drop {BACKUP_COLLECTION} once the migration is verified")
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database", default="farm-twin")
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.database, args.batch))
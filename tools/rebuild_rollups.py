@@ -0,0 +1,66 @@
+"""
+Rebuild the minute, hour and day rollups of samples.
+
+Rollups are kept up to date as samples are written and deleted through
+the API, but samples written before rollups were kept, and samples
+deleted other than through the API, are only reflected once the rollups
+of their sensor are rebuilt from its samples. Every sensor is rebuilt
+unless one is given:
+
+    python -m tools.rebuild_rollups --sensor 6630f0c2a1b2c3d4e5f60718
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+from pymongo import AsyncMongoClient
+
+from app.routers.ftRollups import ROLLUPS, rebuild
+from app.routers.ftSeries import SAMPLES, SeriesCollection, is_timeseries
+from app.routers.measurements.samples import ROLLUP_INDEXES
+
+from .migrate_samples import DB_URL, SAMPLES_COLLECTION
+
+
+async def open_state(db) -> SimpleNamespace:
+    """The collections of samples and their rollups, as the API holds."""
+    samples = db[SAMPLES_COLLECTION]
+    if await is_timeseries(db, SAMPLES_COLLECTION):
+        samples = SeriesCollection(samples, SAMPLES)
+    state = SimpleNamespace(samples=samples)
+    for rollup, indexes in zip(ROLLUPS, ROLLUP_INDEXES):
+        collection = db["measurements"][rollup.name]
+        # Merging into a rollup needs its unique index
+        await collection.create_indexes([i.model() for i in indexes])
+        setattr(state, rollup.name, collection)
+    return state
+
+
+async def main(database: str, sensor: str | None):
+    client = AsyncMongoClient(DB_URL)
+    try:
+        state = await open_state(client[database])
+        if sensor is None:
+            sensors = await state.samples.distinct("sensor")
+        else:
+            sensors = [ObjectId(sensor)]
+        start = time.perf_counter()
+        for count, s in enumerate(sensors, 1):
+            for predicted in (False, True):
+                await rebuild(state, s, predicted)
+            print(f"Rebuilt rollups of sensor {s} ({count}/{len(sensors)})")
+        duration = time.perf_counter() - start
+        print(f"Rebuilt {len(sensors)} sensors in {duration:.1f}s")
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database", default="farm-twin")
+    parser.add_argument("--sensor", help="ObjectID of a single sensor")
+    args = parser.parse_args()
+    asyncio.run(main(args.database, args.sensor))